@@ -1,4 +1,89 @@
+# /backend/app/adapter.py
+"""
+AWS Lambda entry point.
+
+Lambda reuses a warm container for many invocations but freezes it between
+them, so the FastAPI lifespan is not used here: it would connect to Mongo,
+start the background workers and tear everything down again on every
+invocation. Instead the Mongo client is created once per container, with
+one pooled connection opened during init (the HTTP client on first use),
+and reused by every invocation, and the background work runs explicitly:
+
+- notifications queued by a request are delivered before its invocation ends;
+- a bulk farmer import started by a request runs to completion before the
+  invocation ends (so the caller gets its response only then);
+- an EventBridge schedule invoking the function (any event with
+  "source": "aws.events", e.g. every 5 minutes) runs the outbox sweep,
+  ThingSpeak poll, sensor rollups and threshold alerts once.
+"""
+import asyncio
+from datetime import datetime, timezone
+
 from mangum import Mangum
+
 from app.main import app
+from app.config import get_settings
+from app.db.connection import connect_to_mongo, get_db, warm_mongo_pool
+from app.farmerimport import farmer_imports
+from app.http_client import get_http_client
+from app.metrics import profiler
+from app.notifications import notifier
+
+settings = get_settings()
+
+asgi_handler = Mangum(app, lifespan="off")
+
+# Mangum runs every invocation on the thread's current loop (get_event_loop),
+# so set this one as current: clients bound to it stay usable
+loop = asyncio.new_event_loop()
+asyncio.set_event_loop(loop)
+loop.run_until_complete(connect_to_mongo())
+if settings.MONGO_WARM_POOL_ON_STARTUP:
+    try:
+        # one invocation at a time per container, so one connection is enough
+        loop.run_until_complete(warm_mongo_pool(1))
+    except Exception as e:
+        print(f"Database pool not warmed: {e}")
+profiler.start()
+
+_indexes_checked = False
+
+
+async def run_scheduled_jobs() -> dict:
+    """One pass of everything the long-running server does in background tasks."""
+    global _indexes_checked
+    from app.alerts import alert_engine, claim_pass
+    from app.db.indexes import ensure_indexes
+    from app.sensorrollups import claim_rollup_run, run_rollups
+    from app.thingspeak import poller
+
+    db = get_db()
+    client = get_http_client()
+    if settings.ENSURE_INDEXES_ON_STARTUP and not _indexes_checked:
+        await ensure_indexes(db)
+        _indexes_checked = True
+
+    await notifier.flush(db, client, sweep=True)
+    result = {"readings": 0, "alerts": None}
+    if settings.SENSOR_POLLER_ENABLED:
+        poller.bind(db, client)
+        result["readings"] = await poller.poll_once()
+    if settings.SENSOR_ROLLUP_ENABLED and await claim_rollup_run(db, datetime.now(timezone.utc)):
+        await run_rollups(db)
+    if settings.ALERTS_ENABLED and await claim_pass(db, datetime.now(timezone.utc)):
+        summary = await alert_engine.run_once(db)
+        result["alerts"] = {key: value for key, value in summary.items() if key != "ran_at"}
+    return result
+
+
+def handler(event, context):
+    if event.get("source") == "aws.events":
+        return loop.run_until_complete(run_scheduled_jobs())
 
-handler = Mangum(app)
+    response = asgi_handler(event, context)
+    if notifier.unsent:
+        loop.run_until_complete(notifier.flush(get_db(), get_http_client()))
+    # the container may be frozen once this returns, so finish bulk imports first
+    if farmer_imports.tasks:
+        loop.run_until_complete(farmer_imports.wait())
+    return response
@@ -0,0 +1,234 @@
+# /backend/app/alerts.py
+"""
+Threshold alerts: calls farmers when a sensor on one of their farms goes critical.
+
+When ALERTS_ENABLED is set, every ALERT_INTERVAL_SECONDS the engine (started
+from `main.lifespan`) takes the latest ThingSpeak reading of every sensor in
+one aggregation, evaluates all alert conditions, and places at most one call
+per farmer covering all of their critical farms. Per-sensor alert state lives in `sensoralerts`:
+
+    {"_id": "<sensor_id>", "conditions": {"soil_dry": {"active": True,
+     "since": <datetime>, "last_called_at": <datetime>}}}
+
+Conditions use hysteresis (they clear at a different level than they
+trigger) and a cooldown between calls, so a value hovering around a
+threshold doesn't ring the farmer every cycle. Calls go through a small
+worker pool on top of `app.twilio_client`; TWILIO_TRANSPORT="fake" records
+calls in memory so the whole loop can run offline.
+"""
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from app.config import get_settings
+from app.db.leases import claim_lease
+from app.db.sensors import READINGS_COLLECTION, THINGSPEAK_SOURCE, get_sensor_owners
+from app.twilio_client import dispatch_call, to_e164
+from app.voicemessages import voice_messages
+
+settings = get_settings()
+
+ALERTS_COLLECTION = "sensoralerts"
+
+# name -> metric, direction, level that triggers the alert, level that clears it
+CONDITIONS: Dict[str, dict] = {
+    "soil_dry": {
+        "metric": "soil_moisture",
+        "below": True,
+        "trigger": settings.ALERT_SOIL_DRY_BELOW,
+        "clear": settings.ALERT_SOIL_DRY_CLEAR,
+    },
+    "tank_low": {
+        "metric": "water_tank_level",
+        "below": True,
+        "trigger": settings.ALERT_TANK_LOW_BELOW,
+        "clear": settings.ALERT_TANK_LOW_CLEAR,
+    },
+    "tank_full": {
+        "metric": "water_tank_level",
+        "below": False,
+        "trigger": settings.ALERT_TANK_FULL_ABOVE,
+        "clear": settings.ALERT_TANK_FULL_CLEAR,
+    },
+}
+
+
+def is_active(condition: dict, value: Optional[float], was_active: bool) -> bool:
+    """Applies hysteresis: an active alert only clears once the value is back past `clear`."""
+    if value is None:
+        return was_active
+    if condition["below"]:
+        return value < condition["clear"] if was_active else value <= condition["trigger"]
+    return value > condition["clear"] if was_active else value >= condition["trigger"]
+
+
+async def latest_readings(db: AsyncIOMotorDatabase, since: datetime) -> Dict[str, dict]:
+    """
+    Newest reading per sensor since `since`, in one aggregation. Only
+    readings stored by the ThingSpeak poller count: a call must never be
+    triggered by simulated or hand-inserted data.
+    """
+    group = {"_id": "$meta.sensor_id", "timestamp": {"$first": "$timestamp"}}
+    for metric in {condition["metric"] for condition in CONDITIONS.values()}:
+        group[metric] = {"$first": f"${metric}"}
+
+    pipeline = [
+        {"$match": {"timestamp": {"$gte": since}, "meta.source": THINGSPEAK_SOURCE}},
+        {"$sort": {"meta.sensor_id": 1, "timestamp": -1}},
+        {"$group": group},
+    ]
+    return {doc["_id"]: doc async for doc in db[READINGS_COLLECTION].aggregate(pipeline)}
+
+
+async def dispatch_calls(db: AsyncIOMotorDatabase, calls: List[dict], concurrency: int) -> Dict[str, Optional[str]]:
+    """Places calls with at most `concurrency` in flight. Returns {farmer key: call sid or None}."""
+    queue: asyncio.Queue = asyncio.Queue()
+    for call in calls:
+        queue.put_nowait(call)
+    results: Dict[str, Optional[str]] = {}
+
+    async def worker():
+        while True:
+            try:
+                call = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                results[call["key"]] = await dispatch_call(db, call["to"], call["twiml"], purpose="alert")
+            except Exception as e:
+                print(f"Alert call to {call['to']} failed: {e}")
+                results[call["key"]] = None
+
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(calls)))))
+    return results
+
+
+async def run_alert_pass(db: AsyncIOMotorDatabase, now: Optional[datetime] = None) -> dict:
+    """Evaluates every sensor once and places the calls that are due. Returns a summary."""
+    now = now or datetime.now(timezone.utc)
+    cooldown = timedelta(seconds=settings.ALERT_COOLDOWN_SECONDS)
+
+    readings = await latest_readings(db, now - timedelta(seconds=settings.ALERT_MAX_READING_AGE_SECONDS))
+    cursor = db[ALERTS_COLLECTION].find({"_id": {"$in": list(readings)}})
+    states = {doc["_id"]: doc.get("conditions", {}) async for doc in cursor}
+    owners = await get_sensor_owners(db, readings)
+
+    updates: Dict[str, dict] = {}
+    due: Dict[str, dict] = {}
+    for sensor_id, reading in readings.items():
+        previous = states.get(sensor_id, {})
+        current = {}
+        for name, condition in CONDITIONS.items():
+            state = dict(previous.get(name) or {"active": False})
+            active = is_active(condition, reading.get(condition["metric"]), state["active"])
+            if active and not state["active"]:
+                state["since"] = now
+            state["active"] = active
+            current[name] = state
+
+            owner = owners.get(sensor_id)
+            last_called = state.get("last_called_at")
+            if last_called is not None and last_called.tzinfo is None:
+                last_called = last_called.replace(tzinfo=timezone.utc)
+            to = to_e164(owner.get("mobile_no")) if owner else None
+            if not active or not to:
+                continue
+            if last_called is not None and now - last_called < cooldown:
+                continue
+
+            key = str(owner["farmer_id"])
+            call = due.setdefault(key, {"key": key, "to": to, "owner": owner, "alerts": []})
+            call["alerts"].append({
+                "sensor_id": sensor_id,
+                "farm_key": owner.get("farm_key", sensor_id),
+                "condition": name,
+                "value": reading.get(condition["metric"]),
+            })
+
+        if current != previous:
+            updates[sensor_id] = current
+
+    calls = [
+        {
+            "key": key,
+            "to": call["to"],
+            "twiml": voice_messages.render(
+                call["owner"].get("call_language"),
+                [(alert["farm_key"], alert["condition"]) for alert in call["alerts"]],
+            ),
+        }
+        for key, call in due.items()
+    ]
+    results = await dispatch_calls(db, calls, settings.ALERT_CALL_CONCURRENCY)
+
+    called = defaultdict(list)
+    for key, sid in results.items():
+        if sid:
+            for alert in due[key]["alerts"]:
+                called[alert["sensor_id"]].append(alert["condition"])
+    for sensor_id, names in called.items():
+        current = updates.setdefault(sensor_id, dict(states.get(sensor_id, {})))
+        for name in names:
+            current[name] = {**current[name], "last_called_at": now}
+
+    if updates:
+        await db[ALERTS_COLLECTION].bulk_write(
+            [
+                UpdateOne({"_id": sensor_id}, {"$set": {"conditions": conditions}}, upsert=True)
+                for sensor_id, conditions in updates.items()
+            ],
+            ordered=False,
+        )
+
+    return {
+        "ran_at": now,
+        "sensors": len(readings),
+        "farmers_alerted": sum(1 for sid in results.values() if sid),
+        "calls_failed": sum(1 for sid in results.values() if not sid),
+    }
+
+
+async def claim_pass(db: AsyncIOMotorDatabase, now: datetime) -> bool:
+    """Only one worker process runs each alert pass."""
+    lease = timedelta(seconds=settings.ALERT_INTERVAL_SECONDS * 0.9)
+    return await claim_lease(db, "sensor_alerts", now, lease)
+
+
+class AlertEngine:
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.last_run: Optional[dict] = None
+
+    def start(self, db: AsyncIOMotorDatabase) -> None:
+        self.task = asyncio.create_task(self._run(db))
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+
+    async def run_once(self, db: AsyncIOMotorDatabase) -> dict:
+        self.last_run = await run_alert_pass(db)
+        return self.last_run
+
+    async def _run(self, db: AsyncIOMotorDatabase) -> None:
+        while True:
+            try:
+                if await claim_pass(db, datetime.now(timezone.utc)):
+                    await self.run_once(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Alert pass failed: {e}")
+            await asyncio.sleep(settings.ALERT_INTERVAL_SECONDS)
+
+
+alert_engine = AlertEngine()
@@ -0,0 +1,135 @@
+# /backend/app/cache.py
+"""
+Small in-process TTL + LRU cache with single-flight loading.
+
+Every cache registers itself in `CACHES` so its hit/miss counters can be
+reported from one place.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+CACHES: Dict[str, "TTLCache"] = {}
+
+_MISSING = object()
+
+
+class _LeaderCancelled(Exception):
+    """Set on a load's future when the caller running it is cancelled."""
+
+
+class TTLCache:
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # key -> (expires_at, value), oldest first
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        # key -> future of the load currently running for it
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # bumped by invalidate/clear, so a load that started before one doesn't store a stale value
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+        CACHES[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+        self._inflight.pop(key, None)
+        self._generation += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._inflight.clear()
+        self._generation += 1
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the cached value, or runs `loader` once and caches its result.
+        Concurrent callers for the same key wait on the same load instead of
+        starting their own; if the caller running it is cancelled, one of them
+        takes over. Failed loads are not cached, and neither are loads that an
+        invalidate/clear overtook (their callers still get the result).
+        """
+        while True:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                return await self._load(key, loader)
+
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except _LeaderCancelled:
+                continue
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            # only this caller was cancelled: the waiters start the load again
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # mark as retrieved so an unawaited failure doesn't log a warning
+            future.exception()
+            raise
+        else:
+            if self._generation == generation:
+                self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            # an invalidate may have let a newer load take this key's slot
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def cache_stats() -> Dict[str, dict]:
+    return {name: cache.stats() for name, cache in CACHES.items()}
@@ -1,5 +1,6 @@
 # /backend/app/config.py
 from functools import lru_cache
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,24 +11,136 @@ class Settings(BaseSettings):
     # Database
     MONGODB_URI: str
     DATABASE_NAME: str
+    ENSURE_INDEXES_ON_STARTUP: bool = True
+    MONGO_WARM_POOL_ON_STARTUP: bool = True
+    # Client pool and timeouts; these override the same options in MONGODB_URI
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0  # also how many connections main.lifespan opens up front (at least 1)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_CONNECT_TIMEOUT_MS: int = 5000
+    MONGO_SOCKET_TIMEOUT_MS: Optional[int] = 60000  # no limit when unset
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = 5000  # wait for a free pooled connection
+    MONGO_COMPRESSORS: str = "zstd,zlib"  # "snappy" also works once python-snappy is installed
+    # admin lists and sensor history (get_analytics_db); everything else reads the primary
+    MONGO_ANALYTICS_READ_PREFERENCE: str = "secondaryPreferred"
+    MONGO_POOL_SATURATION_WARN: float = 0.9  # /health/db is "degraded" above this share in use
+
+    # Outbound HTTP (shared client pool)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+
+    # Weather cache (crop prediction)
+    WEATHER_CACHE_TTL_SECONDS: float = 900
+    WEATHER_CACHE_MAX_ENTRIES: int = 10000
+    WEATHER_CACHE_PRECISION: int = 2
+    OPEN_METEO_BASE_URL: str = "https://api.open-meteo.com"
+
+    # ML crop prediction (/actual-crop-prediction), see app/cropmodel.py
+    CROP_MODEL_DIR: str = "models/crop"  # relative to backend/
+    CROP_MODEL_VERSION: Optional[str] = None  # newest version when unset
+    CROP_MODEL_PRELOAD: bool = True  # load the model in main.lifespan instead of on first request
+    CROP_BATCH_MAX: int = 64
+    # extra wait for more rows after the first; batches also form while the previous one runs
+    CROP_BATCH_WINDOW_MS: float = 0.0
 
     # Cloudinary
     NEXT_PUBLIC_CLOUDINARY_CLOUD_NAME: str
     CLOUDINARY_API_KEY: str
     CLOUDINARY_API_SECRET: str
+    CLOUDINARY_UPLOAD_PREFIX: str = "https://api.cloudinary.com"
+
+    # Farmer profile cache (farmer login, GET /adminfarmerdata/{id}), see app/farmercache.py
+    FARMER_CACHE_ENABLED: bool = True
+    FARMER_CACHE_TTL_SECONDS: float = 300
+    FARMER_CACHE_MAX_ENTRIES: int = 10000
+    FARMER_CACHE_SYNC_SECONDS: float = 5  # how often each worker checks for writes by others
+
+    # Image uploads
+    UPLOAD_MAX_BYTES: int = 15 * 1024 * 1024  # per file
+    UPLOAD_MAX_REQUEST_BYTES: int = 64 * 1024 * 1024  # whole multipart request, checked before reading it
+    UPLOAD_MAX_CONCURRENCY: int = 4
+    UPLOAD_MAX_DIMENSION: int = 2048
+    UPLOAD_JPEG_QUALITY: int = 85
+    IMAGE_HASH_CACHE_MAX_ENTRIES: int = 5000
+
+    # Bulk farmer import (POST /adminaddfarmerdata/bulk)
+    FARMER_IMPORT_MAX_BYTES: int = 50 * 1024 * 1024
+    FARMER_IMPORT_BATCH_SIZE: int = 500
+    FARMER_IMPORT_MAX_ERRORS: int = 1000  # per-row errors kept on the job
+    FARMER_IMPORT_STALE_SECONDS: float = 300  # a running job not updated for this long is failed
 
     # Telegram
     TELEGRAM_BOT_TOKEN: str
     TELEGRAM_CHAT_ID: str
+    TELEGRAM_API_BASE_URL: str = "https://api.telegram.org"
+
+    # Telegram notification queue / outbox
+    NOTIFY_QUEUE_SIZE: int = 1000
+    NOTIFY_BATCH_WINDOW_SECONDS: float = 2.0
+    NOTIFY_BATCH_MAX: int = 20
+    NOTIFY_MAX_ATTEMPTS: int = 6
+    NOTIFY_RETRY_BASE_SECONDS: float = 5.0
+    NOTIFY_SWEEP_INTERVAL_SECONDS: float = 30.0
+
+    # ThingSpeak sensor ingestion
+    SENSOR_POLLER_ENABLED: bool = True
+    THINGSPEAK_BASE_URL: str = "https://api.thingspeak.com"
+    THINGSPEAK_POLL_INTERVAL_SECONDS: float = 300
+    THINGSPEAK_MAX_CONCURRENCY: int = 10
+    THINGSPEAK_REQUESTS_PER_SECOND: float = 5
+    SENSOR_ROLLUP_ENABLED: bool = True
+    SENSOR_ROLLUP_INTERVAL_SECONDS: float = 900
+
+    # Demo sensor simulator: "memory" (per process) or "mongo" (shared by every worker)
+    DEMO_SENSOR_STATE_BACKEND: str = "mongo"
+    DEMO_SENSOR_STATE_TTL_SECONDS: float = 24 * 3600
+    DEMO_SENSOR_MAX_ENTRIES: int = 10_000
+
+    # Sensor threshold alerts (Twilio calls to farmers). Off unless enabled
+    # explicitly, since every pass can ring real phones.
+    ALERTS_ENABLED: bool = False
+    ALERT_INTERVAL_SECONDS: float = 900
+    ALERT_CALL_CONCURRENCY: int = 5
+    ALERT_COOLDOWN_SECONDS: float = 6 * 3600
+    ALERT_MAX_READING_AGE_SECONDS: float = 3600
+    ALERT_SOIL_DRY_BELOW: float = 25
+    ALERT_SOIL_DRY_CLEAR: float = 35
+    ALERT_TANK_LOW_BELOW: float = 15
+    ALERT_TANK_LOW_CLEAR: float = 25
+    ALERT_TANK_FULL_ABOVE: float = 95
+    ALERT_TANK_FULL_CLEAR: float = 90
 
     # Twilio
     TWILIO_ACCOUNT_SID: str
     TWILIO_AUTH_TOKEN: str
     TWILIO_PHONE_NUMBER: str
+    TWILIO_TRANSPORT: str = "twilio"  # "fake" records calls in memory instead
+    TWILIO_MAX_CONCURRENCY: int = 8
+    TWILIO_TIMEOUT_SECONDS: float = 15.0
+    # prefixed to farmer mobile numbers stored without one (10-digit Indian numbers)
+    TWILIO_DEFAULT_COUNTRY_CODE: str = "91"
+    # public URL of POST /actual-twilio-call/status; status callbacks are off when unset
+    TWILIO_STATUS_CALLBACK_URL: Optional[str] = None
+    # optional pre-recorded alert audio, see app/voicemessages.py
+    VOICE_AUDIO_BASE_URL: Optional[str] = None
+    VOICE_AUDIO_MANIFEST: Optional[str] = None
 
     # Admin
     ADMIN_PANEL_PASSWORD: str
 
+    # Response compression (br or gzip, by Accept-Encoding), see app/compression.py
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_BYTES: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 0-11; higher costs much more CPU per response
+
+    # Metrics (GET /metrics) and the opt-in slow request profiler
+    METRICS_ENABLED: bool = True
+    PROFILE_SLOW_REQUEST_MS: Optional[float] = None  # profiling is off when unset
+    PROFILE_SAMPLE_INTERVAL_MS: float = 5
+    PROFILE_KEEP: int = 20
+
     # Pydantic v2 config
     model_config = SettingsConfigDict(
         env_file=".env",
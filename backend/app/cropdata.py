@@ -0,0 +1,19 @@
+# /backend/app/cropdata.py
+"""
+Crop climate table shared by the demo prediction route and the scoring
+engine. Kept free of heavy imports so routes can use it at import time.
+"""
+
+# Scientific Data Mapping: (Min_Temp, Max_Temp, Ideal_Humidity)
+CROP_DATA = {
+    "Paddy (Rice)": (22, 35, 80), "Maize": (20, 30, 60),
+    "Wheat": (15, 25, 50), "Barley": (15, 25, 50),
+    "Buckwheat": (18, 24, 70), "Large Cardamom": (15, 25, 80),
+    "Ginger": (20, 30, 75), "Turmeric": (20, 30, 75),
+    "Orange": (20, 30, 60), "Mandarin": (20, 30, 60),
+    "Tomato": (18, 27, 65), "Cabbage": (15, 21, 75),
+    "Cauliflower": (15, 21, 75), "Peas": (10, 18, 60),
+    "Potato": (15, 20, 80), "Sugarcane": (25, 35, 75),
+    "Soybean": (20, 30, 60), "Cotton": (21, 32, 50),
+    "Mustard": (15, 25, 50), "Groundnut": (20, 30, 60)
+}
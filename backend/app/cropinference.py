@@ -0,0 +1,137 @@
+# /backend/app/cropinference.py
+"""
+Micro-batched inference for the crop model.
+
+Requests put their feature row on a queue and await a future. One worker
+task takes whatever is queued (up to CROP_BATCH_MAX rows, optionally
+waiting CROP_BATCH_WINDOW_MS for more) and runs a single vectorized
+`top_k` on a dedicated thread, so NumPy never blocks the event loop.
+While a batch is computing the next one fills up, so under load
+concurrent requests share one predict call without any added wait.
+
+The model and NumPy are loaded on the inference thread: in `main.lifespan`
+when CROP_MODEL_PRELOAD is set, otherwise (and on Lambda) on the first
+prediction.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+from app.config import get_settings
+
+if TYPE_CHECKING:
+    from app.cropmodel import CropModel
+
+settings = get_settings()
+
+TOP_K = 3
+
+# one thread: batches run one after another, and the model is only touched here
+inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="crop-inference")
+
+
+class CropInferenceServer:
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+        self.model: Optional["CropModel"] = None
+        self.batches = 0
+        self.rows = 0
+
+    def start(self) -> None:
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+        self.queue = None
+
+    def _load(self) -> "CropModel":
+        if self.model is None:
+            from app.cropmodel import load_model
+
+            self.model = load_model()
+            print(f"Crop model {self.model.version} loaded ({len(self.model.classes)} crops)")
+        return self.model
+
+    async def warm(self) -> "CropModel":
+        """Loads the model and runs one prediction, so the first request pays for neither."""
+        loop = asyncio.get_running_loop()
+        model = await loop.run_in_executor(inference_executor, self._load)
+        await loop.run_in_executor(inference_executor, model.top_k, [[25.0, 60.0, 1010.0, 2.0, 300.0]], TOP_K)
+        return model
+
+    async def predict(self, features: Sequence[float]) -> Tuple[str, List[Tuple[str, float]]]:
+        """Top crops for one feature row, as (model version, [(crop, probability), ...])."""
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            # no lifespan on Lambda: the worker starts with the first request
+            self.start()
+        future = loop.create_future()
+        await self.queue.put((list(features), future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            futures = [future for _, future in batch]
+            try:
+                model = await loop.run_in_executor(inference_executor, self._load)
+                results = await loop.run_in_executor(
+                    inference_executor, model.top_k, [row for row, _ in batch], TOP_K
+                )
+            except asyncio.CancelledError:
+                for future in futures:
+                    future.cancel()
+                raise
+            except Exception as e:
+                print(f"Crop inference error: {e}")
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.rows += len(batch)
+            for future, result in zip(futures, results):
+                # the request may have been cancelled (client went away) meanwhile
+                if not future.done():
+                    future.set_result((model.version, result))
+
+    async def _next_batch(self) -> List[tuple]:
+        """Waits for one row, then takes what is queued until the batch or the window is full."""
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.CROP_BATCH_WINDOW_MS / 1000
+        while len(batch) < settings.CROP_BATCH_MAX:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def stats(self) -> dict:
+        return {
+            "model_version": self.model.version if self.model else None,
+            "batches": self.batches,
+            "rows": self.rows,
+            "avg_batch": round(self.rows / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+crop_inference = CropInferenceServer()
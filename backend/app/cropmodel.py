@@ -0,0 +1,231 @@
+# /backend/app/cropmodel.py
+"""
+Crop classifier behind /actual-crop-prediction, and its on-disk registry.
+
+The model is a Gaussian naive Bayes over five weather features. Training
+is closed-form (per-crop means and variances), and prediction for N rows
+is two (N, F) x (F, C) matrix products followed by a softmax, so a batch
+of rows costs about as much as a single one.
+
+Each trained model is a versioned directory under CROP_MODEL_DIR:
+
+    models/crop/v1/meta.json       features, classes, training summary
+    models/crop/v1/means.npy       (C, F) float64
+    models/crop/v1/variances.npy   (C, F) float64
+    models/crop/v1/log_priors.npy  (C,)   float64
+
+The arrays are a few hundred bytes per crop, so each worker process loads
+its own copy and derives the prediction terms from them once, at load.
+CROP_MODEL_VERSION pins a version; by default the highest one is served.
+
+    uv run python -m app.cropmodel list
+    uv run python -m app.cropmodel train --data observations.csv
+    uv run python -m app.cropmodel train --synthetic --seed 7
+
+--data takes a CSV with one column per feature plus `crop`. --synthetic
+samples rows from the CROP_DATA climate table, to bootstrap a model until
+field observations exist.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import get_settings
+
+settings = get_settings()
+
+FEATURES = ("temperature", "humidity", "pressure", "wind_speed", "net_radiation")
+ARRAYS = ("means", "variances", "log_priors")
+VERSION_PATTERN = re.compile(r"v(\d+)")
+
+# keeps a feature that is constant within one crop from dividing by zero
+MIN_VARIANCE = 1e-3
+# a relative CROP_MODEL_DIR is relative to backend/, not to the working directory
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+class CropModel:
+    def __init__(self, version: str, meta: dict, means: np.ndarray, variances: np.ndarray, log_priors: np.ndarray):
+        self.version = version
+        self.meta = meta
+        self.classes: List[str] = meta["classes"]
+        self.means = means
+        self.variances = variances
+        self.log_priors = log_priors
+
+        # sum_f (x - mu)^2 / var  ==  x^2 . inv_var  -  2 x . (mu * inv_var)  +  sum_f mu^2 * inv_var
+        inv_var = 1.0 / variances
+        self._quad = inv_var.T                      # (F, C)
+        self._lin = (-2.0 * means * inv_var).T      # (F, C)
+        self._bias = (
+            log_priors
+            - 0.5 * np.log(2 * np.pi * variances).sum(axis=1)
+            - 0.5 * (means ** 2 * inv_var).sum(axis=1)
+        )
+
+    def predict_proba(self, rows: Sequence[Sequence[float]]) -> np.ndarray:
+        """(N, F) features -> (N, C) class probabilities."""
+        x = np.asarray(rows, dtype=np.float64)
+        log_likelihood = -0.5 * (x ** 2 @ self._quad + x @ self._lin) + self._bias
+        log_likelihood -= log_likelihood.max(axis=1, keepdims=True)
+        probs = np.exp(log_likelihood)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def top_k(self, rows: Sequence[Sequence[float]], k: int = 3) -> List[List[Tuple[str, float]]]:
+        probs = self.predict_proba(rows)
+        order = np.argsort(-probs, axis=1, kind="stable")[:, :k]
+        return [
+            [(self.classes[c], float(probs[row, c])) for c in order[row]]
+            for row in range(probs.shape[0])
+        ]
+
+
+def fit(rows: np.ndarray, labels: Sequence[str]) -> Tuple[List[str], Dict[str, np.ndarray]]:
+    """Per-class means, variances and log priors for (N, F) rows."""
+    classes = sorted(set(labels))
+    label_index = np.array([classes.index(label) for label in labels])
+    means = np.stack([rows[label_index == c].mean(axis=0) for c in range(len(classes))])
+    variances = np.stack([rows[label_index == c].var(axis=0) for c in range(len(classes))])
+    counts = np.bincount(label_index, minlength=len(classes))
+    return classes, {
+        "means": means,
+        "variances": np.maximum(variances, MIN_VARIANCE),
+        "log_priors": np.log(counts / counts.sum()),
+    }
+
+
+class ModelRegistry:
+    def __init__(self, root: str):
+        self.root = root
+
+    def versions(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        found = [name for name in os.listdir(self.root) if VERSION_PATTERN.fullmatch(name)]
+        return sorted(found, key=lambda name: int(name[1:]))
+
+    def resolve(self, version: Optional[str] = None) -> str:
+        versions = self.versions()
+        if version:
+            if version not in versions:
+                raise LookupError(f"Crop model {version} not found in {self.root}")
+            return version
+        if not versions:
+            raise LookupError(f"No crop model in {self.root}; train one with `python -m app.cropmodel train`")
+        return versions[-1]
+
+    def load(self, version: Optional[str] = None) -> CropModel:
+        version = self.resolve(version)
+        path = os.path.join(self.root, version)
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy")) for name in ARRAYS}
+        return CropModel(version, meta, **arrays)
+
+    def save(self, classes: List[str], arrays: Dict[str, np.ndarray], meta: dict) -> str:
+        """Writes the next version; the directory appears complete or not at all."""
+        os.makedirs(self.root, exist_ok=True)
+        versions = self.versions()
+        version = f"v{int(versions[-1][1:]) + 1 if versions else 1}"
+
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+        # mkdtemp creates it private; the serving user (e.g. on Lambda) may differ
+        os.chmod(staging, 0o755)
+        for name in ARRAYS:
+            np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(arrays[name], dtype=np.float64))
+        with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({**meta, "version": version, "features": list(FEATURES), "classes": classes}, f, indent=2)
+        os.rename(staging, os.path.join(self.root, version))
+        return version
+
+
+registry = ModelRegistry(os.path.join(BACKEND_DIR, settings.CROP_MODEL_DIR))
+
+
+def load_model() -> CropModel:
+    return registry.load(settings.CROP_MODEL_VERSION)
+
+
+def read_training_csv(path: str) -> Tuple[np.ndarray, List[str]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        records = list(csv.DictReader(f))
+    rows = np.array([[float(record[feature]) for feature in FEATURES] for record in records])
+    return rows, [record["crop"] for record in records]
+
+
+def synthetic_training_data(samples_per_crop: int, seed: int) -> Tuple[np.ndarray, List[str]]:
+    """
+    Rows drawn from the CROP_DATA ranges: temperature uniform over the
+    crop's range, humidity around its ideal. Pressure and wind carry no
+    crop signal, and net radiation follows temperature.
+    """
+    from app.cropdata import CROP_DATA
+
+    rng = np.random.default_rng(seed)
+    rows, labels = [], []
+    for crop, (min_t, max_t, ideal_h) in CROP_DATA.items():
+        temperature = rng.uniform(min_t, max_t, samples_per_crop)
+        rows.append(np.column_stack([
+            temperature,
+            np.clip(rng.normal(ideal_h, 8, samples_per_crop), 5, 100),
+            rng.normal(1008, 6, samples_per_crop),
+            rng.gamma(2.0, 1.5, samples_per_crop),
+            12 * temperature + rng.normal(0, 60, samples_per_crop),
+        ]))
+        labels.extend([crop] * samples_per_crop)
+    return np.vstack(rows), labels
+
+
+def _train(args: argparse.Namespace) -> None:
+    if args.data:
+        rows, labels = read_training_csv(args.data)
+        source = os.path.basename(args.data)
+    else:
+        rows, labels = synthetic_training_data(args.samples_per_crop, args.seed)
+        source = f"synthetic (CROP_DATA, seed {args.seed})"
+
+    classes, arrays = fit(rows, labels)
+    meta = {
+        "model": "gaussian_naive_bayes",
+        "source": source,
+        "training_rows": len(labels),
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    target = ModelRegistry(args.model_dir)
+    version = target.save(classes, arrays, meta)
+    model = target.load(version)
+    top3 = np.argsort(-model.predict_proba(rows), axis=1)[:, :3]
+    label_index = np.array([model.classes.index(label) for label in labels])
+    accuracy = float((top3[:, 0] == label_index).mean())
+    top3_accuracy = float((top3 == label_index[:, None]).any(axis=1).mean())
+    print(
+        f"Saved crop model {version} to {args.model_dir}: {len(classes)} crops, {len(labels)} rows, "
+        f"training accuracy {accuracy:.3f} (top 3: {top3_accuracy:.3f})"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train and list crop prediction models")
+    parser.add_argument("--model-dir", default=registry.root)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="List model versions")
+    train = commands.add_parser("train", help="Train and save a new version")
+    source = train.add_mutually_exclusive_group(required=True)
+    source.add_argument("--data", help=f"CSV with columns {', '.join(FEATURES)}, crop")
+    source.add_argument("--synthetic", action="store_true", help="Sample training rows from CROP_DATA")
+    train.add_argument("--samples-per-crop", type=int, default=500)
+    train.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for version in ModelRegistry(args.model_dir).versions():
+            print(version)
+    else:
+        _train(args)
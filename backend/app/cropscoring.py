@@ -0,0 +1,82 @@
+# /backend/app/cropscoring.py
+"""
+Vectorized crop suitability scoring.
+
+The crop table is held as NumPy arrays so every crop is scored for N
+locations in one pass. Results match the original per-crop loop exactly,
+including tie order (crops keep their CROP_DATA order on equal scores).
+"""
+import hashlib
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.cropdata import CROP_DATA
+
+MAX_SCORE = 97
+
+
+def get_location_specific_variation(crop_name: str, lat: float, lon: float):
+    """
+    Creates a unique, consistent variation (0-15%) based on the
+    combination of crop name and specific coordinates.
+    """
+    seed_string = f"{crop_name}{round(lat, 2)}{round(lon, 2)}"
+    hash_val = int(hashlib.md5(seed_string.encode()).hexdigest(), 16)
+    return (hash_val % 150) / 10.0  # Returns a float between 0.0 and 15.0
+
+
+class CropScoringEngine:
+    def __init__(self, crop_data: Dict[str, Tuple[float, float, float]]):
+        self.names: List[str] = list(crop_data)
+        table = np.array([crop_data[name] for name in self.names], dtype=np.float64)
+        # shape (1, C) so they broadcast against (N, 1) weather columns
+        self.min_t = table[:, 0][None, :]
+        self.max_t = table[:, 1][None, :]
+        self.ideal_h = table[:, 2][None, :]
+
+        # the MD5 variation only depends on the ~1 km cell, so hash each cell once
+        self._cell_variation = lru_cache(maxsize=50_000)(self._compute_cell_variation)
+
+    def _compute_cell_variation(self, lat: float, lon: float) -> np.ndarray:
+        return np.array(
+            [get_location_specific_variation(name, lat, lon) for name in self.names],
+            dtype=np.float64,
+        )
+
+    def variations(self, coords: Sequence[Tuple[float, float]]) -> np.ndarray:
+        return np.stack([self._cell_variation(round(lat, 2), round(lon, 2)) for lat, lon in coords])
+
+    def score(self, temps: Sequence[float], humidities: Sequence[float], coords: Sequence[Tuple[float, float]]) -> np.ndarray:
+        """Returns an (N, C) int matrix of suitability percentages."""
+        t = np.asarray(temps, dtype=np.float64)[:, None]
+        h = np.asarray(humidities, dtype=np.float64)[:, None]
+
+        # 1. Base Weather Score (70% of total)
+        in_range = (self.min_t <= t) & (t <= self.max_t)
+        dist = np.minimum(np.abs(t - self.min_t), np.abs(t - self.max_t))
+        t_score = np.where(in_range, 40.0, np.maximum(0.0, 40.0 - dist * 6))
+        h_score = np.maximum(0.0, 30.0 - np.abs(h - self.ideal_h) * 1.2)
+
+        # 2. Add Location-Specific Variation (30% of total)
+        final = np.trunc(t_score + h_score + self.variations(coords) + 12).astype(np.int64)
+        return np.minimum(final, MAX_SCORE)
+
+    def top_k(
+        self,
+        temps: Sequence[float],
+        humidities: Sequence[float],
+        coords: Sequence[Tuple[float, float]],
+        k: int = 3,
+    ) -> List[List[Dict[str, Union[str, int]]]]:
+        scores = self.score(temps, humidities, coords)
+        # stable sort on the negated scores keeps CROP_DATA order on ties
+        order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+        return [
+            [{"crop": self.names[c], "percentage": int(scores[row, c])} for c in order[row]]
+            for row in range(scores.shape[0])
+        ]
+
+
+engine = CropScoringEngine(CROP_DATA)
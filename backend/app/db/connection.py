@@ -1,26 +1,113 @@
 # /backend/app/db/connection.py
+import asyncio
+import time
 
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.errors import WaitQueueTimeoutError
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
+
 from app.config import get_settings
+from app.metrics import MongoCommandListener, mongo_pool
 
 settings = get_settings()
 
 client: AsyncIOMotorClient | None = None
 database: AsyncIOMotorDatabase | None = None
+# same database, read with MONGO_ANALYTICS_READ_PREFERENCE
+analytics_database: AsyncIOMotorDatabase | None = None
+
+
+def client_options() -> dict:
+    return {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGO_SOCKET_TIMEOUT_MS,
+        "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        # the driver skips (with a warning) any compressor whose module is missing
+        "compressors": settings.MONGO_COMPRESSORS,
+        "appname": "farmhelp-api",
+    }
 
 
 async def connect_to_mongo() -> None:
-    global client, database
-    client = AsyncIOMotorClient(settings.MONGODB_URI)
+    """
+    Creates the client once per process. Warm Lambda invocations (and repeated
+    lifespan runs) keep using the same client and its connection pool.
+    """
+    global client, database, analytics_database
+    if client is not None:
+        return
+    listeners = [mongo_pool]
+    if settings.METRICS_ENABLED:
+        listeners.append(MongoCommandListener())
+    client = AsyncIOMotorClient(settings.MONGODB_URI, event_listeners=listeners, **client_options())
     database = client[settings.DATABASE_NAME]
+    read_preference = make_read_preference(read_pref_mode_from_name(settings.MONGO_ANALYTICS_READ_PREFERENCE), None)
+    analytics_database = client.get_database(settings.DATABASE_NAME, read_preference=read_preference)
+
+
+async def warm_mongo_pool(connections: int = 1) -> float:
+    """
+    Opens `connections` pooled connections to the primary (plus one to
+    whichever server analytics reads go to) with concurrent pings, so the
+    first requests don't pay for server selection, TLS and auth.
+    Returns how long it took in ms.
+    """
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(client.admin.command("ping") for _ in range(max(1, connections))),
+        analytics_database.command("ping", read_preference=analytics_database.read_preference),
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+async def mongo_health() -> dict:
+    """
+    Ping round trip and pool usage per server. "degraded" when a pool is
+    close to MONGO_MAX_POOL_SIZE or has operations waiting for a connection,
+    "down" when the primary can't be reached.
+    """
+    start = time.perf_counter()
+    try:
+        await client.admin.command("ping")
+    except WaitQueueTimeoutError as e:
+        return {"status": "degraded", "error": str(e), "pools": mongo_pool.stats()}
+    except Exception as e:
+        return {"status": "down", "error": str(e), "pools": mongo_pool.stats()}
+    ping_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    pools = mongo_pool.stats()
+    saturated = [
+        address for address, pool in pools.items()
+        if pool["waiting"] or pool["saturation"] >= settings.MONGO_POOL_SATURATION_WARN
+    ]
+    return {
+        "status": "degraded" if saturated else "ok",
+        "ping_ms": ping_ms,
+        "saturated": saturated,
+        "pools": pools,
+    }
 
 
 async def close_mongo() -> None:
+    global client, database, analytics_database
     if client:
         client.close()
+    client = None
+    database = None
+    analytics_database = None
 
 
 def get_db() -> AsyncIOMotorDatabase:
     if database is None:
         raise RuntimeError("Database not connected")
     return database
+
+
+def get_analytics_db() -> AsyncIOMotorDatabase:
+    """For admin list scans and history reads that can tolerate replication lag."""
+    if analytics_database is None:
+        raise RuntimeError("Database not connected")
+    return analytics_database
@@ -0,0 +1,162 @@
+# /backend/app/db/indexes.py
+"""
+Declarative index registry for every collection the API touches.
+
+Applied idempotently at startup from `main.lifespan`, and runnable by hand:
+
+    uv run python -m app.db.indexes            # create missing indexes
+    uv run python -m app.db.indexes --dry-run  # only report what is missing
+"""
+import argparse
+import asyncio
+from typing import Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Indexes replaced by a registry entry under a new name; dropped once the
+# collection's registry indexes exist
+OBSOLETE_INDEXES: Dict[str, List[str]] = {
+    # matched `mobile_no: null`, so a second farmer without a number was a duplicate
+    "farmerdata": ["mobile_no_unique"],
+}
+
+# Collections that must be created with options before first use
+TIMESERIES_COLLECTIONS: Dict[str, dict] = {
+    "sensorreadings": {"timeField": "timestamp", "metaField": "meta", "granularity": "minutes"},
+}
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "farmerdata": [
+        # farmer login looks farmers up by mobile number; farmers saved with
+        # `mobile_no: null` are left out, so they don't collide with each other
+        IndexModel(
+            [("mobile_no", ASCENDING)],
+            name="mobile_no_unique_string",
+            unique=True,
+            partialFilterExpression={"mobile_no": {"$type": "string"}},
+        ),
+        # flat list of every sensor_id in `farms`, so "who owns sensor X" is an index hit
+        IndexModel([("sensor_ids", ASCENDING)], name="sensor_ids"),
+    ],
+    # sensor documents are keyed by sensor_id (_id); this one serves re-syncs per farmer
+    "sensors": [
+        IndexModel([("farmer_id", ASCENDING)], name="farmer_id"),
+    ],
+    "applicationfoamdata": [
+        IndexModel([("created_at", DESCENDING)], name="created_at_desc"),
+    ],
+    "contactfoamdata": [
+        IndexModel([("created_at", DESCENDING)], name="created_at_desc"),
+    ],
+    # notification worker sweep: due pending messages and expired claims
+    "telegramoutbox": [
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt"),
+    ],
+    "sensorreadings": [
+        IndexModel([("meta.sensor_id", ASCENDING), ("timestamp", DESCENDING)], name="sensor_timestamp"),
+    ],
+    # Twilio status callbacks find the attempt by call sid
+    "twiliocalls": [
+        IndexModel(
+            [("call_sid", ASCENDING)],
+            name="call_sid",
+            partialFilterExpression={"call_sid": {"$exists": True}},
+        ),
+    ],
+    # history queries read one sensor's buckets in time order
+    "sensorreadings_hourly": [
+        IndexModel([("sensor_id", ASCENDING), ("timestamp", ASCENDING)], name="sensor_timestamp"),
+    ],
+    "sensorreadings_daily": [
+        IndexModel([("sensor_id", ASCENDING), ("timestamp", ASCENDING)], name="sensor_timestamp"),
+    ],
+    # demo sensors nobody has polled for a while are forgotten
+    "demosensorstate": [
+        IndexModel(
+            [("last_seen", ASCENDING)],
+            name="last_seen_ttl",
+            expireAfterSeconds=int(settings.DEMO_SENSOR_STATE_TTL_SECONDS),
+        ),
+    ],
+}
+
+
+async def missing_collections(db: AsyncIOMotorDatabase) -> List[str]:
+    existing = set(await db.list_collection_names())
+    return [name for name in TIMESERIES_COLLECTIONS if name not in existing]
+
+
+async def ensure_collections(db: AsyncIOMotorDatabase) -> None:
+    for name in await missing_collections(db):
+        try:
+            await db.create_collection(name, timeseries=TIMESERIES_COLLECTIONS[name])
+        except CollectionInvalid:
+            # another worker created it first
+            pass
+
+
+async def missing_indexes(db: AsyncIOMotorDatabase) -> Dict[str, List[str]]:
+    """Returns {collection: [index names]} for registry entries not present in the database."""
+    missing: Dict[str, List[str]] = {}
+    for collection_name, models in INDEXES.items():
+        existing = await db[collection_name].index_information()
+        names = [model.document["name"] for model in models if model.document["name"] not in existing]
+        if names:
+            missing[collection_name] = names
+    return missing
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    """
+    Creates every index in the registry. Safe to call on each startup:
+    Mongo treats an identical existing index as a no-op.
+    A failure on one collection (e.g. duplicate mobile numbers blocking the
+    unique index) is reported and does not stop the app from starting.
+    """
+    await ensure_collections(db)
+    for collection_name, models in INDEXES.items():
+        try:
+            await db[collection_name].create_indexes(models)
+            existing = await db[collection_name].index_information()
+            for name in OBSOLETE_INDEXES.get(collection_name, []):
+                if name in existing:
+                    await db[collection_name].drop_index(name)
+        except OperationFailure as e:
+            print(f"Could not create indexes on {collection_name}: {e}")
+
+
+async def _main(dry_run: bool) -> None:
+    from app.db.connection import close_mongo, connect_to_mongo, get_db
+
+    await connect_to_mongo()
+    try:
+        db = get_db()
+        missing_colls = await missing_collections(db)
+        missing = await missing_indexes(db)
+        if not missing and not missing_colls:
+            print("All indexes present")
+            return
+
+        for collection_name in missing_colls:
+            print(f"{collection_name}: missing time-series collection")
+        for collection_name, names in missing.items():
+            print(f"{collection_name}: missing {', '.join(names)}")
+
+        if not dry_run:
+            await ensure_indexes(db)
+            print("Indexes created")
+    finally:
+        await close_mongo()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create or check the FarmHelp MongoDB indexes")
+    parser.add_argument("--dry-run", action="store_true", help="Only report missing indexes")
+    args = parser.parse_args()
+    asyncio.run(_main(args.dry_run))
@@ -0,0 +1,30 @@
+# /backend/app/db/leases.py
+"""
+Time-based leases for periodic jobs, so each run happens on one worker
+process (or Lambda invocation) only. One document per job in `jobleases`:
+
+    {"_id": "sensor_alerts", "locked_until": <datetime>}
+
+A lease is not released when the run ends: it simply expires, which also
+keeps the other workers from repeating the run within the same interval.
+"""
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+
+LEASES_COLLECTION = "jobleases"
+
+
+async def claim_lease(db: AsyncIOMotorDatabase, name: str, now: datetime, duration: timedelta) -> bool:
+    """Takes the lease on `name` until now + duration. False when another worker holds it."""
+    try:
+        await db[LEASES_COLLECTION].find_one_and_update(
+            {"_id": name, "locked_until": {"$not": {"$gt": now}}},
+            {"$set": {"locked_until": now + duration}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # the lease exists and is still held by another worker
+        return False
+    return True
@@ -0,0 +1,89 @@
+# /backend/app/db/pagination.py
+from typing import AsyncIterator, Optional, Tuple, List
+
+from bson import ObjectId
+from fastapi import HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorCursor
+
+from app.db.serialization import dumps_lines
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 1000
+
+
+def cursor_filter(after: Optional[str], query: Optional[dict] = None) -> dict:
+    """
+    Builds the keyset filter for `_id` based pagination.
+    `after` is the `_id` of the last record the client has already seen.
+    """
+    filter_query = dict(query or {})
+    if after is None:
+        return filter_query
+
+    if not ObjectId.is_valid(after):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    filter_query["_id"] = {"$gt": ObjectId(after)}
+    return filter_query
+
+
+async def fetch_page(
+    collection: AsyncIOMotorCollection,
+    limit: int,
+    after: Optional[str] = None,
+    query: Optional[dict] = None,
+    projection: Optional[dict] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Returns one page of documents ordered by `_id` and the cursor for the next page.
+    One extra document is fetched so we know whether another page exists
+    without a separate count query.
+    """
+    cursor = (
+        collection.find(cursor_filter(after, query), projection)
+        .sort("_id", 1)
+        .limit(limit + 1)
+    )
+    docs = await cursor.to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = str(docs[-1]["_id"])
+
+    return docs, next_cursor
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    """
+    The cursor goes in a header so list bodies stay plain JSON arrays
+    for the admin pages that already consume them.
+    """
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+async def iter_ndjson(cursor: AsyncIOMotorCursor, batch_size: int) -> AsyncIterator[bytes]:
+    """Writes one chunk of JSON lines per Motor batch, as soon as the batch arrives."""
+    while docs := await cursor.to_list(length=batch_size):
+        yield dumps_lines(docs)
+
+
+def ndjson_response(
+    collection: AsyncIOMotorCollection,
+    after: Optional[str] = None,
+    query: Optional[dict] = None,
+    projection: Optional[dict] = None,
+    batch_size: int = MAX_PAGE_SIZE,
+) -> StreamingResponse:
+    """
+    Streams every document after `after` as NDJSON.
+    Memory stays bounded by one Motor batch instead of the full result set.
+    """
+    cursor = (
+        collection.find(cursor_filter(after, query), projection)
+        .sort("_id", 1)
+        .batch_size(batch_size)
+    )
+    return StreamingResponse(iter_ndjson(cursor, batch_size), media_type="application/x-ndjson")
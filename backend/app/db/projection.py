@@ -0,0 +1,106 @@
+# /backend/app/db/projection.py
+import re
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from app.models.farmer import FarmerCreateModel
+
+SUMMARY_VIEW = "summary"
+
+# Top-level fields a client may ask for; nested paths like farms.farm_1.photo are
+# allowed as long as they start with one of these.
+FARMER_FIELDS = set(FarmerCreateModel.model_fields) | {"_id"}
+
+# name, mobile_no and how many farms the farmer has, computed inside Mongo so
+# the nested farm documents never leave the server.
+FARMER_SUMMARY_PROJECTION = {
+    "name": 1,
+    "mobile_no": 1,
+    "farm_count": {"$size": {"$objectToArray": {"$ifNull": ["$farms", {}]}}},
+}
+
+_FIELD_PATH = re.compile(r"^[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*$")
+
+_MISSING = object()
+
+
+def build_farmer_projection(fields: Optional[str] = None, view: Optional[str] = None) -> Optional[dict]:
+    """
+    Turns a `fields=name,mobile_no` query value or a named view into a Mongo projection.
+    Returns None when the full document is wanted.
+    """
+    if view == SUMMARY_VIEW:
+        return dict(FARMER_SUMMARY_PROJECTION)
+    if view is not None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown view '{view}'")
+
+    if not fields:
+        return None
+
+    paths = set()
+    for field in fields.split(","):
+        field = field.strip()
+        if not field:
+            continue
+        if not _FIELD_PATH.match(field) or field.split(".")[0] not in FARMER_FIELDS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown field '{field}'")
+        paths.add(field)
+
+    # Mongo rejects a projection holding both a path and one inside it
+    # ("Path collision"), and the parent already includes the child
+    projection = {}
+    for path in sorted(paths):
+        parts = path.split(".")
+        if not any(".".join(parts[:i]) in paths for i in range(1, len(parts))):
+            projection[path] = 1
+
+    return projection or None
+
+
+def _path_tree(projection: dict) -> dict:
+    """{"farms.farm_1.photo": 1, "name": 1} -> {"farms": {"farm_1": {"photo": True}}, "name": True}"""
+    tree: dict = {}
+    for path in projection:
+        node = tree
+        *parents, leaf = path.split(".")
+        for part in parents:
+            child = node.setdefault(part, {})
+            if child is True:
+                break
+            node = child
+        else:
+            node[leaf] = True
+    return tree
+
+
+def _pick(value, tree):
+    if tree is True:
+        return value
+    if isinstance(value, list):
+        return [_pick(item, tree) for item in value if isinstance(item, dict)]
+    if not isinstance(value, dict):
+        return _MISSING
+    picked = {}
+    for key, item in value.items():
+        if key in tree:
+            item = _pick(item, tree[key])
+            if item is not _MISSING:
+                picked[key] = item
+    return picked
+
+
+
+def project_farmer(farmer: dict, projection: Optional[dict]) -> dict:
+    """
+    Applies a projection from `build_farmer_projection` to a farmer document
+    that is already loaded (e.g. from the farmer cache), giving what Mongo
+    would have returned for the same projection.
+    """
+    if projection is None:
+        return farmer
+    if projection == FARMER_SUMMARY_PROJECTION:
+        summary = {key: farmer[key] for key in ("_id", "name", "mobile_no") if key in farmer}
+        summary["farm_count"] = len(farmer.get("farms") or {})
+        return summary
+    return _pick(farmer, {**_path_tree(projection), "_id": True})
@@ -0,0 +1,185 @@
+# /backend/app/db/sensors.py
+"""
+Sensor-indexed view of the farms stored on each farmer.
+
+`farmerdata.farms` is keyed by dynamic names (farm_1, farm_2, ...), so finding
+the owner of a sensor would need a collection scan. The `sensors` collection
+keeps one document per sensor, keyed by the sensor_id itself:
+
+    {"_id": "<sensor_id>", "farmer_id": ObjectId, "farm_key": "farm_1",
+     "mobile_no": "...", "call_language": "..."}
+
+A sensor belongs to one farmer: registering a sensor_id that another farmer
+already has raises `SensorOwnershipError` instead of moving it.
+
+It is written by the admin farmer routes and can be rebuilt from scratch:
+
+    uv run python -m app.db.sensors            # backfill sensor_ids + sensors
+    uv run python -m app.db.sensors --dry-run  # only count what would change
+"""
+import argparse
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
+
+SENSORS_COLLECTION = "sensors"
+# time-series collection of raw readings: {"timestamp", "meta": {"sensor_id", "source"}, <metrics>}
+READINGS_COLLECTION = "sensorreadings"
+
+# `meta.source` of simulated readings from /demosenserdata. They only feed the
+# raw history of demo sensors: latest readings, alerts and rollups skip them.
+DEMO_SOURCE = "demo"
+EXCLUDE_DEMO = {"meta.source": {"$ne": DEMO_SOURCE}}
+# `meta.source` of readings stored by the ThingSpeak poller, the only ones alerts act on
+THINGSPEAK_SOURCE = "thingspeak"
+
+# farmer fields copied onto each sensor so alerting never has to join farmerdata
+OWNER_FIELDS = ("mobile_no", "call_language")
+
+
+class SensorOwnershipError(Exception):
+    """Some sensor_ids are already registered to another farmer."""
+
+    def __init__(self, sensor_ids: List[str]):
+        self.sensor_ids = sensor_ids
+        super().__init__(f"Sensors already registered to another farmer: {', '.join(sensor_ids)}")
+
+
+def sensor_documents(farmer_id: ObjectId, farmer: dict) -> List[dict]:
+    docs = []
+    for farm_key, farm in (farmer.get("farms") or {}).items():
+        sensor_id = (farm or {}).get("sensor_id")
+        if not sensor_id:
+            continue
+        doc = {"_id": sensor_id, "farmer_id": farmer_id, "farm_key": farm_key}
+        for field in OWNER_FIELDS:
+            doc[field] = farmer.get(field)
+        docs.append(doc)
+    return docs
+
+
+async def find_sensor_conflicts(
+    db: AsyncIOMotorDatabase, farmer_id: Optional[ObjectId], sensor_ids: Iterable[str]
+) -> List[str]:
+    """The sensor_ids registered to a farmer other than `farmer_id` (None: any farmer)."""
+    ids = list(set(sensor_ids))
+    if not ids:
+        return []
+    query = {"_id": {"$in": ids}}
+    if farmer_id is not None:
+        query["farmer_id"] = {"$ne": farmer_id}
+    return sorted([doc["_id"] async for doc in db[SENSORS_COLLECTION].find(query, {"_id": 1})])
+
+
+async def _upsert_sensors(db: AsyncIOMotorDatabase, docs: List[dict]) -> List[dict]:
+    """
+    Writes sensor documents, only over sensors of the same farmer. Returns the
+    documents whose sensor_id belongs to another farmer; those are not written.
+    """
+    if not docs:
+        return []
+    try:
+        # with farmer_id in the filter, another farmer's sensor doesn't match,
+        # and the upsert's insert fails on the existing _id
+        await db[SENSORS_COLLECTION].bulk_write(
+            [ReplaceOne({"_id": doc["_id"], "farmer_id": doc["farmer_id"]}, doc, upsert=True) for doc in docs],
+            ordered=False,
+        )
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != 11000 for error in errors):
+            raise
+        return [docs[error["index"]] for error in errors]
+    return []
+
+
+async def sync_farmer_sensors(db: AsyncIOMotorDatabase, farmer_id: ObjectId, farmer: dict) -> None:
+    """
+    Makes the `sensors` collection match the farms on one farmer document.
+    Sensors that were removed from the farmer are deleted. Raises
+    SensorOwnershipError (after syncing the rest) for sensors another farmer has.
+    """
+    docs = sensor_documents(farmer_id, farmer)
+    conflicts = await _upsert_sensors(db, docs)
+    await db[SENSORS_COLLECTION].delete_many(
+        {"farmer_id": farmer_id, "_id": {"$nin": [doc["_id"] for doc in docs]}}
+    )
+    if conflicts:
+        raise SensorOwnershipError(sorted(doc["_id"] for doc in conflicts))
+
+
+async def sync_many_farmer_sensors(db: AsyncIOMotorDatabase, farmers: List[dict]) -> Dict[str, ObjectId]:
+    """
+    `sync_farmer_sensors` for a batch of farmer documents, in two round trips.
+    Returns {sensor_id: farmer_id} for the sensors that were skipped because
+    another farmer has them.
+    """
+    if not farmers:
+        return {}
+    docs = [doc for farmer in farmers for doc in sensor_documents(farmer["_id"], farmer)]
+    conflicts = await _upsert_sensors(db, docs)
+    await db[SENSORS_COLLECTION].delete_many({
+        "farmer_id": {"$in": [farmer["_id"] for farmer in farmers]},
+        "_id": {"$nin": [doc["_id"] for doc in docs]},
+    })
+    return {doc["_id"]: doc["farmer_id"] for doc in conflicts}
+
+
+async def remove_farmer_sensors(db: AsyncIOMotorDatabase, farmer_id: ObjectId) -> None:
+    await db[SENSORS_COLLECTION].delete_many({"farmer_id": farmer_id})
+
+
+async def get_sensor_owners(db: AsyncIOMotorDatabase, sensor_ids: Iterable[str]) -> Dict[str, dict]:
+    """Resolves many sensor_ids to their owner documents in one `_id` index query."""
+    ids = list(set(sensor_ids))
+    if not ids:
+        return {}
+    cursor = db[SENSORS_COLLECTION].find({"_id": {"$in": ids}})
+    return {doc["_id"]: doc async for doc in cursor}
+
+
+async def migrate(db: AsyncIOMotorDatabase, dry_run: bool = False) -> int:
+    """Rebuilds `sensor_ids` and the `sensors` collection from every farmer. Returns farmers touched."""
+    from app.farmercache import farmer_cache
+    from app.httpcache import BUMP_REVISION
+    from app.models.farmer import FarmerCreateModel
+
+    count = 0
+    projection = {"farms": 1, **{field: 1 for field in OWNER_FIELDS}}
+    async for farmer in db["farmerdata"].find({"farms": {"$exists": True}}, projection):
+        count += 1
+        if dry_run:
+            continue
+        sensor_ids = FarmerCreateModel(farms=farmer.get("farms")).sensor_ids()
+        await db["farmerdata"].update_one({"_id": farmer["_id"]}, {"$set": {"sensor_ids": sensor_ids}, **BUMP_REVISION})
+        try:
+            await sync_farmer_sensors(db, farmer["_id"], farmer)
+        except SensorOwnershipError as e:
+            print(f"Farmer {farmer['_id']}: {e}")
+    if count and not dry_run:
+        # running API workers still cache the old sensor_ids
+        await farmer_cache.invalidate(db)
+    return count
+
+
+async def _main(dry_run: bool) -> None:
+    from app.db.connection import close_mongo, connect_to_mongo, get_db
+
+    await connect_to_mongo()
+    try:
+        count = await migrate(get_db(), dry_run=dry_run)
+        action = "would be migrated" if dry_run else "migrated"
+        print(f"{count} farmers {action}")
+    finally:
+        await close_mongo()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the sensor lookup collection")
+    parser.add_argument("--dry-run", action="store_true", help="Only count farmers with farms")
+    args = parser.parse_args()
+    asyncio.run(_main(args.dry_run))
@@ -0,0 +1,44 @@
+# /backend/app/db/serialization.py
+"""
+JSON encoding for raw Mongo documents.
+
+Routes that return documents as they come out of Motor hand them to
+`BSONResponse` instead of FastAPI's default path. That default path
+converts `_id` by hand, validates against `response_model`, then walks
+every nested `farms` dict again in `jsonable_encoder`. Here orjson writes
+the documents in one pass and handles the BSON types itself:
+
+- ObjectId -> its hex string
+- datetime -> ISO 8601, as before (orjson encodes it natively)
+- Decimal128 and anything else unknown -> str()
+
+Returning a Response skips FastAPI's serialization entirely, so headers
+must be set on the returned response itself.
+"""
+from typing import Any
+
+import orjson
+from bson import Decimal128, ObjectId
+from fastapi.responses import JSONResponse
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    return str(value)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+
+def dumps_lines(docs) -> bytes:
+    """NDJSON for a batch of documents: one line each, trailing newline included."""
+    return b"".join(orjson.dumps(doc, default=_default, option=orjson.OPT_APPEND_NEWLINE) for doc in docs)
+
+
+class BSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,127 @@
+# /backend/app/farmercache.py
+"""
+Read-through cache of farmer documents, for farmer login (/farmerdata/)
+and GET /adminfarmerdata/{id}.
+
+Each worker caches full documents under ("mobile", mobile_no) and
+("id", "<ObjectId hex>"). Lookups return the full document: routes take
+its ETag (app.httpcache) and apply `fields` / `view` with `project_farmer`.
+Unknown numbers are not cached, so a farmer who was just added can log in
+right away.
+
+Farmer writes are rare, so every write clears the whole cache. That is
+simpler than tracking which keys a document sits under, since an update
+may have just changed its mobile number. Other workers find out through a
+version stamp:
+
+- after writing, the route calls `farmer_cache.invalidate(db)`, which bumps
+  `{_id: "farmerdata", version}` in `cacheversions`
+- each worker re-reads the stamp at most every FARMER_CACHE_SYNC_SECONDS
+  and clears its cache when the version has moved. This runs on the
+  request path, not in a background task, so it works on Lambda too.
+
+Other workers therefore see an API write within FARMER_CACHE_SYNC_SECONDS.
+Writes made outside the API that don't bump the stamp (e.g. by hand in
+mongosh) show up once entries expire after FARMER_CACHE_TTL_SECONDS.
+
+Callers must not mutate the documents they get back: they are the cached
+objects.
+"""
+import time
+from typing import Awaitable, Callable, Hashable, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from app.cache import TTLCache
+from app.config import get_settings
+
+settings = get_settings()
+
+VERSIONS_COLLECTION = "cacheversions"
+VERSION_ID = "farmerdata"
+
+
+class _NotFound(Exception):
+    """Raised by the loader so misses are not cached (TTLCache keeps only successful loads)."""
+
+
+class FarmerCache:
+    def __init__(self):
+        self.farmers = TTLCache(
+            "farmers",
+            max_entries=settings.FARMER_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.FARMER_CACHE_TTL_SECONDS,
+        )
+        # last stamp seen in `cacheversions`; None until the first check
+        self.version: Optional[int] = None
+        self.next_sync = 0.0
+
+    async def get_by_mobile(self, db: AsyncIOMotorDatabase, mobile_no: str) -> Optional[dict]:
+        return await self._get(db, ("mobile", mobile_no), {"mobile_no": mobile_no})
+
+    async def get_by_id(self, db: AsyncIOMotorDatabase, farmer_id: ObjectId) -> Optional[dict]:
+        return await self._get(db, ("id", str(farmer_id)), {"_id": farmer_id})
+
+    async def _get(self, db: AsyncIOMotorDatabase, key: Hashable, query: dict) -> Optional[dict]:
+        if not settings.FARMER_CACHE_ENABLED:
+            return await db["farmerdata"].find_one(query)
+
+        await self._sync(db)
+        try:
+            return await self.farmers.get_or_load(key, self._loader(db, query))
+        except _NotFound:
+            return None
+
+    @staticmethod
+    def _loader(db: AsyncIOMotorDatabase, query: dict) -> Callable[[], Awaitable[dict]]:
+        async def load() -> dict:
+            farmer = await db["farmerdata"].find_one(query)
+            if farmer is None:
+                raise _NotFound()
+            return farmer
+        return load
+
+    async def _sync(self, db: AsyncIOMotorDatabase) -> None:
+        """Clears the cache if another worker bumped the version since the last check."""
+        now = time.monotonic()
+        if now < self.next_sync:
+            return
+        # set first, so requests arriving while the check runs don't start their own
+        self.next_sync = now + settings.FARMER_CACHE_SYNC_SECONDS
+
+        try:
+            doc = await db[VERSIONS_COLLECTION].find_one({"_id": VERSION_ID})
+        except Exception as e:
+            # can't tell whether anyone wrote: start over rather than serve stale data
+            print(f"Farmer cache version check failed: {e}")
+            self.farmers.clear()
+            self.version = None
+            return
+
+        version = doc["version"] if doc else 0
+        if version != self.version:
+            self.farmers.clear()
+            self.version = version
+
+    async def invalidate(self, db: AsyncIOMotorDatabase) -> None:
+        """Call after writing to `farmerdata`: clears this worker's cache and bumps the stamp for the others."""
+        self.farmers.clear()
+        try:
+            doc = await db[VERSIONS_COLLECTION].find_one_and_update(
+                {"_id": VERSION_ID},
+                {"$inc": {"version": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except Exception as e:
+            print(f"Farmer cache version bump failed: {e}")
+            return
+
+        # only our own bump since the last check: no need to clear again on the next one
+        if self.version is not None and doc["version"] == self.version + 1:
+            self.version = doc["version"]
+
+
+farmer_cache = FarmerCache()
@@ -0,0 +1,309 @@
+# /backend/app/farmerimport.py
+"""
+Bulk farmer import from CSV or NDJSON, run as a background job.
+
+The request body is spooled to a temp file as it arrives (never held in
+memory whole), then a background task validates each row with
+`FarmerCreateModel` and upserts farmers on `mobile_no`, FARMER_IMPORT_BATCH_SIZE
+rows per unordered bulk_write. Progress and per-row errors are kept on the
+job document in `farmerimports`, so any worker can answer a progress poll:
+
+    {"_id": ObjectId, "status": "running", "format": "csv", "rows": 1500,
+     "inserted": 1200, "updated": 280, "failed": 20,
+     "errors": [{"line": 17, "error": "mobile_no is required"}, ...],
+     "created_at": ..., "updated_at": ..., "finished_at": None}
+
+Rows are parsed and validated a batch at a time in a worker thread, keeping
+the event loop free for other requests. `updated_at` is refreshed after
+every batch; a running job not refreshed for FARMER_IMPORT_STALE_SECONDS
+lost its worker (restart, crash) and is reported as failed.
+
+CSV files have one column per top-level field (name, mobile_no,
+home_address, call_language) plus `<farm_key>.<field>` columns for farms,
+e.g. farm_1.location, farm_1.sensor_id. NDJSON lines are farmer objects as
+accepted by POST /adminaddfarmerdata/.
+"""
+import asyncio
+import csv
+import io
+import itertools
+import json
+from datetime import datetime, timedelta, timezone
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.config import get_settings
+from app.db.sensors import OWNER_FIELDS, SENSORS_COLLECTION, sync_many_farmer_sensors
+from app.farmercache import farmer_cache
+from app.httpcache import BUMP_REVISION
+from app.models.farmer import FarmerCreateModel
+
+settings = get_settings()
+
+IMPORTS_COLLECTION = "farmerimports"
+FORMATS = ("csv", "ndjson")
+FARMER_FIELDS = ("name", "mobile_no", "home_address", "call_language")
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors()
+    )
+
+
+def parse_csv_row(row: Dict[str, str]) -> dict:
+    """Flat CSV columns -> farmer dict; empty cells are left out."""
+    data: dict = {}
+    for column, value in row.items():
+        if column is None or value is None or not value.strip():
+            continue
+        if "." in column:
+            farm_key, field = column.strip().split(".", 1)
+            data.setdefault("farms", {}).setdefault(farm_key, {})[field] = value.strip()
+        else:
+            data[column.strip()] = value.strip()
+    return data
+
+
+def read_rows(file, fmt: str) -> Iterator[Tuple[int, object]]:
+    """
+    Yields (line number, farmer dict) per row; the dict is replaced by an
+    error message for rows that can't be parsed.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, parse_csv_row(row)
+        return
+
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield line_no, f"invalid JSON: {e}"
+            continue
+        yield line_no, data if isinstance(data, dict) else "expected a JSON object"
+
+
+def validate_row(data: object) -> dict:
+    """Returns the document to $set for one row; raises ValueError with a readable reason."""
+    if isinstance(data, str):
+        raise ValueError(data)
+    try:
+        farmer = FarmerCreateModel(**data)
+    except ValidationError as e:
+        raise ValueError(_describe(e))
+    if not farmer.mobile_no:
+        raise ValueError("mobile_no is required")
+
+    doc = farmer.model_dump(exclude_none=True)
+    if farmer.farms:
+        doc["sensor_ids"] = farmer.sensor_ids()
+    return doc
+
+
+def validate_rows(rows: Iterator[Tuple[int, object]], size: int) -> List[Tuple[int, Union[dict, str]]]:
+    """
+    Parses and validates the next `size` rows. Rows that fail carry their
+    error message instead of a document. Blocking; run in a worker thread.
+    """
+    chunk: List[Tuple[int, Union[dict, str]]] = []
+    for line, data in itertools.islice(rows, size):
+        try:
+            chunk.append((line, validate_row(data)))
+        except ValueError as e:
+            chunk.append((line, str(e)))
+    return chunk
+
+
+async def receive_body(chunks: AsyncIterator[bytes]) -> SpooledTemporaryFile:
+    """
+    Spools a streamed request body (in memory up to 1 MB, then on disk).
+    Raises ValueError when it grows past FARMER_IMPORT_MAX_BYTES.
+    """
+    spool = SpooledTemporaryFile(max_size=1024 * 1024)
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > settings.FARMER_IMPORT_MAX_BYTES:
+            spool.close()
+            raise ValueError(f"Import is larger than {settings.FARMER_IMPORT_MAX_BYTES // (1024 * 1024)} MB")
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+class FarmerImporter:
+    def __init__(self, db: AsyncIOMotorDatabase, job_id: ObjectId):
+        self.db = db
+        self.job_id = job_id
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+        # mobile numbers seen so far, to report repeats instead of racing two upserts
+        self.seen: Set[str] = set()
+
+    def _error(self, line: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < settings.FARMER_IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    async def run(self, file, fmt: str) -> None:
+        rows = read_rows(file, fmt)
+        while chunk := await asyncio.to_thread(validate_rows, rows, settings.FARMER_IMPORT_BATCH_SIZE):
+            batch: List[Tuple[int, dict]] = []
+            for line, doc in chunk:
+                self.rows += 1
+                if isinstance(doc, str):
+                    self._error(line, doc)
+                    continue
+                if doc["mobile_no"] in self.seen:
+                    self._error(line, f"mobile_no {doc['mobile_no']} appears earlier in the file")
+                    continue
+                self.seen.add(doc["mobile_no"])
+                batch.append((line, doc))
+
+            if batch:
+                await self.write(batch)
+            # also the heartbeat that tells a running job from an abandoned one
+            await self.save_progress("running")
+
+    async def drop_sensor_conflicts(self, batch: List[Tuple[int, dict]]) -> List[Tuple[int, dict]]:
+        """Fails the rows that claim a sensor registered to another farmer."""
+        sensor_ids = {sensor_id for _, doc in batch for sensor_id in doc.get("sensor_ids", [])}
+        if not sensor_ids:
+            return batch
+        cursor = self.db[SENSORS_COLLECTION].find({"_id": {"$in": list(sensor_ids)}}, {"mobile_no": 1})
+        owners = {doc["_id"]: doc.get("mobile_no") async for doc in cursor}
+
+        kept = []
+        for line, doc in batch:
+            taken = [s for s in doc.get("sensor_ids", []) if s in owners and owners[s] != doc["mobile_no"]]
+            if taken:
+                self._error(line, f"sensor_id {', '.join(taken)} belongs to another farmer")
+            else:
+                kept.append((line, doc))
+        return kept
+
+    async def write(self, batch: List[Tuple[int, dict]]) -> None:
+        batch = await self.drop_sensor_conflicts(batch)
+        if not batch:
+            return
+        operations = [
+            UpdateOne({"mobile_no": doc["mobile_no"]}, {"$set": doc, **BUMP_REVISION}, upsert=True)
+            for _, doc in batch
+        ]
+        failed_indexes: Set[int] = set()
+        try:
+            result = await self.db["farmerdata"].bulk_write(operations, ordered=False)
+            upserted, matched = result.upserted_count, result.matched_count
+        except BulkWriteError as e:
+            # unordered: every other operation in the batch was still applied
+            upserted, matched = e.details.get("nUpserted", 0), e.details.get("nMatched", 0)
+            for write_error in e.details.get("writeErrors", []):
+                failed_indexes.add(write_error["index"])
+                self._error(batch[write_error["index"]][0], write_error.get("errmsg", "write failed"))
+        self.inserted += upserted
+        self.updated += matched
+        if matched:
+            await farmer_cache.invalidate(self.db)
+
+        # sensors carry a copy of farms and the owner's contact fields
+        mobiles = [doc["mobile_no"] for i, (_, doc) in enumerate(batch) if i not in failed_indexes]
+        projection = {"farms": 1, **{field: 1 for field in OWNER_FIELDS}}
+        farmers = await self.db["farmerdata"].find({"mobile_no": {"$in": mobiles}}, projection).to_list(None)
+        conflicts = await sync_many_farmer_sensors(self.db, farmers)
+        if conflicts:
+            # claimed by another farmer since the check, or twice within this batch
+            lines = {doc["mobile_no"]: line for line, doc in batch}
+            mobile_by_id = {farmer["_id"]: farmer.get("mobile_no") for farmer in farmers}
+            for sensor_id, farmer_id in conflicts.items():
+                self._error(lines.get(mobile_by_id.get(farmer_id)), f"sensor_id {sensor_id} belongs to another farmer")
+
+    async def save_progress(self, status: str) -> None:
+        now = datetime.now(timezone.utc)
+        update = {
+            "status": status,
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "updated_at": now,
+        }
+        if status in ("completed", "failed"):
+            update["finished_at"] = now
+        await self.db[IMPORTS_COLLECTION].update_one({"_id": self.job_id}, {"$set": update})
+
+
+async def expire_stale_imports(db: AsyncIOMotorDatabase, job_id: Optional[ObjectId] = None) -> None:
+    """Marks running jobs whose worker stopped updating them as failed."""
+    now = datetime.now(timezone.utc)
+    query = {
+        "status": "running",
+        "updated_at": {"$lt": now - timedelta(seconds=settings.FARMER_IMPORT_STALE_SECONDS)},
+    }
+    if job_id is not None:
+        query["_id"] = job_id
+    await db[IMPORTS_COLLECTION].update_many(query, {
+        "$set": {"status": "failed", "finished_at": now, "updated_at": now},
+        "$push": {"errors": {"line": None, "error": "import stopped: the worker running it went away"}},
+    })
+
+
+class FarmerImportJobs:
+    """Runs imports as tasks of this process; their progress lives in Mongo."""
+
+    def __init__(self):
+        self.tasks: Set[asyncio.Task] = set()
+
+    async def start(self, db: AsyncIOMotorDatabase, file, fmt: str) -> ObjectId:
+        now = datetime.now(timezone.utc)
+        result = await db[IMPORTS_COLLECTION].insert_one({
+            "status": "running",
+            "format": fmt,
+            "rows": 0,
+            "inserted": 0,
+            "updated": 0,
+            "failed": 0,
+            "errors": [],
+            "created_at": now,
+            "updated_at": now,
+            "finished_at": None,
+        })
+        task = asyncio.create_task(self._run(db, result.inserted_id, file, fmt))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return result.inserted_id
+
+    async def _run(self, db: AsyncIOMotorDatabase, job_id: ObjectId, file, fmt: str) -> None:
+        importer = FarmerImporter(db, job_id)
+        try:
+            await importer.run(file, fmt)
+            await importer.save_progress("completed")
+            print(f"Farmer import {job_id}: {importer.inserted} inserted, {importer.updated} updated, {importer.failed} failed")
+        except Exception as e:
+            print(f"Farmer import {job_id} failed: {e}")
+            importer.errors.append({"line": None, "error": f"import stopped: {e}"})
+            await importer.save_progress("failed")
+        finally:
+            file.close()
+
+    async def wait(self) -> None:
+        """Waits for running imports; used where the process may be frozen right after a request."""
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+farmer_imports = FarmerImportJobs()
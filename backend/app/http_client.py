@@ -0,0 +1,83 @@
+# /backend/app/http_client.py
+"""
+One pooled httpx client for every outbound call (open-meteo, Telegram, ...).
+
+Opened in `main.lifespan` next to the Mongo client, so TCP + TLS connections
+are reused across requests instead of being set up for each one. On Lambda
+(no lifespan) it is created on first use instead.
+
+httpx itself is only imported when the client is built: importing it also
+loads its CLI (click, rich, pygments), which is a noticeable part of a cold
+start.
+"""
+import importlib.util
+from typing import TYPE_CHECKING, Dict, Optional
+
+from app.config import get_settings
+from app.metrics import InstrumentedTransport
+
+if TYPE_CHECKING:
+    import httpx
+
+settings = get_settings()
+
+client: Optional["httpx.AsyncClient"] = None
+
+
+def _timeout(total: float, connect: float) -> Dict[str, float]:
+    """Same shape as httpx.Timeout(total, connect=connect).as_dict()."""
+    return {"connect": connect, "read": total, "write": total, "pool": total}
+
+
+DEFAULT_TIMEOUT = _timeout(10.0, connect=5.0)
+
+# Per upstream timeouts, applied to every request sent to that host.
+HOST_TIMEOUTS: Dict[str, Dict[str, float]] = {
+    "api.open-meteo.com": _timeout(5.0, connect=3.0),
+    "api.telegram.org": _timeout(10.0, connect=5.0),
+    "api.thingspeak.com": _timeout(10.0, connect=5.0),
+}
+
+
+async def _apply_host_timeout(request: "httpx.Request") -> None:
+    timeout = HOST_TIMEOUTS.get(request.url.host)
+    if timeout is not None:
+        request.extensions["timeout"] = dict(timeout)
+
+
+def build_http_client() -> "httpx.AsyncClient":
+    import httpx
+
+    transport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        # HTTP/2 needs the optional `h2` package (httpx[http2])
+        http2=importlib.util.find_spec("h2") is not None,
+    )
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(**DEFAULT_TIMEOUT),
+        transport=InstrumentedTransport(transport) if settings.METRICS_ENABLED else transport,
+        event_hooks={"request": [_apply_host_timeout]},
+    )
+
+
+async def open_http_client() -> None:
+    global client
+    client = build_http_client()
+
+
+async def close_http_client() -> None:
+    global client
+    if client:
+        await client.aclose()
+        client = None
+
+
+def get_http_client() -> "httpx.AsyncClient":
+    global client
+    if client is None:
+        client = build_http_client()
+    return client
@@ -0,0 +1,75 @@
+# /backend/app/httpcache.py
+"""
+ETags and conditional requests for the read endpoints.
+
+Farmer documents carry a revision counter (`rev`) that every write to
+`farmerdata` increments. Documents without one count as revision 0. The
+form collections are only ever inserted and deleted, so their `_id` alone
+identifies a version. From that:
+
+- one document:  "<_id>.<rev>.<variant>", where the variant names the
+  `fields`/`view` representation. It is computed from the cached farmer
+  document, so a 304 for a farmer in the farmer cache costs no Mongo query.
+- a list page:   a hash of every (_id, rev) on the page, the variant and
+  the next cursor. The page is still fetched, but a 304 skips
+  serialization and the transfer.
+
+A GET or HEAD whose If-None-Match still matches gets a bodiless 304; any
+other method gets 412 Precondition Failed (RFC 9110 §13.1.2).
+Responses are `private, no-cache`: clients keep them but revalidate on
+every use. When CompressionMiddleware compresses a response it weakens the
+tag (W/"..."). If-None-Match uses weak comparison, so both forms match.
+"""
+import hashlib
+from typing import Any, Iterable, Optional
+
+from fastapi import Request, Response, status
+
+from app.db.serialization import BSONResponse
+
+REVISION_FIELD = "rev"
+# add to every update of a farmerdata document
+BUMP_REVISION = {"$inc": {REVISION_FIELD: 1}}
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def _variant(projection: Optional[dict]) -> str:
+    if projection is None:
+        return "full"
+    return hashlib.blake2b(repr(sorted(projection.items())).encode(), digest_size=6).hexdigest()
+
+
+def document_etag(doc: dict, projection: Optional[dict] = None) -> str:
+    return '"%s.%d.%s"' % (doc["_id"], doc.get(REVISION_FIELD, 0), _variant(projection))
+
+
+def page_etag(docs: Iterable[dict], next_cursor: Optional[str], projection: Optional[dict] = None) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{_variant(projection)}|{next_cursor}|".encode())
+    for doc in docs:
+        digest.update(b"%s.%d," % (str(doc["_id"]).encode(), doc.get(REVISION_FIELD, 0)))
+    return '"p.%s"' % digest.hexdigest()
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def conditional_response(request: Request, etag: str, content: Any) -> Response:
+    """
+    A 304 (412 for methods other than GET/HEAD) when the client already
+    holds `etag`, otherwise `content` as a BSONResponse. `content` is only
+    serialized in the last case.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, etag):
+        if request.method in ("GET", "HEAD"):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(status_code=status.HTTP_412_PRECONDITION_FAILED, headers=headers)
+    return BSONResponse(content, headers=headers)
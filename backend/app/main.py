@@ -1,26 +1,83 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from app.alerts import alert_engine
+from app.cache import cache_stats
+from app.compression import CompressionMiddleware
 from app.config import get_settings
-from app.db.connection import connect_to_mongo, close_mongo, get_db
+from app.cropinference import crop_inference
+from app.db.connection import connect_to_mongo, close_mongo, get_db, mongo_health, warm_mongo_pool
+from app.db.indexes import ensure_indexes
+from app.db.pagination import NEXT_CURSOR_HEADER
+from app.http_client import open_http_client, close_http_client, get_http_client
+from app.metrics import MetricsMiddleware, profiler, render_metrics
+from app.notifications import notifier
+from app.sensorrollups import rollup_job
+from app.thingspeak import poller
+from app.uploadlimit import UploadLimitMiddleware
 from app.routes.router import api_router
+from app.routes.verifyadmin import require_admin
 
 settings = get_settings()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Connect to MongoDB
+    profiler.start()
     await connect_to_mongo()
     print("Database connected")
+    if settings.MONGO_WARM_POOL_ON_STARTUP:
+        try:
+            warmup_ms = await warm_mongo_pool(settings.MONGO_MIN_POOL_SIZE)
+            print(f"Database pool warmed in {warmup_ms:.0f} ms")
+        except Exception as e:
+            print(f"Database pool not warmed: {e}")
+    if settings.ENSURE_INDEXES_ON_STARTUP:
+        try:
+            await ensure_indexes(get_db())
+        except Exception as e:
+            print(f"Indexes not checked: {e}")
+    await open_http_client()
+    notifier.start(get_db(), get_http_client())
+    if settings.SENSOR_POLLER_ENABLED:
+        poller.start(get_db(), get_http_client())
+    if settings.SENSOR_ROLLUP_ENABLED:
+        rollup_job.start(get_db())
+    if settings.ALERTS_ENABLED:
+        alert_engine.start(get_db())
+    crop_inference.start()
+    if settings.CROP_MODEL_PRELOAD:
+        try:
+            await crop_inference.warm()
+        except Exception as e:
+            print(f"Crop model not loaded: {e}")
     yield
-    # Shutdown: Close connection
+    # Shutdown: Stop background work, then close connections
+    await crop_inference.stop()
+    await alert_engine.stop()
+    await rollup_job.stop()
+    await poller.stop()
+    await notifier.stop()
+    await close_http_client()
     await close_mongo()
     print("Database disconnected")
 
 app = FastAPI(title="FarmHelp API", lifespan=lifespan)
 
+# Added first, so it runs innermost: metrics time the compressed responses
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_BYTES,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
+app.add_middleware(UploadLimitMiddleware, max_bytes=settings.UPLOAD_MAX_REQUEST_BYTES)
+
 # CORS (Cross-Origin Resource Sharing)
 # allowing all origins for now to ensure it works easily
 app.add_middleware(
@@ -29,8 +86,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # let the admin panel read the pagination cursor
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Outermost, so the timings include CORS handling
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include the main router
 app.include_router(api_router)
 
@@ -45,6 +108,27 @@ async def health_check():
         "database": settings.DATABASE_NAME,
     }
 
+@app.get("/health/db")
+async def database_health():
+    """Mongo ping and connection pool saturation; 503 when the database is unreachable."""
+    health = await mongo_health()
+    return JSONResponse(health, status_code=503 if health["status"] == "down" else 200)
+
+@app.get("/cache-stats")
+async def get_cache_stats():
+    """Hit/miss counters for the in-process caches."""
+    return cache_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+async def get_metrics():
+    """Prometheus text format: request, Mongo and outbound latencies, in-flight gauges, cache counters."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/slow-requests", dependencies=[Depends(require_admin)])
+async def get_slow_requests():
+    """Profiles of the latest requests over PROFILE_SLOW_REQUEST_MS (empty when profiling is off)."""
+    return {"enabled": profiler.enabled, "profiles": list(profiler.profiles)}
+
 @app.get("/test-db")
 async def test(db: AsyncIOMotorDatabase = Depends(get_db)):
     collections = await db.list_collection_names()
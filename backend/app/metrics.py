@@ -0,0 +1,444 @@
+# /backend/app/metrics.py
+"""
+In-process metrics in the Prometheus text format, served at GET /metrics.
+Both metrics routes need the admin password in X-Admin-Password (set it as
+an `http_headers` entry in the Prometheus scrape config).
+
+- HTTP: latency histogram per route template, plus an in-flight gauge
+  (`MetricsMiddleware`).
+- Mongo: every command timed by a pymongo command listener, added to the
+  Motor client in `app.db.connection`, and each server's connection pool
+  (open / in use / waiting) from a pool listener that is always on, since
+  GET /health/db reports it too.
+- Outbound calls: the shared httpx client's transport times open-meteo,
+  Telegram and ThingSpeak. Cloudinary and Twilio SDK calls run in threads
+  and are wrapped in `track_outbound`.
+- Caches: the counters and hit ratio of every TTLCache in `app.cache.CACHES`.
+
+Opt-in profiling: with PROFILE_SLOW_REQUEST_MS set, a sampler thread records
+the event loop's stack every PROFILE_SAMPLE_INTERVAL_MS. Requests slower than
+the threshold keep the samples taken while they ran, as collapsed stacks,
+served at GET /metrics/slow-requests. The loop runs every request on one
+thread, so a profile shows whatever the loop was busy with during that
+request (a slow request is often slow because something else blocked it).
+"""
+import itertools
+import sys
+import threading
+import time
+from collections import Counter as CallCounter, deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from app.config import get_settings
+
+settings = get_settings()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Hosts called through the shared httpx client, labelled by service
+OUTBOUND_SERVICES = {
+    "api.open-meteo.com": "open-meteo",
+    "api.telegram.org": "telegram",
+    "api.thingspeak.com": "thingspeak",
+}
+
+_lock = threading.Lock()
+REGISTRY: List["Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        # unlabelled metrics report 0 before their first update
+        self.values: Dict[Tuple[str, ...], float] = {} if self.labelnames else {(): 0.0}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with _lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with _lock:
+            items = list(self.values.items())
+        return [f"{self.name}{_labels(self.labelnames, labels)} {value}" for labels, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket..., +Inf count, sum]
+        self.values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        with _lock:
+            series = self.values.get(labels)
+            if series is None:
+                series = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def samples(self) -> List[str]:
+        with _lock:
+            items = [(labels, list(series)) for labels, series in self.values.items()]
+        lines = []
+        for labels, series in items:
+            for bound, count in zip(self.buckets, series):
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {count}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {series[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {series[-2]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class CallbackMetric(Metric):
+    """Counter or gauge whose samples are read from `collect` at scrape time."""
+
+    def __init__(self, name, help, labelnames, kind: str, collect: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]):
+        super().__init__(name, help, labelnames)
+        self.kind = kind
+        self.collect = collect
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, labels)} {value}" for labels, value in self.collect()]
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time to serve a request", ("method", "route", "status")
+)
+http_in_flight = Gauge("http_requests_in_flight", "Requests being served")
+mongo_command_duration = Histogram(
+    "mongodb_command_duration_seconds", "Time per MongoDB command", ("command", "collection", "outcome")
+)
+mongo_in_flight = Gauge("mongodb_commands_in_flight", "MongoDB commands awaiting a reply")
+outbound_duration = Histogram(
+    "outbound_request_duration_seconds", "Time per call to an external service", ("service", "status")
+)
+outbound_in_flight = Gauge("outbound_requests_in_flight", "External calls awaiting a reply", ("service",))
+
+
+def _cache_stat(stat: str) -> Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]:
+    def collect():
+        from app.cache import CACHES
+
+        return [((name,), cache.stats()[stat]) for name, cache in list(CACHES.items())]
+    return collect
+
+
+CallbackMetric("cache_entries", "Entries held by each TTLCache", ("cache",), "gauge", _cache_stat("entries"))
+for _stat in ("hits", "misses", "coalesced", "evictions"):
+    CallbackMetric(f"cache_{_stat}_total", f"TTLCache {_stat}", ("cache",), "counter", _cache_stat(_stat))
+CallbackMetric("cache_hit_ratio", "Hits / lookups since start for each TTLCache", ("cache",), "gauge", _cache_stat("hit_ratio"))
+
+
+def render_metrics() -> str:
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# --- HTTP ------------------------------------------------------------------
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses are timed to their last byte."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec()
+            duration = time.perf_counter() - start
+            route = scope.get("route")
+            # unmatched paths share one label so scanners can't blow up the series count
+            route_label = getattr(route, "path", None) or "unmatched"
+            http_request_duration.observe(duration, scope["method"], route_label, status)
+            if profiler.enabled:
+                profiler.record(scope["method"], route_label, start, duration)
+
+
+# --- Mongo -----------------------------------------------------------------
+
+class MongoCommandListener(monitoring.CommandListener):
+    def __init__(self):
+        self._collections: Dict[Tuple[object, int], str] = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else ""
+        self._collections[(event.connection_id, event.request_id)] = collection
+        mongo_in_flight.inc()
+
+    def _finish(self, event, outcome: str):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        mongo_in_flight.dec()
+        mongo_command_duration.observe(event.duration_micros / 1e6, event.command_name, collection, outcome)
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """
+    Connection pool usage per server address. The driver emits these events
+    from its own threads, hence the lock.
+    """
+
+    def __init__(self):
+        self.pools: Dict[str, dict] = {}
+
+    def _update(self, address, **changes: int) -> None:
+        key = "%s:%s" % address
+        with _lock:
+            pool = self.pools.setdefault(
+                key, {"open": 0, "in_use": 0, "waiting": 0, "checkout_failures": 0, "cleared": 0}
+            )
+            for field, delta in changes.items():
+                pool[field] += delta
+
+    def pool_created(self, event):
+        self._update(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._update(event.address, cleared=1)
+
+    def pool_closed(self, event):
+        with _lock:
+            self.pools.pop("%s:%s" % event.address, None)
+
+    def connection_created(self, event):
+        self._update(event.address, open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._update(event.address, open=-1)
+
+    def connection_check_out_started(self, event):
+        self._update(event.address, waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._update(event.address, waiting=-1, checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        self._update(event.address, waiting=-1, in_use=1)
+
+    def connection_checked_in(self, event):
+        self._update(event.address, in_use=-1)
+
+    def stats(self) -> Dict[str, dict]:
+        """Per address, with `saturation` = share of MONGO_MAX_POOL_SIZE checked out."""
+        with _lock:
+            pools = {address: dict(pool) for address, pool in self.pools.items()}
+        for pool in pools.values():
+            pool["max_size"] = settings.MONGO_MAX_POOL_SIZE
+            pool["saturation"] = round(pool["in_use"] / settings.MONGO_MAX_POOL_SIZE, 4) if settings.MONGO_MAX_POOL_SIZE else 0.0
+        return pools
+
+
+mongo_pool = MongoPoolListener()
+
+
+def _pool_stat(*stats: str) -> Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]:
+    def collect():
+        samples = []
+        for address, pool in mongo_pool.stats().items():
+            for stat in stats:
+                samples.append(((address, stat) if len(stats) > 1 else (address,), pool[stat]))
+        return samples
+    return collect
+
+
+CallbackMetric(
+    "mongodb_pool_connections", "Pool connections per server (open, in_use) and operations waiting for one", ("address", "state"), "gauge",
+    _pool_stat("open", "in_use", "waiting"),
+)
+CallbackMetric(
+    "mongodb_pool_saturation", "Share of MONGO_MAX_POOL_SIZE checked out", ("address",), "gauge",
+    _pool_stat("saturation"),
+)
+CallbackMetric(
+    "mongodb_pool_checkout_failures_total", "Checkouts that timed out or failed", ("address",), "counter",
+    _pool_stat("checkout_failures"),
+)
+
+
+# --- Outbound --------------------------------------------------------------
+
+class InstrumentedTransport:
+    """
+    Wraps the httpx transport and times every request up to its response
+    headers. Failures that never produce a response count as status "error".
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    async def handle_async_request(self, request):
+        service = OUTBOUND_SERVICES.get(request.url.host, request.url.host)
+        start = time.perf_counter()
+        status = "error"
+        outbound_in_flight.inc(service)
+        try:
+            response = await self.transport.handle_async_request(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            outbound_in_flight.dec(service)
+            outbound_duration.observe(time.perf_counter() - start, service, status)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+    async def __aenter__(self):
+        await self.transport.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.transport.__aexit__(*exc_info)
+
+
+@contextmanager
+def track_outbound(service: str):
+    """Times a blocking SDK call (Cloudinary, Twilio) made from a worker thread."""
+    start = time.perf_counter()
+    status = "error"
+    outbound_in_flight.inc(service)
+    try:
+        yield
+        status = "ok"
+    finally:
+        outbound_in_flight.dec(service)
+        outbound_duration.observe(time.perf_counter() - start, service, status)
+
+
+# --- Profiling ---------------------------------------------------------------
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SlowRequestProfiler:
+    def __init__(self, threshold_ms: Optional[float], interval_ms: float, keep: int):
+        self.enabled = threshold_ms is not None
+        self.threshold = (threshold_ms or 0) / 1000
+        self.interval = interval_ms / 1000
+        # (timestamp, collapsed stack) of the loop thread, about the last 60 s
+        self.samples: Deque[Tuple[float, str]] = deque(maxlen=max(1, int(60 / self.interval)))
+        self.profiles: Deque[dict] = deque(maxlen=keep)
+        self._ids = itertools.count(1)
+        self._thread: Optional[threading.Thread] = None
+        self._target: Optional[int] = None
+
+    def start(self) -> None:
+        """Starts sampling the calling thread (the event loop's)."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._sample, name="slow-request-profiler", daemon=True)
+        self._thread.start()
+
+    def _sample(self) -> None:
+        while True:
+            frame = sys._current_frames().get(self._target)
+            if frame is not None:
+                self.samples.append((time.perf_counter(), _collapse(frame)))
+            time.sleep(self.interval)
+
+    def record(self, method: str, route: str, start: float, duration: float) -> None:
+        if duration < self.threshold:
+            return
+        end = start + duration
+        stacks = CallCounter(stack for at, stack in list(self.samples) if start <= at <= end)
+        profile = {
+            "id": next(self._ids),
+            "method": method,
+            "route": route,
+            "duration_ms": round(duration * 1000, 1),
+            "samples": sum(stacks.values()),
+            "interval_ms": self.interval * 1000,
+            # flamegraph.pl / speedscope "collapsed" format
+            "stacks": [f"{stack} {count}" for stack, count in stacks.most_common(50)],
+        }
+        self.profiles.append(profile)
+        print(f"Slow request {method} {route}: {profile['duration_ms']} ms, profile #{profile['id']}")
+
+
+profiler = SlowRequestProfiler(
+    settings.PROFILE_SLOW_REQUEST_MS,
+    settings.PROFILE_SAMPLE_INTERVAL_MS,
+    settings.PROFILE_KEEP,
+)
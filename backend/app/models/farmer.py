@@ -1,5 +1,5 @@
 # /backend/app/models/farmer.py
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 from pydantic import BaseModel
 
 
@@ -17,3 +17,9 @@ class FarmerCreateModel(BaseModel):
 
     # farms can have dynamic keys like farm_1, farm_2, etc.
     farms: Optional[Dict[str, FarmModel]] = None
+
+    def sensor_ids(self) -> List[str]:
+        """Every sensor_id across the farms, stored as `sensor_ids` for indexed lookups."""
+        if not self.farms:
+            return []
+        return sorted({farm.sensor_id for farm in self.farms.values() if farm.sensor_id})
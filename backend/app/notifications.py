@@ -0,0 +1,383 @@
+# /backend/app/notifications.py
+"""
+Background Telegram notifications with a persisted outbox.
+
+Form routes call `enqueue_notification`, which only writes the message to the
+`telegramoutbox` collection and hands its id to an in-process queue. A worker
+task started in `main.lifespan` drains the queue, merges bursts into one
+digest message, and retries failures with exponential backoff. Messages still
+pending after a restart are picked up again by the periodic outbox sweep.
+A worker renews its claim on a message before every send, so a slow batch
+can't let the claim expire and another worker send the message again.
+
+User input is escaped for Telegram Markdown. When Telegram still rejects a
+digest (4xx), its messages are sent one by one, each falling back to plain
+text, so one bad message can't hold back the others. A message rejected even
+then is marked failed instead of retried.
+"""
+import asyncio
+import re
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from app.config import get_settings
+
+if TYPE_CHECKING:
+    import httpx
+
+settings = get_settings()
+
+OUTBOX_COLLECTION = "telegramoutbox"
+
+# Telegram rejects messages over 4096 characters
+TELEGRAM_MAX_LENGTH = 4000
+# how long a claimed message is reserved before another worker may retry it;
+# renewed before each send, so it only has to cover one message (two sends
+# of at most 10s each with the Telegram timeout in `http_client`)
+CLAIM_LEASE = timedelta(seconds=60)
+
+
+def telegram_configured() -> bool:
+    return bool(settings.TELEGRAM_BOT_TOKEN and settings.TELEGRAM_CHAT_ID)
+
+
+def escape_markdown(text: str) -> str:
+    """Escapes user input for parse_mode="Markdown", so a stray * or _ can't break the message."""
+    return re.sub(r"([_*`\[])", r"\\\1", str(text))
+
+
+async def send_telegram_message(client: "httpx.AsyncClient", text: str, parse_mode: Optional[str] = "Markdown") -> None:
+    """Posts one message to the configured chat. Raises httpx.HTTPError on failure."""
+    url = f"{settings.TELEGRAM_API_BASE_URL}/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
+    payload = {
+        "chat_id": settings.TELEGRAM_CHAT_ID,
+        "text": text,
+    }
+    if parse_mode:
+        payload["parse_mode"] = parse_mode
+    response = await client.post(url, json=payload)
+    response.raise_for_status()
+
+
+def is_permanent(error: Exception) -> bool:
+    """
+    Telegram answers 4xx when it rejects the message itself (bad markup,
+    chat not found, ...): sending it again can't help. 429 is rate limiting
+    and is retried like any other failure.
+    """
+    import httpx
+
+    return (
+        isinstance(error, httpx.HTTPStatusError)
+        and 400 <= error.response.status_code < 500
+        and error.response.status_code != 429
+    )
+
+
+def build_digests(docs: List[dict]) -> List[Tuple[str, List[ObjectId]]]:
+    """Packs queued messages into as few Telegram messages as the length limit allows."""
+    digests: List[Tuple[str, List[ObjectId]]] = []
+    texts: List[str] = []
+    ids: List[ObjectId] = []
+    length = 0
+
+    def flush():
+        if not texts:
+            return
+        if len(texts) == 1:
+            digests.append((texts[0], list(ids)))
+        else:
+            header = f"📬 {len(texts)} NEW SUBMISSIONS"
+            digests.append(("\n\n".join([header, *texts]), list(ids)))
+        texts.clear()
+        ids.clear()
+
+    for doc in docs:
+        text = doc["text"][:TELEGRAM_MAX_LENGTH]
+        if texts and length + len(text) + 2 > TELEGRAM_MAX_LENGTH - 40:
+            flush()
+            length = 0
+        texts.append(text)
+        ids.append(doc["_id"])
+        length += len(text) + 2
+
+    flush()
+    return digests
+
+
+class NotificationQueue:
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self.client: Optional["httpx.AsyncClient"] = None
+        # ids submitted while no worker runs (Lambda), delivered by `flush`
+        self.unsent: List[ObjectId] = []
+        # messages whose outbox insert failed, written by the next sweep
+        self.unsaved: List[dict] = []
+
+    def start(self, db: AsyncIOMotorDatabase, client: "httpx.AsyncClient") -> None:
+        self.db = db
+        self.client = client
+        self.queue = asyncio.Queue(maxsize=settings.NOTIFY_QUEUE_SIZE)
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+
+    def submit(self, outbox_id: ObjectId) -> None:
+        """
+        Hands an outbox id to the worker. When the queue is full the message
+        simply waits in the outbox for the next sweep; without a worker it is
+        kept for `flush`.
+        """
+        if self.queue is None:
+            if len(self.unsent) < settings.NOTIFY_QUEUE_SIZE:
+                self.unsent.append(outbox_id)
+            return
+        try:
+            self.queue.put_nowait(outbox_id)
+        except asyncio.QueueFull:
+            pass
+
+    def defer(self, doc: dict) -> None:
+        """Keeps a message the outbox insert failed for, so the next sweep or flush can store it."""
+        if len(self.unsaved) < settings.NOTIFY_QUEUE_SIZE:
+            self.unsaved.append(doc)
+        else:
+            print("Notification dropped: outbox unavailable and retry buffer full")
+
+    async def _save_deferred(self, db: AsyncIOMotorDatabase) -> List[ObjectId]:
+        docs, self.unsaved = self.unsaved, []
+        if not docs:
+            return []
+        try:
+            result = await db[OUTBOX_COLLECTION].insert_many(docs)
+        except Exception as e:
+            print(f"Outbox still unavailable, keeping {len(docs)} notifications: {e}")
+            self.unsaved = docs + self.unsaved
+            return []
+        return list(result.inserted_ids)
+
+    async def flush(self, db: AsyncIOMotorDatabase, client: "httpx.AsyncClient", sweep: bool = False) -> None:
+        """
+        Delivers without the worker task, for Lambda: the messages submitted
+        since the last flush, plus everything due in the outbox when `sweep` is set.
+        """
+        self.db = db
+        self.client = client
+        ids, self.unsent = self.unsent, []
+        ids += await self._save_deferred(db)
+        if sweep:
+            cursor = db[OUTBOX_COLLECTION].find(_due_filter(datetime.now(timezone.utc)), {"_id": 1})
+            ids += [doc["_id"] async for doc in cursor.limit(settings.NOTIFY_QUEUE_SIZE)]
+        if not ids:
+            return
+        docs = await self._claim(ids)
+        if docs:
+            await self._deliver(docs)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        # sweep straight away so messages left over from before a restart go out
+        next_sweep = loop.time()
+        while True:
+            try:
+                if loop.time() >= next_sweep:
+                    await self._sweep()
+                    next_sweep = loop.time() + settings.NOTIFY_SWEEP_INTERVAL_SECONDS
+
+                ids = await self._next_batch()
+                if not ids:
+                    continue
+                docs = await self._claim(ids)
+                if docs:
+                    await self._deliver(docs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Notification worker error: {e}")
+                await asyncio.sleep(1)
+
+    async def _next_batch(self) -> List[ObjectId]:
+        """Waits for one id, then keeps collecting for a short window so bursts become one digest."""
+        try:
+            first = await asyncio.wait_for(self.queue.get(), timeout=settings.NOTIFY_SWEEP_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            return []
+
+        ids = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.NOTIFY_BATCH_WINDOW_SECONDS
+        while len(ids) < settings.NOTIFY_BATCH_MAX:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                ids.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return ids
+
+    async def _sweep(self) -> None:
+        """Re-queues outbox messages that are due: new after a restart, retries, or expired claims."""
+        for outbox_id in await self._save_deferred(self.db):
+            self.submit(outbox_id)
+        now = datetime.now(timezone.utc)
+        cursor = self.db[OUTBOX_COLLECTION].find(_due_filter(now), {"_id": 1}).limit(settings.NOTIFY_QUEUE_SIZE)
+        async for doc in cursor:
+            self.submit(doc["_id"])
+
+    async def _claim(self, ids: List[ObjectId]) -> List[dict]:
+        """
+        Reserves each message atomically so two workers never send the same
+        one. The claim id tells this worker's claim apart from a later one.
+        """
+        now = datetime.now(timezone.utc)
+        claim = ObjectId()
+        claimed = []
+        for outbox_id in dict.fromkeys(ids):
+            doc = await self.db[OUTBOX_COLLECTION].find_one_and_update(
+                {"_id": outbox_id, **_due_filter(now)},
+                {"$set": {"status": "sending", "claim": claim, "locked_until": now + CLAIM_LEASE}},
+                return_document=ReturnDocument.AFTER,
+            )
+            if doc:
+                claimed.append(doc)
+        return claimed
+
+    async def _renew(self, docs: List[dict]) -> List[dict]:
+        """Extends the claim on `docs` before a send. Returns the ones this worker still holds."""
+        locked_until = datetime.now(timezone.utc) + CLAIM_LEASE
+        held = []
+        for doc in docs:
+            result = await self.db[OUTBOX_COLLECTION].update_one(
+                {"_id": doc["_id"], "status": "sending", "claim": doc.get("claim")},
+                {"$set": {"locked_until": locked_until}},
+            )
+            if result.matched_count:
+                held.append(doc)
+        return held
+
+    async def _deliver(self, docs: List[dict]) -> None:
+        import httpx
+
+        by_id = {doc["_id"]: doc for doc in docs}
+        for text, ids in build_digests(docs):
+            if len(ids) == 1:
+                await self._deliver_one(by_id[ids[0]])
+                continue
+
+            held = await self._renew([by_id[outbox_id] for outbox_id in ids])
+            if len(held) < len(ids):
+                # another worker took some over after our claim expired
+                for doc in held:
+                    await self._deliver_one(doc)
+                continue
+
+            try:
+                await send_telegram_message(self.client, text)
+            except httpx.HTTPError as e:
+                if is_permanent(e):
+                    # one bad message must not hold back the rest of the digest
+                    for outbox_id in ids:
+                        await self._deliver_one(by_id[outbox_id])
+                    continue
+                print(f"Failed to send Telegram notification: {e}")
+                for outbox_id in ids:
+                    await self._reschedule(by_id[outbox_id], str(e))
+                continue
+
+            await self._mark_sent(ids)
+
+    async def _deliver_one(self, doc: dict) -> None:
+        """Sends one message on its own, falling back to plain text when Telegram rejects the markup."""
+        import httpx
+
+        text = doc["text"][:TELEGRAM_MAX_LENGTH]
+        if not await self._renew([doc]):
+            return
+        try:
+            try:
+                await send_telegram_message(self.client, text)
+            except httpx.HTTPError as e:
+                if not is_permanent(e):
+                    raise
+                await send_telegram_message(self.client, text, parse_mode=None)
+        except httpx.HTTPError as e:
+            print(f"Failed to send Telegram notification: {e}")
+            await self._reschedule(doc, str(e), permanent=is_permanent(e))
+            return
+
+        await self._mark_sent([doc["_id"]])
+
+    async def _mark_sent(self, ids: List[ObjectId]) -> None:
+        await self.db[OUTBOX_COLLECTION].update_many(
+            {"_id": {"$in": ids}},
+            {"$set": {"status": "sent", "sent_at": datetime.now(timezone.utc)}, "$unset": {"locked_until": ""}},
+        )
+
+    async def _reschedule(self, doc: dict, error: str, permanent: bool = False) -> None:
+        attempts = doc.get("attempts", 0) + 1
+        if permanent or attempts >= settings.NOTIFY_MAX_ATTEMPTS:
+            update = {"status": "failed"}
+        else:
+            delay = min(settings.NOTIFY_RETRY_BASE_SECONDS * 2 ** (attempts - 1), 3600)
+            update = {
+                "status": "pending",
+                "next_attempt_at": datetime.now(timezone.utc) + timedelta(seconds=delay),
+            }
+        await self.db[OUTBOX_COLLECTION].update_one(
+            {"_id": doc["_id"]},
+            {"$set": {**update, "attempts": attempts, "last_error": error}, "$unset": {"locked_until": ""}},
+        )
+
+
+def _due_filter(now: datetime) -> dict:
+    return {
+        "$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            {"status": "sending", "locked_until": {"$lt": now}},
+        ]
+    }
+
+
+notifier = NotificationQueue()
+
+
+async def enqueue_notification(db: AsyncIOMotorDatabase, text: str) -> None:
+    """
+    Stores the message in the outbox and queues it for background delivery.
+    A failed insert doesn't fail the form submission: the message is kept in
+    memory and written by the next sweep.
+    """
+    if not telegram_configured():
+        print("Telegram credentials not found. Skipping notification.")
+        return
+
+    now = datetime.now(timezone.utc)
+    doc = {
+        "text": text,
+        "status": "pending",
+        "attempts": 0,
+        "created_at": now,
+        "next_attempt_at": now,
+    }
+    try:
+        result = await db[OUTBOX_COLLECTION].insert_one(doc)
+    except Exception as e:
+        print(f"Could not store notification, retrying on the next sweep: {e}")
+        doc.pop("_id", None)
+        notifier.defer(doc)
+        return
+    notifier.submit(result.inserted_id)
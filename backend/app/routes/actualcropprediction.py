@@ -1,10 +1,57 @@
-from fastapi import APIRouter
+from typing import Dict, List, Union
+
+from fastapi import APIRouter, HTTPException, status
+from pydantic import BaseModel, Field
+
+from app.cropinference import crop_inference
 
 router = APIRouter(
     prefix="/actual-crop-prediction",
     tags=["Actual Crop Prediction"]
 )
 
+
+class WeatherConditions(BaseModel):
+    temperature: float = Field(..., ge=-30, le=60, description="Air temperature, °C")
+    humidity: float = Field(..., ge=0, le=100, description="Relative humidity, %")
+    pressure: float = Field(..., ge=800, le=1100, description="Surface pressure, hPa")
+    wind_speed: float = Field(..., ge=0, le=75, description="Wind speed, m/s")
+    net_radiation: float = Field(..., ge=-300, le=1500, description="Net radiation, W/m²")
+
+
+class CropPrediction(BaseModel):
+    model_version: str
+    predictions: List[Dict[str, Union[str, int, float]]]
+
+
 @router.get("/")
-async def get_crop_prediction():
-    return {"message": "ye post request accept karega  with fields as temp, relative humidity, pressure,wind speed, net radiation ,,,, then it will return the top three most likely crop name and with percentage likely using ML"}
+async def get_crop_prediction_info():
+    """Which model is serving and how requests are being batched."""
+    return crop_inference.stats()
+
+
+@router.post("/", response_model=CropPrediction)
+async def get_crop_prediction(conditions: WeatherConditions):
+    """
+    Returns the three most likely crops for the given weather, with their
+    likelihood in percent, from the ML crop model.
+    """
+    # same order as app.cropmodel.FEATURES
+    features = [
+        conditions.temperature,
+        conditions.humidity,
+        conditions.pressure,
+        conditions.wind_speed,
+        conditions.net_radiation,
+    ]
+    try:
+        version, top = await crop_inference.predict(features)
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    return {
+        "model_version": version,
+        "predictions": [
+            {"crop": crop, "percentage": round(probability * 100, 1)} for crop, probability in top
+        ],
+    }
@@ -1,10 +1,59 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import BaseModel
+
+from app.db.connection import get_db
+from app.routes.verifyadmin import require_admin
+from app.thingspeak import CHANNELS_COLLECTION, poller
 
 router = APIRouter(
     prefix="/actual-sensor-data",
     tags=["Actual Sensor Data"]
 )
 
+class SensorChannelModel(BaseModel):
+    sensor_id: str
+    channel_id: int
+    read_api_key: Optional[str] = None
+    soil_field: str = "field1"
+    tank_field: str = "field2"
+
 @router.get("/")
-async def get_sensor_data():
-    return {"message": "it will make a request to thingsspeak api and will get senser data from web,,,,and from that it will return soil moisture and water tank level,,,,,(later we will merge these both enpointpoint /actualsenserdata and actualtwiliocall)"}
+async def get_sensor_data(
+    sensor_id: str = Query(..., description="The unique ID of the sensor"),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    """
+    Latest soil moisture and water tank level for a sensor, as ingested from ThingSpeak.
+    Served from memory; readings are pulled in the background by the poller.
+    """
+    reading = await poller.get_latest(db, sensor_id)
+    if not reading:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No readings for this sensor yet")
+
+    return {
+        "sensor_id": sensor_id,
+        "soil_moisture": reading.get("soil_moisture"),
+        "water_tank_level": reading.get("water_tank_level"),
+        "timestamp": reading["timestamp"],
+    }
+
+@router.put("/channels", status_code=status.HTTP_200_OK, dependencies=[Depends(require_admin)])
+async def register_sensor_channel(payload: SensorChannelModel, db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Links a sensor_id to the ThingSpeak channel it reports to. Its readings
+    drive the alert calls, so this needs the admin password (X-Admin-Password).
+    Re-registering keeps the ingestion cursor unless the channel changes.
+    """
+    channel = payload.model_dump(exclude={"sensor_id"})
+    existing = await db[CHANNELS_COLLECTION].find_one({"_id": payload.sensor_id}, {"channel_id": 1})
+    if existing is None or existing.get("channel_id") != payload.channel_id:
+        channel.update({"last_entry_id": 0, "last_created_at": None})
+
+    await db[CHANNELS_COLLECTION].update_one({"_id": payload.sensor_id}, {"$set": channel}, upsert=True)
+
+    return {
+        "success": True,
+        "message": "Sensor channel registered successfully",
+    }
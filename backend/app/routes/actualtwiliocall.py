@@ -1,11 +1,69 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.alerts import CONDITIONS, alert_engine, claim_pass
+from app.config import get_settings
+from app.db.connection import get_db
+from app.routes.verifyadmin import require_admin
+from app.twilio_client import record_call_status
 
 router = APIRouter(
     prefix="/actual-twilio-call",
     tags=["Actual Twilio Call"]
 )
 
+settings = get_settings()
+
 @router.get("/")
-async def trigger_twilio_call():
-    return {"message": "it make a request to thingsspeak api every 15 minutes if that data is critical then it will make  call using my twillo credentials to farmers number based on his languge choosen he will alert him(later we will merge these both enpointpoint /actualsenserdata and actualtwiliocall)"}
+async def get_alert_status():
+    """
+    Sensor readings are checked every ALERT_INTERVAL_SECONDS; farmers with a
+    critical farm get one call in their call_language. Returns the thresholds
+    and the result of the last pass run by this worker.
+    """
+    return {
+        "interval_seconds": settings.ALERT_INTERVAL_SECONDS,
+        "cooldown_seconds": settings.ALERT_COOLDOWN_SECONDS,
+        "conditions": CONDITIONS,
+        "last_run": alert_engine.last_run,
+    }
+
+@router.post("/run", dependencies=[Depends(require_admin)])
+async def run_alert_check(db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Runs one alert pass now instead of waiting for the schedule. Takes the
+    same lease as the scheduled passes, so it never runs alongside one (and
+    the next scheduled pass waits out the lease).
+    """
+    if not await claim_pass(db, datetime.now(timezone.utc)):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="An alert pass is already running or ran recently")
+    return await alert_engine.run_once(db)
+
+@router.post("/status")
+async def twilio_status_callback(
+    request: Request,
+    x_twilio_signature: Optional[str] = Header(None),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    """
+    Twilio call status callback (TWILIO_STATUS_CALLBACK_URL should point here).
+    Signed with the account auth token; the configured URL is used for the
+    check since the URL seen behind the API gateway can differ.
+    """
+    from twilio.request_validator import RequestValidator
+
+    form = dict(await request.form())
+    validator = RequestValidator(settings.TWILIO_AUTH_TOKEN)
+    url = settings.TWILIO_STATUS_CALLBACK_URL or str(request.url)
+    if not x_twilio_signature or not validator.validate(url, form, x_twilio_signature):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid Twilio signature")
+
+    call_sid = form.get("CallSid")
+    call_status = form.get("CallStatus")
+    if not call_sid or not call_status:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CallSid and CallStatus are required")
 
+    await record_call_status(db, call_sid, call_status, form.get("CallDuration"))
+    return {"success": True}
@@ -1,8 +1,9 @@
 # /backend/app/routes/adminaddfarmerdata.py
 import json
 import asyncio
-from typing import List
+from typing import List, Optional
 
+from bson import ObjectId
 from fastapi import (
     APIRouter,
     Depends,
@@ -11,12 +12,25 @@ from fastapi import (
     UploadFile,
     Form,
     HTTPException,
+    Query,
+    Request,
 )
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
 
 from app.db.connection import get_db
+from app.db.serialization import BSONResponse
+from app.db.sensors import (
+    SensorOwnershipError,
+    find_sensor_conflicts,
+    remove_farmer_sensors,
+    sync_farmer_sensors,
+)
+from app.farmercache import farmer_cache
+from app.farmerimport import FORMATS, IMPORTS_COLLECTION, expire_stale_imports, farmer_imports, receive_body
+from app.httpcache import BUMP_REVISION
 from app.models.farmer import FarmerCreateModel
-from app.utils import upload_image_to_cloudinary
+from app.utils import check_upload_size, store_farm_photo
 
 
 router = APIRouter(
@@ -54,45 +68,77 @@ async def add_farmer_data(
             "message": "No data provided"
         }
 
+    # mobile_no is unique: refuse a duplicate before uploading any photos
+    if farmer_dict.get("mobile_no") and await db["farmerdata"].find_one(
+        {"mobile_no": farmer_dict["mobile_no"]}, {"_id": 1}
+    ):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A farmer with this mobile number already exists")
+
+    # a sensor can only be on one farmer's farm
+    conflicts = await find_sensor_conflicts(db, None, farmer_model.sensor_ids())
+    if conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Sensors already registered to another farmer: {', '.join(conflicts)}"
+        )
+
     # 2️⃣ Map uploaded files by filename
     file_map = {file.filename: file for file in files} if files else {}
 
     # 3️⃣ Process farms and upload images in PARALLEL
     if "farms" in farmer_dict and farmer_dict["farms"]:
-        upload_tasks = []
-        farm_keys_to_update = []
-
+        # one upload per file, even if several farms reference the same photo
+        farm_keys_by_photo = {}
         for farm_key, farm_val in farmer_dict["farms"].items():
             photo_ref = farm_val.get("photo")
             if photo_ref and photo_ref in file_map:
-                file_obj = file_map[photo_ref]
-                # Read file content immediately (safest for parallel processing if not streaming)
-                # Note: For very large files, streaming might be better, but images are usually okay.
-                content = await file_obj.read()
-                
-                # Append coroutine to task list
-                upload_tasks.append(upload_image_to_cloudinary(content, filename=photo_ref))
-                farm_keys_to_update.append(farm_key)
-
-        # Run all uploads at once
-        if upload_tasks:
-            # gather returns results in the same order as tasks
-            uploaded_urls = await asyncio.gather(*upload_tasks)
+                farm_keys_by_photo.setdefault(photo_ref, []).append(farm_key)
 
-            # Assign URLs back to the dictionary
-            for farm_key, url in zip(farm_keys_to_update, uploaded_urls):
-                if url:
-                    farmer_dict["farms"][farm_key]["photo"] = url
-                else:
-                    print(f"Failed to upload image for {farm_key}")
+        # Reject oversized files before uploading anything
+        await asyncio.gather(*(check_upload_size(file_map[photo_ref]) for photo_ref in farm_keys_by_photo))
 
-    # 4️⃣ Save to MongoDB
-    result = await db["farmerdata"].insert_one(farmer_dict)
+        if farm_keys_by_photo:
+            # Files are streamed from their temp files; photos seen before are
+            # answered from the hash store, and the upload helper caps how many
+            # real uploads run at once, so gather stays bounded
+            uploaded_urls = await asyncio.gather(
+                *(store_farm_photo(db, file_map[photo_ref]) for photo_ref in farm_keys_by_photo)
+            )
+
+            # Assign URLs back to the dictionary
+            for (photo_ref, farm_keys), url in zip(farm_keys_by_photo.items(), uploaded_urls):
+                for farm_key in farm_keys:
+                    if url:
+                        farmer_dict["farms"][farm_key]["photo"] = url
+                    else:
+                        print(f"Failed to upload image for {farm_key}")
+
+    # 4️⃣ Keep the indexed sensor lookup list in sync with farms
+    if farmer_model.farms:
+        farmer_dict["sensor_ids"] = farmer_model.sensor_ids()
+
+    # 5️⃣ Claim the farmer's sensors before writing the farmer, so a sensor
+    # another farmer registered since the check above leaves nothing behind
+    farmer_id = ObjectId()
+    farmer_dict["_id"] = farmer_id
+    if farmer_dict.get("sensor_ids"):
+        try:
+            await sync_farmer_sensors(db, farmer_id, farmer_dict)
+        except SensorOwnershipError as e:
+            await remove_farmer_sensors(db, farmer_id)
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    # 6️⃣ Save to MongoDB (the unique index still catches a concurrent insert)
+    try:
+        await db["farmerdata"].insert_one(farmer_dict)
+    except DuplicateKeyError:
+        await remove_farmer_sensors(db, farmer_id)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A farmer with this mobile number already exists")
 
     return {
         "success": True,
         "message": "Farmer data saved successfully",
-        "farmer_id": str(result.inserted_id),
+        "farmer_id": str(farmer_id),
     }
 
 
@@ -106,9 +152,9 @@ async def upload_farm_image(
     """
     Uploads an image for a specific farm and updates the farmer record.
     """
-    # 1. Upload to Cloudinary
-    content = await file.read()
-    image_url = await upload_image_to_cloudinary(content, filename=file.filename)
+    # 1. Upload to Cloudinary (streamed from the spooled temp file, skipped for known photos)
+    await check_upload_size(file)
+    image_url = await store_farm_photo(db, file)
 
     if not image_url:
         raise HTTPException(status_code=500, detail="Failed to upload image")
@@ -127,10 +173,12 @@ async def upload_farm_image(
     
     result = await db["farmerdata"].update_one(
         {"_id": obj_id},
-        {"$set": {update_field: image_url}}
+        {"$set": {update_field: image_url}, **BUMP_REVISION}
     )
 
-    if result.modified_count == 0:
+    if result.modified_count:
+        await farmer_cache.invalidate(db)
+    else:
         # Check if farmer exists
         farmer = await db["farmerdata"].find_one({"_id": obj_id})
         if not farmer:
@@ -144,3 +192,50 @@ async def upload_farm_image(
         "message": "Image uploaded and linked successfully",
         "url": image_url
     }
+
+
+@router.post("/bulk", status_code=status.HTTP_202_ACCEPTED)
+async def bulk_import_farmers(
+    request: Request,
+    format: Optional[str] = Query(None, description="csv or ndjson; taken from Content-Type when omitted"),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    """
+    Starts a bulk import of farmers sent as the raw request body (CSV or NDJSON).
+    Rows are upserted on mobile_no in the background; poll
+    GET /adminaddfarmerdata/bulk/{job_id} for progress and per-row errors.
+    """
+    content_type = request.headers.get("content-type", "")
+    fmt = format or ("ndjson" if "ndjson" in content_type or "jsonl" in content_type else "csv")
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+
+    try:
+        body = await receive_body(request.stream())
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+    job_id = await farmer_imports.start(db, body, fmt)
+    return {
+        "success": True,
+        "message": "Import started",
+        "job_id": str(job_id),
+    }
+
+
+@router.get("/bulk/{job_id}")
+async def get_bulk_import(job_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Progress of a bulk import: status (running, completed, failed), row
+    counts and the per-row error report. A job whose worker went away is
+    reported as failed.
+    """
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job_id")
+
+    await expire_stale_imports(db, ObjectId(job_id))
+    job = await db[IMPORTS_COLLECTION].find_one({"_id": ObjectId(job_id)})
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+
+    return BSONResponse(job)
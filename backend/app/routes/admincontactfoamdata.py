@@ -1,28 +1,37 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
-from app.db.connection import get_db
+from app.db.connection import get_analytics_db, get_db
+from app.db.pagination import MAX_PAGE_SIZE, fetch_page, ndjson_response, set_next_cursor
+from app.httpcache import conditional_response, page_etag
 
 router = APIRouter(
     prefix="/admincontactfoamdata",
     tags=["Admin"]
 )
 
-# Helper to fix ObjectId serialization
-def str_object_id(data: dict) -> dict:
-    if data and "_id" in data:
-        data["_id"] = str(data["_id"])
-    return data
-
 @router.get("/", response_model=List[dict])
-async def get_all_contact_data(db: AsyncIOMotorDatabase = Depends(get_db)):
+async def get_all_contact_data(
+    request: Request,
+    limit: int = Query(1000, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    stream: bool = Query(False, description="Stream all records as NDJSON"),
+    db: AsyncIOMotorDatabase = Depends(get_analytics_db),
+):
     """
-    Get all contact form data from 'contactfoamdata' collection.
+    Get contact form data from 'contactfoamdata' collection, one page at a time.
+    Pass the X-Next-Cursor header value as `after` to get the next page,
+    or `stream=true` to receive every record as NDJSON.
+    Pages carry an ETag and answer a matching If-None-Match with a 304.
     """
-    # Fetching all records (limited to 1000)
-    contacts = await db["contactfoamdata"].find().to_list(length=1000)
-    return [str_object_id(contact) for contact in contacts]
+    if stream:
+        return ndjson_response(db["contactfoamdata"], after=after, batch_size=limit)
+
+    contacts, next_cursor = await fetch_page(db["contactfoamdata"], limit, after)
+    response = conditional_response(request, page_etag(contacts, next_cursor), contacts)
+    set_next_cursor(response, next_cursor)
+    return response
 
 @router.delete("/{id}")
 async def delete_contact_data(id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
@@ -1,8 +1,20 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
-from app.db.connection import get_db
+from pymongo.errors import DuplicateKeyError
+from app.db.connection import get_analytics_db, get_db
+from app.db.pagination import MAX_PAGE_SIZE, fetch_page, ndjson_response, set_next_cursor
+from app.db.projection import build_farmer_projection, project_farmer
+from app.db.sensors import (
+    OWNER_FIELDS,
+    SensorOwnershipError,
+    find_sensor_conflicts,
+    remove_farmer_sensors,
+    sync_farmer_sensors,
+)
+from app.farmercache import farmer_cache
+from app.httpcache import BUMP_REVISION, REVISION_FIELD, conditional_response, document_etag, page_etag
 from app.models.farmer import FarmerCreateModel
 
 router = APIRouter(
@@ -10,34 +22,60 @@ router = APIRouter(
     tags=["Admin"]
 )
 
-# Helper to fix ObjectId serialization in responses
-def str_object_id(data: dict) -> dict:
-    if data and "_id" in data:
-        data["_id"] = str(data["_id"])
-    return data
-
 @router.get("/", response_model=List[dict])
-async def get_all_farmers(db: AsyncIOMotorDatabase = Depends(get_db)):
+async def get_all_farmers(
+    request: Request,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    stream: bool = Query(False, description="Stream all farmers as NDJSON"),
+    fields: Optional[str] = Query(None, description="Comma separated fields to return"),
+    view: Optional[str] = Query(None, description="Named view, e.g. 'summary'"),
+    db: AsyncIOMotorDatabase = Depends(get_analytics_db),
+):
     """
-    Get all farmer data. 
-    Limited to 100 entries for performance.
+    Get farmer data, one page at a time ordered by `_id`.
+    Pass the X-Next-Cursor header value as `after` to get the next page,
+    or `stream=true` to receive every farmer as NDJSON.
+    Use `fields` or `view=summary` to skip the nested farm documents.
+    Pages carry an ETag and answer a matching If-None-Match with a 304.
     """
-    farmers = await db["farmerdata"].find().to_list(length=100)
-    return [str_object_id(farmer) for farmer in farmers]
+    projection = build_farmer_projection(fields, view)
+    if stream:
+        return ndjson_response(
+            db["farmerdata"], after=after, projection=projection, batch_size=limit
+        )
+
+    # the revision decides the ETag, so it is read even when not asked for
+    query_projection = {**projection, REVISION_FIELD: 1} if projection else None
+    farmers, next_cursor = await fetch_page(db["farmerdata"], limit, after, projection=query_projection)
+    etag = page_etag(farmers, next_cursor, projection)
+    if projection:
+        farmers = [{k: v for k, v in farmer.items() if k != REVISION_FIELD} for farmer in farmers]
+    response = conditional_response(request, etag, farmers)
+    set_next_cursor(response, next_cursor)
+    return response
 
 @router.get("/{id}")
-async def get_farmer_by_id(id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
+async def get_farmer_by_id(
+    id: str,
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma separated fields to return"),
+    view: Optional[str] = Query(None, description="Named view, e.g. 'summary'"),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
     """
     Get a single farmer by Object ID.
+    Sends an ETag; a request whose If-None-Match still matches gets a 304.
     """
     if not ObjectId.is_valid(id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid ID format")
     
-    farmer = await db["farmerdata"].find_one({"_id": ObjectId(id)})
+    projection = build_farmer_projection(fields, view)
+    farmer = await farmer_cache.get_by_id(db, ObjectId(id))
     if not farmer:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Farmer not found")
     
-    return str_object_id(farmer)
+    return conditional_response(request, document_etag(farmer, projection), project_farmer(farmer, projection))
 
 @router.put("/{id}")
 async def update_farmer_data(
@@ -57,14 +95,51 @@ async def update_farmer_data(
     if not update_data:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No data provided for update")
 
-    result = await db["farmerdata"].update_one(
-        {"_id": ObjectId(id)},
-        {"$set": update_data}
-    )
+    # farms is replaced as a whole, so rebuild the indexed sensor list from it
+    if "farms" in update_data:
+        update_data["sensor_ids"] = payload.sensor_ids()
+        # a sensor can only be on one farmer's farm
+        conflicts = await find_sensor_conflicts(db, ObjectId(id), update_data["sensor_ids"])
+        if conflicts:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Sensors already registered to another farmer: {', '.join(conflicts)}"
+            )
+
+    # sensors carry a copy of farms and the owner's contact fields. They are
+    # claimed before the farmer is written, and put back if the write fails.
+    previous = None
+    if "farms" in update_data or any(f in update_data for f in OWNER_FIELDS):
+        previous = await db["farmerdata"].find_one(
+            {"_id": ObjectId(id)}, {"farms": 1, **{f: 1 for f in OWNER_FIELDS}}
+        )
+        if previous is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Farmer not found")
+        try:
+            await sync_farmer_sensors(db, previous["_id"], {**previous, **update_data})
+        except SensorOwnershipError as e:
+            # another farmer registered the sensor after the check above
+            await sync_farmer_sensors(db, previous["_id"], previous)
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    try:
+        result = await db["farmerdata"].update_one(
+            {"_id": ObjectId(id)},
+            {"$set": update_data, **BUMP_REVISION}
+        )
+    except DuplicateKeyError:
+        if previous:
+            await sync_farmer_sensors(db, previous["_id"], previous)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A farmer with this mobile number already exists")
 
     if result.matched_count == 0:
+        # deleted meanwhile: drop the sensors claimed for it above
+        await remove_farmer_sensors(db, ObjectId(id))
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Farmer not found")
 
+    if result.modified_count:
+        await farmer_cache.invalidate(db)
+
     return {
         "success": True,
         "message": "Farmer updated successfully",
@@ -84,6 +159,9 @@ async def delete_farmer_data(id: str, db: AsyncIOMotorDatabase = Depends(get_db)
     if result.deleted_count == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Farmer not found")
 
+    await farmer_cache.invalidate(db)
+    await remove_farmer_sensors(db, ObjectId(id))
+
     return {
         "success": True,
         "message": "Farmer deleted successfully"
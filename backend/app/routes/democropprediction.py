@@ -1,103 +1,148 @@
-import httpx
-import hashlib
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict, Union
+import asyncio
+from contextlib import nullcontext
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple, Union
+
+from app.cache import TTLCache
+from app.config import get_settings
+from app.cropdata import CROP_DATA
+from app.http_client import get_http_client
+
+if TYPE_CHECKING:
+    import httpx
 
 router = APIRouter(
     prefix="/democropprediction",
     tags=["Demo"]
 )
 
-# Scientific Data Mapping: (Min_Temp, Max_Temp, Ideal_Humidity)
-CROP_DATA = {
-    "Paddy (Rice)": (22, 35, 80), "Rice": (22, 35, 80),
-    "Maize": (20, 30, 60), "Wheat": (15, 25, 50),
-    "Barley": (15, 25, 50), "Buckwheat": (18, 24, 70),
-    "Large Cardamom": (15, 25, 80), "Ginger": (20, 30, 75),
-    "Turmeric": (20, 30, 75), "Orange": (20, 30, 60),
-    "Mandarin": (20, 30, 60), "Tomato": (18, 27, 65),
-    "Cabbage": (15, 21, 75), "Cauliflower": (15, 21, 75),
-    "Peas": (10, 18, 60), "Potato": (15, 20, 80),
-    "Sugarcane": (25, 35, 75), "Soybean": (20, 30, 60),
-    "Cotton": (21, 32, 50), "Mustard": (15, 25, 50),
-    "Groundnut": (20, 30, 60)
-}
+settings = get_settings()
+
+
+def get_scoring_engine():
+    # NumPy and the crop matrices load on the first prediction, not at cold start
+    from app.cropscoring import engine
+    return engine
+
+# Current weather per rounded (lat, lon) cell; 2 decimals is roughly a 1 km square
+weather_cache = TTLCache(
+    "weather",
+    max_entries=settings.WEATHER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.WEATHER_CACHE_TTL_SECONDS,
+)
 
 class Location(BaseModel):
     # User sends a string like "21.384515, 47.004177"
     coordinates: str
 
-def get_location_specific_variation(crop_name: str, lat: float, lon: float):
+async def fetch_weather(
+    client: "httpx.AsyncClient", lat: float, lon: float, limit: Optional[asyncio.Semaphore] = None
+) -> dict:
     """
-    Creates a unique, consistent variation (0-15%) based on the 
-    combination of crop name and specific coordinates.
+    Current temperature/humidity for the cell containing (lat, lon).
+    Farms in the same cell share one cached upstream call. `limit` is only
+    held for that upstream call, not for cache hits or coalesced waits.
     """
-    seed_string = f"{crop_name}{round(lat, 2)}{round(lon, 2)}"
-    hash_val = int(hashlib.md5(seed_string.encode()).hexdigest(), 16)
-    return (hash_val % 150) / 10.0  # Returns a float between 0.0 and 15.0
+    cell = (
+        round(lat, settings.WEATHER_CACHE_PRECISION),
+        round(lon, settings.WEATHER_CACHE_PRECISION),
+    )
 
-def calculate_suitability(crop_name, t, h, lat, lon):
-    min_t, max_t, ideal_h = CROP_DATA[crop_name]
-    
-    # 1. Base Weather Score (70% of total)
-    if min_t <= t <= max_t:
-        t_score = 40
-    else:
-        dist = min(abs(t - min_t), abs(t - max_t))
-        t_score = max(0, 40 - (dist * 6))
-        
-    h_dist = abs(h - ideal_h)
-    h_score = max(0, 30 - (h_dist * 1.2))
-    
-    # 2. Add Location-Specific Variation (30% of total)
-    # This ensures that even in similar weather, different 
-    # spots on the map favor crops differently.
-    variation = get_location_specific_variation(crop_name, lat, lon)
-    
-    # Final combined score (capped at 97% for realism)
-    final_score = int(t_score + h_score + variation + 12) 
-    return min(final_score, 97)
+    async def load() -> dict:
+        url = f"{settings.OPEN_METEO_BASE_URL}/v1/forecast?latitude={cell[0]}&longitude={cell[1]}&current=temperature_2m,relative_humidity_2m"
+        async with limit or nullcontext():
+            r = await client.get(url)
+        r.raise_for_status()
+        return r.json().get("current", {})
+
+    return await weather_cache.get_or_load(cell, load)
+
+def parse_coordinates(coordinates: str) -> Tuple[float, float]:
+    """Parses 'latitude,longitude' (no spaces); raises ValueError when invalid."""
+    if ' ' in coordinates:
+        raise ValueError("Spaces are not allowed")
+
+    parts = coordinates.split(',')
+    if len(parts) != 2:
+        raise ValueError
+
+    latitude = float(parts[0])
+    longitude = float(parts[1])
+
+    if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
+        raise ValueError("Coordinates out of range")
+
+    return latitude, longitude
 
 @router.post("/", response_model=List[Dict[str, Union[str, int]]])
-async def get_demo_prediction(loc: Location):
+async def get_demo_prediction(loc: Location, client: "httpx.AsyncClient" = Depends(get_http_client)):
     try:
-        if ' ' in loc.coordinates:
-             raise ValueError("Spaces are not allowed")
-        
-        parts = loc.coordinates.split(',')
-        if len(parts) != 2:
-            raise ValueError
-        
-        latitude = float(parts[0])
-        longitude = float(parts[1])
-        
-        if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
-             raise ValueError("Coordinates out of range")
-             
+        latitude, longitude = parse_coordinates(loc.coordinates)
     except Exception as e:
         raise HTTPException(
             status_code=422, 
             detail=f"Invalid format. Please use 'latitude,longitude' without spaces (e.g. 21.38,47.00). {str(e)}"
         )
 
-    url = f"https://api.open-meteo.com/v1/forecast?latitude={latitude}&longitude={longitude}&current=temperature_2m,relative_humidity_2m"
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            r = await client.get(url)
-            weather = r.json().get("current", {})
-        except:
-            raise HTTPException(status_code=500, detail="Weather Service Unavailable")
+    try:
+        weather = await fetch_weather(client, latitude, longitude)
+    except:
+        raise HTTPException(status_code=500, detail="Weather Service Unavailable")
     
     t = weather.get("temperature_2m", 25)
     h = weather.get("relative_humidity_2m", 50)
     
-    results = []
-    for name in CROP_DATA:
-        score = calculate_suitability(name, t, h, latitude, longitude)
-        results.append({"crop": name, "percentage": score})
-    
-    # Sort and return top 3
-    results.sort(key=lambda x: x["percentage"], reverse=True)
-    return results[:3]
\ No newline at end of file
+    # Score every crop and return top 3
+    return get_scoring_engine().top_k([t], [h], [(latitude, longitude)], k=3)[0]
+
+
+MAX_BATCH_LOCATIONS = 1000
+# upstream weather calls in flight at once for one batch (cache hits don't count)
+BATCH_WEATHER_CONCURRENCY = 10
+
+class BatchLocations(BaseModel):
+    coordinates: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_LOCATIONS)
+    top_k: int = Field(3, ge=1, le=len(CROP_DATA))
+
+class BatchPrediction(BaseModel):
+    coordinates: str
+    predictions: List[Dict[str, Union[str, int]]] = []
+    error: Optional[str] = None
+
+@router.post("/batch", response_model=List[BatchPrediction])
+async def get_demo_prediction_batch(payload: BatchLocations, client: "httpx.AsyncClient" = Depends(get_http_client)):
+    """
+    Top-k crops for many 'latitude,longitude' strings at once
+    (e.g. every farm of a farmer or a district grid).
+    Weather is fetched per ~1 km cell, then all locations are scored in one pass.
+    Invalid or unreachable locations get an `error` instead of predictions.
+    """
+    results = [BatchPrediction(coordinates=c) for c in payload.coordinates]
+    semaphore = asyncio.Semaphore(BATCH_WEATHER_CONCURRENCY)
+
+    async def load(coordinates: str):
+        latitude, longitude = parse_coordinates(coordinates)
+        weather = await fetch_weather(client, latitude, longitude, limit=semaphore)
+        return latitude, longitude, weather
+
+    loaded = await asyncio.gather(*(load(c) for c in payload.coordinates), return_exceptions=True)
+
+    rows, temps, humidities, coords = [], [], [], []
+    for i, item in enumerate(loaded):
+        if isinstance(item, ValueError):
+            results[i].error = "Invalid format. Please use 'latitude,longitude' without spaces"
+        elif isinstance(item, Exception):
+            results[i].error = "Weather Service Unavailable"
+        else:
+            latitude, longitude, weather = item
+            rows.append(i)
+            temps.append(weather.get("temperature_2m", 25))
+            humidities.append(weather.get("relative_humidity_2m", 50))
+            coords.append((latitude, longitude))
+
+    if rows:
+        for i, predictions in zip(rows, get_scoring_engine().top_k(temps, humidities, coords, k=payload.top_k)):
+            results[i].predictions = predictions
+
+    return results
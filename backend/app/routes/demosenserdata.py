@@ -1,50 +1,75 @@
-import random
-import time
-from fastapi import APIRouter, Query
-from typing import Dict
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import Dict, List
+
+from app.db.connection import get_db
+from app.db.sensors import DEMO_SOURCE, READINGS_COLLECTION, get_sensor_owners
+from app.sensorstate import sensor_state_store
 
 router = APIRouter(
     prefix="/demosenserdata",
     tags=["Demo"]
 )
 
-# Global states to persist data between API calls for each sensor
-# Format: { "sensor_id": { "soil_moisture": int, "water_tank_level": int, "last_soil_update": float, "last_tank_update": float } }
-sensor_states: Dict[str, Dict] = {}
+MAX_BATCH_SENSORS = 200
 
-def get_gradual_change(current_val, min_val=0, max_val=100, max_step=5):
-    """Calculates a small random change to ensure no drastic jumps."""
-    change = random.randint(-max_step, max_step)
-    new_val = current_val + change
-    # Keep value within bounds
-    return max(min_val, min(max_val, new_val))
 
-@router.get("/", response_model=Dict[str, int])
-def get_demo_sensor_data(sensor_id: str = Query(..., description="The unique ID of the sensor")):
-    current_time = time.time()
-    
-    # Initialize state for this sensor if it doesn't exist
-    if sensor_id not in sensor_states:
-        sensor_states[sensor_id] = {
-            "soil_moisture": random.randint(30, 70),
-            "water_tank_level": random.randint(50, 90),
-            "last_soil_update": 0,
-            "last_tank_update": 0
+async def read_demo_sensors(db: AsyncIOMotorDatabase, sensor_ids: List[str]) -> Dict[str, Dict[str, int]]:
+    """
+    Advances the simulated sensors and returns their current values.
+    Soil moisture moves every 30 minutes and the tank level every 60 minutes
+    (see app.sensorstate). For sensors registered on a farm, each new value
+    is also recorded as a reading.
+    """
+    states = await sensor_state_store.advance(db, sensor_ids)
+
+    # Record each new value so demo sensors get history like real ones,
+    # tagged so nothing mistakes it for a field reading. Only sensors on a
+    # farm get one: any id can be asked for, and history is kept for good.
+    changed = [sensor_id for sensor_id, state in states.items() if state["updated"]]
+    registered = await get_sensor_owners(db, changed)
+    now = datetime.now(timezone.utc)
+    readings = [
+        {
+            "timestamp": now,
+            "meta": {"sensor_id": sensor_id, "source": DEMO_SOURCE},
+            "soil_moisture": state["soil_moisture"],
+            "water_tank_level": state["water_tank_level"],
         }
-    
-    sensor_data = sensor_states[sensor_id]
+        for sensor_id, state in states.items()
+        if sensor_id in registered and state["updated"]
+    ]
+    if readings:
+        await db[READINGS_COLLECTION].insert_many(readings, ordered=False)
 
-    # Update Soil Moisture every 30 minutes (1800 seconds)
-    if current_time - sensor_data["last_soil_update"] >= 1800:
-        sensor_data["soil_moisture"] = get_gradual_change(sensor_data["soil_moisture"])
-        sensor_data["last_soil_update"] = current_time
+    return {
+        sensor_id: {
+            "soil_moisture": state["soil_moisture"],
+            "water_tank_level": state["water_tank_level"]
+        }
+        for sensor_id, state in states.items()
+    }
 
-    # Update Water Tank Level every 60 minutes (3600 seconds)
-    if current_time - sensor_data["last_tank_update"] >= 3600:
-        sensor_data["water_tank_level"] = get_gradual_change(sensor_data["water_tank_level"])
-        sensor_data["last_tank_update"] = current_time
 
-    return {
-        "soil_moisture": sensor_data["soil_moisture"],
-        "water_tank_level": sensor_data["water_tank_level"]
-    }
\ No newline at end of file
+@router.get("/", response_model=Dict[str, int])
+async def get_demo_sensor_data(
+    sensor_id: str = Query(..., description="The unique ID of the sensor"),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    sensors = await read_demo_sensors(db, [sensor_id])
+    return sensors[sensor_id]
+
+
+@router.get("/batch", response_model=Dict[str, Dict[str, int]])
+async def get_demo_sensor_data_batch(
+    sensor_ids: List[str] = Query(..., description="Repeat for each sensor: ?sensor_ids=a&sensor_ids=b"),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    """Readings for many sensors in one call, keyed by sensor_id."""
+    if len(sensor_ids) > MAX_BATCH_SENSORS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_SENSORS} sensor_ids per request"
+        )
+    return await read_demo_sensors(db, sensor_ids)
@@ -1,24 +1,20 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel
-from twilio.rest import Client
-from app.config import get_settings
+from app.db.connection import get_db
+from app.twilio_client import dispatch_call
+from app.voicemessages import voice_messages
 
 router = APIRouter(
     prefix="/twilio-test",
     tags=["Twilio Testing"]
 )
 
-settings = get_settings()
-
 class CallTriggerRequest(BaseModel):
     request_code: str
 
-def get_twilio_client():
-    """Initializes Twilio client using your settings pattern."""
-    return Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-
 @router.post("/", status_code=status.HTTP_200_OK)
-async def trigger_test_call(payload: CallTriggerRequest):
+async def trigger_test_call(payload: CallTriggerRequest, db: AsyncIOMotorDatabase = Depends(get_db)):
     """
     Endpoint to test Twilio outbound calls.
     If request_code is "1", calls +918511274216.
@@ -31,19 +27,18 @@ async def trigger_test_call(payload: CallTriggerRequest):
         }
 
     try:
-        client = get_twilio_client()
-        
-        # Trigger the outbound call
-        call = client.calls.create(
-            twiml='<Response><Say>Hey! this is from farmhelp your watertank is over flowing.</Say></Response>',
+        # Trigger the outbound call (runs on the Twilio thread pool)
+        call_sid = await dispatch_call(
+            db,
             to="+918511274216",
-            from_=settings.TWILIO_PHONE_NUMBER
+            twiml=voice_messages.render("English", [(None, "tank_full")]),
+            purpose="test",
         )
 
         return {
             "success": True,
             "message": "Call initiated successfully",
-            "call_sid": call.sid
+            "call_sid": call_sid
         }
 
     except Exception as e:
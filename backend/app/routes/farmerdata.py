@@ -1,6 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.db.connection import get_db
+from app.db.projection import build_farmer_projection, project_farmer
+from app.farmercache import farmer_cache
+from app.httpcache import conditional_response, document_etag
 from app.models.farmer_auth import FarmerLoginModel
 
 router = APIRouter(
@@ -8,20 +12,20 @@ router = APIRouter(
     tags=["Farmer"]
 )
 
-# Helper to fix ObjectId serialization
-def str_object_id(data: dict) -> dict:
-    if data and "_id" in data:
-        data["_id"] = str(data["_id"])
-    return data
-
 @router.post("/", response_model=dict)
 async def get_farmer_data_by_mobile(
     payload: FarmerLoginModel,
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma separated fields to return"),
+    view: Optional[str] = Query(None, description="Named view, e.g. 'summary'"),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """
     Fetch a farmer's record based on their mobile number.
-    Returns the first matching record.
+    Returns the first matching record, optionally trimmed by `fields` or `view`.
+    The number is the farmer's login, so it is sent in the body to keep it out
+    of URLs, logs and caches. Sends an ETag; being a POST, a request whose
+    If-None-Match still matches gets 412 rather than 304.
     """
     mobile_no = payload.mobile_no
     
@@ -31,8 +35,9 @@ async def get_farmer_data_by_mobile(
             detail="Mobile number is required"
         )
 
-    # Find one document where 'mobile_no' matches
-    farmer = await db["farmerdata"].find_one({"mobile_no": mobile_no})
+    # Find the document where 'mobile_no' matches (usually from the farmer cache)
+    projection = build_farmer_projection(fields, view)
+    farmer = await farmer_cache.get_by_mobile(db, mobile_no)
 
     if not farmer:
         raise HTTPException(
@@ -40,4 +45,4 @@ async def get_farmer_data_by_mobile(
             detail="No farmer found with this mobile number"
         )
 
-    return str_object_id(farmer)
+    return conditional_response(request, document_etag(farmer, projection), project_farmer(farmer, projection))
@@ -13,6 +13,7 @@ from app.routes import (
     actualtwiliocall,
     actualcropprediction,
     actualsenserdata,
+    sensorhistory,
     verifyadmin
 )
 
@@ -31,5 +32,6 @@ api_router.include_router(demotwiliocall.router)
 api_router.include_router(actualtwiliocall.router)
 api_router.include_router(actualcropprediction.router)
 api_router.include_router(actualsenserdata.router)
+api_router.include_router(sensorhistory.router)
 api_router.include_router(verifyadmin.router)
 
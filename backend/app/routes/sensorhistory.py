@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.db.connection import get_analytics_db
+from app.db.sensors import READINGS_COLLECTION
+from app.sensorrollups import DAILY_COLLECTION, HOURLY_COLLECTION, METRICS
+
+router = APIRouter(
+    prefix="/sensorhistory",
+    tags=["Sensor History"]
+)
+
+# Largest window served at each resolution when none is requested
+RAW_MAX_WINDOW = timedelta(days=2)
+HOURLY_MAX_WINDOW = timedelta(days=31)
+
+MAX_POINTS = 5000
+
+Resolution = Literal["raw", "hour", "day"]
+
+
+def pick_resolution(window: timedelta) -> Resolution:
+    if window <= RAW_MAX_WINDOW:
+        return "raw"
+    if window <= HOURLY_MAX_WINDOW:
+        return "hour"
+    return "day"
+
+
+def _rollup_point(doc: dict) -> dict:
+    point = {"timestamp": doc["timestamp"]}
+    for metric in METRICS:
+        n = doc.get(f"{metric}_n") or 0
+        point[metric] = {
+            "min": doc.get(f"{metric}_min"),
+            "max": doc.get(f"{metric}_max"),
+            "avg": round(doc[f"{metric}_sum"] / n, 2) if n else None,
+        }
+    return point
+
+
+async def _fetch_points(
+    db: AsyncIOMotorDatabase, sensor_id: str, resolution: Resolution, start: datetime, end: datetime
+) -> List[dict]:
+    """Oldest first, up to MAX_POINTS + 1 so the caller can tell the window was cut short."""
+    if resolution == "raw":
+        cursor = db[READINGS_COLLECTION].find(
+            {"meta.sensor_id": sensor_id, "timestamp": {"$gte": start, "$lt": end}},
+            {"_id": 0, "timestamp": 1, **{metric: 1 for metric in METRICS}},
+        ).sort("timestamp", 1).limit(MAX_POINTS + 1)
+        return await cursor.to_list(length=MAX_POINTS + 1)
+
+    collection = HOURLY_COLLECTION if resolution == "hour" else DAILY_COLLECTION
+    cursor = db[collection].find(
+        {"sensor_id": sensor_id, "timestamp": {"$gte": start, "$lt": end}},
+    ).sort("timestamp", 1).limit(MAX_POINTS + 1)
+    return [_rollup_point(doc) async for doc in cursor]
+
+
+@router.get("/")
+async def get_sensor_history(
+    sensor_id: str = Query(..., description="The unique ID of the sensor"),
+    start: Optional[datetime] = Query(None, description="Window start (default: 7 days before end)"),
+    end: Optional[datetime] = Query(None, description="Window end (default: now)"),
+    resolution: Optional[Resolution] = Query(None, description="Force raw, hour or day points"),
+    db: AsyncIOMotorDatabase = Depends(get_analytics_db),
+):
+    """
+    Soil moisture and water tank history for one sensor.
+    Windows up to 2 days return raw readings, up to 31 days hourly
+    min/max/avg, and anything longer daily min/max/avg. A picked raw
+    window with more than MAX_POINTS readings is served hourly instead.
+    Otherwise at most MAX_POINTS points are returned, oldest first, with
+    `truncated` set and `next_start` to request the rest from.
+    """
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(days=7)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+
+    requested = resolution
+    resolution = resolution or pick_resolution(end - start)
+    points = await _fetch_points(db, sensor_id, resolution, start, end)
+    if len(points) > MAX_POINTS and resolution == "raw" and requested is None:
+        # a fast-reporting sensor: hourly points still cover the whole window
+        resolution = "hour"
+        points = await _fetch_points(db, sensor_id, resolution, start, end)
+
+    truncated = len(points) > MAX_POINTS
+    return {
+        "sensor_id": sensor_id,
+        "resolution": resolution,
+        "start": start,
+        "end": end,
+        "points": points[:MAX_POINTS],
+        "truncated": truncated,
+        "next_start": points[MAX_POINTS]["timestamp"] if truncated else None,
+    }
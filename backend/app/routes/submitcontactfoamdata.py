@@ -1,11 +1,11 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, status, HTTPException
 from motor.motor_asyncio import AsyncIOMotorDatabase
-import httpx
 
 from app.db.connection import get_db
 from app.models.contact import ContactFormModel
 from app.config import get_settings
+from app.notifications import enqueue_notification, escape_markdown
 
 router = APIRouter(
     prefix="/submitcontactfoamdata",
@@ -14,55 +14,38 @@ router = APIRouter(
 
 settings = get_settings()
 
-async def send_telegram_notification(data: ContactFormModel):
-    token = settings.TELEGRAM_BOT_TOKEN
-    chat_id = settings.TELEGRAM_CHAT_ID
-
-    if not token or not chat_id:
-        print("Telegram credentials not found. Skipping notification.")
-        return
-
+def format_telegram_message(data: ContactFormModel) -> str:
+    """
+    Builds the Telegram alert text for a submission.
+    """
     message = (
     f"🔴 CONTACT ALERT\n"
-    f"*Name*   : {data.name}\n"
-    f"*Mobile* : {data.mobile_no}\n"
-    f"*Issue*  : {data.problem}\n"
+    f"*Name*   : {escape_markdown(data.name)}\n"
+    f"*Mobile* : {escape_markdown(data.mobile_no)}\n"
+    f"*Issue*  : {escape_markdown(data.problem)}\n"
     f"*Time*   : {datetime.now().strftime('%d %b %Y, %I:%M %p')}"
 )
 
-
-
-
-
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    payload = {
-        "chat_id": chat_id,
-        "text": message,
-        "parse_mode": "Markdown"
-    }
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, json=payload)
-        response.raise_for_status()
-
+    return message
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def submit_contact_form(
     payload: ContactFormModel,
-    db: AsyncIOMotorDatabase = Depends(get_db)
+    db: AsyncIOMotorDatabase = Depends(get_db),
 ):
     """
     Submit contact form data.
-    Saves to MongoDB and sends a Telegram notification.
+    Saves to MongoDB and queues a Telegram notification.
     """
     contact_dict = payload.model_dump()
+    contact_dict["created_at"] = datetime.now(timezone.utc)
 
     # Save to MongoDB
     result = await db["contactfoamdata"].insert_one(contact_dict)
 
-    # Send Telegram Notification
-    await send_telegram_notification(payload)
+    # Queue the Telegram notification; delivery and retries happen in the background
+    await enqueue_notification(db, format_telegram_message(payload))
 
     return {
         "success": True,
@@ -1,4 +1,7 @@
-from fastapi import APIRouter, HTTPException, Body
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Body, Header
 from pydantic import BaseModel
 from app.config import get_settings
 
@@ -14,3 +17,11 @@ async def verify_admin(request: AdminLoginRequest):
         return {"status": "success", "message": "Authenticated"}
     else:
         raise HTTPException(status_code=401, detail="Invalid password")
+
+
+async def require_admin(x_admin_password: Optional[str] = Header(None)):
+    """Dependency for operational endpoints: the admin panel password in X-Admin-Password."""
+    if not x_admin_password or not secrets.compare_digest(
+        x_admin_password.encode(), settings.ADMIN_PANEL_PASSWORD.encode()
+    ):
+        raise HTTPException(status_code=401, detail="Invalid admin password")
@@ -0,0 +1,158 @@
+# /backend/app/sensorrollups.py
+"""
+Hourly and daily rollups of the `sensorreadings` time-series collection.
+
+A background job (started from `main.lifespan`) re-aggregates the buckets
+touched since its last run into `sensorreadings_hourly`, then folds those
+into `sensorreadings_daily`. A lease in `jobleases` keeps the run to one
+worker per interval. Each rollup document keeps min / max / sum /
+count per metric so daily averages stay exact:
+
+    {"_id": {"sensor_id": "S1", "bucket": <hour>}, "sensor_id": "S1",
+     "timestamp": <hour>, "soil_moisture_min": 41.0, "soil_moisture_max": 47.5,
+     "soil_moisture_sum": 530.2, "soil_moisture_n": 12, ...}
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.config import get_settings
+from app.db.leases import claim_lease
+from app.db.sensors import EXCLUDE_DEMO, READINGS_COLLECTION
+
+settings = get_settings()
+
+HOURLY_COLLECTION = "sensorreadings_hourly"
+DAILY_COLLECTION = "sensorreadings_daily"
+STATE_COLLECTION = "sensorrollupstate"
+
+METRICS = ("soil_moisture", "water_tank_level")
+
+# readings may arrive late (ThingSpeak backlog), so each run re-opens this much
+# history; ingestion reports anything older through `mark_late_readings`
+LATE_DATA = timedelta(hours=1)
+
+
+def _truncate(ts: datetime, unit: str) -> datetime:
+    ts = ts.replace(minute=0, second=0, microsecond=0)
+    if unit == "day":
+        ts = ts.replace(hour=0)
+    return ts
+
+
+def _rollup_pipeline(since: datetime, unit: str, source_is_raw: bool, into: str) -> List[dict]:
+    group = {
+        "_id": {
+            "sensor_id": "$meta.sensor_id" if source_is_raw else "$sensor_id",
+            "bucket": {"$dateTrunc": {"date": "$timestamp", "unit": unit}},
+        },
+    }
+    for metric in METRICS:
+        if source_is_raw:
+            group[f"{metric}_min"] = {"$min": f"${metric}"}
+            group[f"{metric}_max"] = {"$max": f"${metric}"}
+            group[f"{metric}_sum"] = {"$sum": f"${metric}"}
+            group[f"{metric}_n"] = {"$sum": {"$cond": [{"$isNumber": f"${metric}"}, 1, 0]}}
+        else:
+            group[f"{metric}_min"] = {"$min": f"${metric}_min"}
+            group[f"{metric}_max"] = {"$max": f"${metric}_max"}
+            group[f"{metric}_sum"] = {"$sum": f"${metric}_sum"}
+            group[f"{metric}_n"] = {"$sum": f"${metric}_n"}
+
+    match = {"timestamp": {"$gte": since}}
+    if source_is_raw:
+        match.update(EXCLUDE_DEMO)
+
+    return [
+        {"$match": match},
+        {"$group": group},
+        {"$set": {"sensor_id": "$_id.sensor_id", "timestamp": "$_id.bucket"}},
+        {"$merge": {"into": into, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+
+async def mark_late_readings(db: AsyncIOMotorDatabase, oldest: datetime) -> None:
+    """
+    Called after storing readings whose oldest timestamp is `oldest`. The
+    next run re-opens at least LATE_DATA before its last watermark, which
+    covers anything stored within LATE_DATA of being taken; older backlog
+    is recorded here so the next run reaches back to it.
+    """
+    if oldest >= datetime.now(timezone.utc) - LATE_DATA:
+        return
+    await db[STATE_COLLECTION].update_one(
+        {"_id": "hourly"},
+        {"$min": {"late_since": oldest}, "$inc": {"late_version": 1}},
+        upsert=True,
+    )
+
+
+async def run_rollups(db: AsyncIOMotorDatabase, now: Optional[datetime] = None) -> None:
+    """Rebuilds every hourly and daily bucket that may have changed since the last run."""
+    now = now or datetime.now(timezone.utc)
+
+    state = await db[STATE_COLLECTION].find_one({"_id": "hourly"}) or {}
+    hourly_from = state.get("until")
+    if hourly_from:
+        reopen = hourly_from - LATE_DATA
+        if state.get("late_since"):
+            reopen = min(reopen, state["late_since"])
+        hourly_since = _truncate(reopen, "hour")
+    else:
+        hourly_since = datetime.min
+    await db[READINGS_COLLECTION].aggregate(
+        _rollup_pipeline(hourly_since, "hour", True, HOURLY_COLLECTION)
+    ).to_list(length=None)
+
+    # the whole day containing the oldest re-opened hour must be refolded
+    daily_since = _truncate(hourly_since, "day") if hourly_from else datetime.min
+    await db[HOURLY_COLLECTION].aggregate(
+        _rollup_pipeline(daily_since, "day", False, DAILY_COLLECTION)
+    ).to_list(length=None)
+
+    await db[STATE_COLLECTION].update_one({"_id": "hourly"}, {"$set": {"until": now}}, upsert=True)
+    if "late_since" in state:
+        # only if no late readings were reported while this run was going
+        await db[STATE_COLLECTION].update_one(
+            {"_id": "hourly", "late_version": state["late_version"]},
+            {"$unset": {"late_since": ""}},
+        )
+
+
+async def claim_rollup_run(db: AsyncIOMotorDatabase, now: datetime) -> bool:
+    """Only one worker process rolls up per interval; the others would redo the same $merge."""
+    lease = timedelta(seconds=settings.SENSOR_ROLLUP_INTERVAL_SECONDS * 0.9)
+    return await claim_lease(db, "sensor_rollups", now, lease)
+
+
+class SensorRollupJob:
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self, db: AsyncIOMotorDatabase) -> None:
+        self.task = asyncio.create_task(self._run(db))
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+
+    async def _run(self, db: AsyncIOMotorDatabase) -> None:
+        while True:
+            try:
+                if await claim_rollup_run(db, datetime.now(timezone.utc)):
+                    await run_rollups(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Sensor rollup failed: {e}")
+            await asyncio.sleep(settings.SENSOR_ROLLUP_INTERVAL_SECONDS)
+
+
+rollup_job = SensorRollupJob()
@@ -0,0 +1,146 @@
+# /backend/app/sensorstate.py
+"""
+State of the simulated (demo) sensors.
+
+Each sensor drifts gradually: soil moisture changes every 30 minutes and the
+water tank level every 60 minutes. Two interchangeable stores keep that
+state, picked with DEMO_SENSOR_STATE_BACKEND:
+
+- "memory": a bounded LRU with TTL eviction. Fine for one process, but every
+  worker (or Lambda container) simulates its own values.
+- "mongo": one shared document per sensor in `demosensorstate`, advanced
+  with a single atomic update, so all workers agree on the readings. A TTL
+  index on `last_seen` (app/db/indexes.py) drops sensors nobody has asked
+  about for DEMO_SENSOR_STATE_TTL_SECONDS.
+
+Both return {sensor_id: {"soil_moisture", "water_tank_level", "updated"}},
+where "updated" says whether this call moved either value.
+"""
+import random
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from app.cache import TTLCache
+from app.config import get_settings
+
+settings = get_settings()
+
+STATE_COLLECTION = "demosensorstate"
+
+SOIL_UPDATE_SECONDS = 1800
+TANK_UPDATE_SECONDS = 3600
+MAX_STEP = 5
+
+
+def get_gradual_change(current_val, min_val=0, max_val=100, max_step=MAX_STEP):
+    """Calculates a small random change to ensure no drastic jumps."""
+    change = random.randint(-max_step, max_step)
+    new_val = current_val + change
+    # Keep value within bounds
+    return max(min_val, min(max_val, new_val))
+
+
+def _initial_state() -> dict:
+    return {
+        "soil_moisture": random.randint(30, 70),
+        "water_tank_level": random.randint(50, 90),
+        "last_soil_update": 0,
+        "last_tank_update": 0,
+    }
+
+
+class MemorySensorStateStore:
+    def __init__(self):
+        self.states = TTLCache(
+            "demo_sensor_state",
+            max_entries=settings.DEMO_SENSOR_MAX_ENTRIES,
+            ttl_seconds=settings.DEMO_SENSOR_STATE_TTL_SECONDS,
+        )
+
+    async def advance(self, db: AsyncIOMotorDatabase, sensor_ids: List[str]) -> Dict[str, dict]:
+        now = time.time()
+        results = {}
+        for sensor_id in dict.fromkeys(sensor_ids):
+            state = self.states.get(sensor_id) or _initial_state()
+            updated = False
+
+            if now - state["last_soil_update"] >= SOIL_UPDATE_SECONDS:
+                state["soil_moisture"] = get_gradual_change(state["soil_moisture"])
+                state["last_soil_update"] = now
+                updated = True
+
+            if now - state["last_tank_update"] >= TANK_UPDATE_SECONDS:
+                state["water_tank_level"] = get_gradual_change(state["water_tank_level"])
+                state["last_tank_update"] = now
+                updated = True
+
+            # re-setting refreshes the TTL, so only idle sensors expire
+            self.states.set(sensor_id, state)
+            results[sensor_id] = {
+                "soil_moisture": state["soil_moisture"],
+                "water_tank_level": state["water_tank_level"],
+                "updated": updated,
+            }
+        return results
+
+
+def _drift(field: str, last_field: str, period: float, now: float, initial: int) -> dict:
+    """
+    Aggregation expression for one value: when its period has elapsed, add a
+    random step (drawn here) and clamp to 0..100; otherwise keep it.
+    """
+    step = random.randint(-MAX_STEP, MAX_STEP)
+    current = {"$ifNull": [f"${field}", initial]}
+    return {
+        "$cond": [
+            {"$gte": [{"$subtract": [now, {"$ifNull": [f"${last_field}", 0]}]}, period]},
+            {"$max": [0, {"$min": [100, {"$add": [current, step]}]}]},
+            current,
+        ]
+    }
+
+
+def _advance_pipeline(now: float, seen_at: datetime) -> List[dict]:
+    initial = _initial_state()
+    soil_due = {"$gte": [{"$subtract": [now, {"$ifNull": ["$last_soil_update", 0]}]}, SOIL_UPDATE_SECONDS]}
+    tank_due = {"$gte": [{"$subtract": [now, {"$ifNull": ["$last_tank_update", 0]}]}, TANK_UPDATE_SECONDS]}
+    # every expression in one $set sees the document as it was before the update
+    return [{"$set": {
+        "soil_moisture": _drift("soil_moisture", "last_soil_update", SOIL_UPDATE_SECONDS, now, initial["soil_moisture"]),
+        "water_tank_level": _drift("water_tank_level", "last_tank_update", TANK_UPDATE_SECONDS, now, initial["water_tank_level"]),
+        "last_soil_update": {"$cond": [soil_due, now, "$last_soil_update"]},
+        "last_tank_update": {"$cond": [tank_due, now, "$last_tank_update"]},
+        # read by the TTL index
+        "last_seen": {"$literal": seen_at},
+    }}]
+
+
+class MongoSensorStateStore:
+    async def advance(self, db: AsyncIOMotorDatabase, sensor_ids: List[str]) -> Dict[str, dict]:
+        ids = list(dict.fromkeys(sensor_ids))
+        if not ids:
+            return {}
+        now = time.time()
+        seen_at = datetime.now(timezone.utc)
+
+        # one round trip to advance every sensor, one to read them back
+        await db[STATE_COLLECTION].bulk_write(
+            [UpdateOne({"_id": sensor_id}, _advance_pipeline(now, seen_at), upsert=True) for sensor_id in ids],
+            ordered=False,
+        )
+        cursor = db[STATE_COLLECTION].find({"_id": {"$in": ids}})
+        return {
+            doc["_id"]: {
+                "soil_moisture": doc["soil_moisture"],
+                "water_tank_level": doc["water_tank_level"],
+                "updated": now in (doc.get("last_soil_update"), doc.get("last_tank_update")),
+            }
+            async for doc in cursor
+        }
+
+
+sensor_state_store = MemorySensorStateStore() if settings.DEMO_SENSOR_STATE_BACKEND == "memory" else MongoSensorStateStore()
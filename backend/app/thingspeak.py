@@ -0,0 +1,241 @@
+# /backend/app/thingspeak.py
+"""
+ThingSpeak ingestion for real field sensors.
+
+Each sensor is linked to a ThingSpeak channel in the `sensorchannels`
+collection:
+
+    {"_id": "<sensor_id>", "channel_id": 123456, "read_api_key": "...",
+     "soil_field": "field1", "tank_field": "field2",
+     "last_entry_id": 0, "last_created_at": None, "locked_until": <datetime>}
+
+The poller, started from `main.lifespan`, fetches every channel concurrently
+through the shared HTTP client (rate limited), only asks for entries newer
+than the last one seen, bulk-inserts them into the `sensorreadings`
+time-series collection and keeps the latest reading per sensor in memory.
+A worker leases a channel while polling it and only advances its cursor
+after the insert, so a failed insert is retried rather than skipped.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from app.cache import TTLCache
+from app.config import get_settings
+from app.db.sensors import EXCLUDE_DEMO, READINGS_COLLECTION, THINGSPEAK_SOURCE
+from app.sensorrollups import mark_late_readings
+
+if TYPE_CHECKING:
+    import httpx
+
+settings = get_settings()
+
+CHANNELS_COLLECTION = "sensorchannels"
+
+# ThingSpeak returns at most 8000 entries per request
+MAX_RESULTS = 8000
+# how long a worker holds a channel while polling it; frees it if the worker dies
+CHANNEL_LEASE = timedelta(minutes=2)
+
+
+class _NoReading(Exception):
+    """Raised by the `latest` loader so a sensor without readings isn't cached as such."""
+
+
+class RateLimiter:
+    """Spaces requests evenly so at most `rate` start per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def _parse_value(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def parse_feeds(channel: dict, feeds: List[dict]) -> List[dict]:
+    """Turns ThingSpeak feed entries newer than `last_entry_id` into reading documents."""
+    last_entry_id = channel.get("last_entry_id") or 0
+    soil_field = channel.get("soil_field", "field1")
+    tank_field = channel.get("tank_field", "field2")
+
+    readings = []
+    for entry in feeds:
+        entry_id = entry.get("entry_id")
+        if entry_id is None or entry_id <= last_entry_id:
+            continue
+        readings.append({
+            "timestamp": _parse_time(entry["created_at"]),
+            "meta": {"sensor_id": channel["_id"], "source": THINGSPEAK_SOURCE},
+            "entry_id": entry_id,
+            "soil_moisture": _parse_value(entry.get(soil_field)),
+            "water_tank_level": _parse_value(entry.get(tank_field)),
+        })
+    return readings
+
+
+class ThingSpeakPoller:
+    def __init__(self):
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self.client: Optional["httpx.AsyncClient"] = None
+        self.task: Optional[asyncio.Task] = None
+        self.limiter = RateLimiter(settings.THINGSPEAK_REQUESTS_PER_SECOND)
+        # sensor_id -> latest reading; expires after one poll interval so a
+        # reading stored by another worker is picked up from Mongo
+        self.latest = TTLCache(
+            "sensor_latest",
+            max_entries=50_000,
+            ttl_seconds=settings.THINGSPEAK_POLL_INTERVAL_SECONDS,
+        )
+
+    def bind(self, db: AsyncIOMotorDatabase, client: "httpx.AsyncClient") -> None:
+        """Sets the connections used by `poll_once`, without starting the loop (Lambda)."""
+        self.db = db
+        self.client = client
+
+    def start(self, db: AsyncIOMotorDatabase, client: "httpx.AsyncClient") -> None:
+        self.bind(db, client)
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"ThingSpeak poll failed: {e}")
+            await asyncio.sleep(settings.THINGSPEAK_POLL_INTERVAL_SECONDS)
+
+    async def poll_once(self) -> int:
+        """Fetches every registered channel once. Returns the number of new readings stored."""
+        import httpx
+
+        channels = await self.db[CHANNELS_COLLECTION].find().to_list(length=None)
+        semaphore = asyncio.Semaphore(settings.THINGSPEAK_MAX_CONCURRENCY)
+
+        async def poll(channel: dict) -> int:
+            async with semaphore:
+                try:
+                    return await self._poll_channel(channel)
+                except (httpx.HTTPError, ValueError, KeyError) as e:
+                    print(f"ThingSpeak channel {channel.get('channel_id')} failed: {e}")
+                    return 0
+
+        counts = await asyncio.gather(*(poll(channel) for channel in channels))
+        return sum(counts)
+
+    async def fetch_feeds(self, channel: dict) -> List[dict]:
+        params = {"results": MAX_RESULTS}
+        if channel.get("read_api_key"):
+            params["api_key"] = channel["read_api_key"]
+        if channel.get("last_created_at"):
+            # only ask for entries since the last one we stored
+            params["start"] = channel["last_created_at"].strftime("%Y-%m-%d %H:%M:%S")
+            params["timezone"] = "Etc/UTC"
+
+        await self.limiter.wait()
+        url = f"{settings.THINGSPEAK_BASE_URL}/channels/{channel['channel_id']}/feeds.json"
+        response = await self.client.get(url, params=params)
+        response.raise_for_status()
+        return response.json().get("feeds") or []
+
+    async def _poll_channel(self, channel: dict) -> int:
+        now = datetime.now(timezone.utc)
+        # One worker per channel at a time. The claim returns the current
+        # cursor, which may have moved since `poll_once` listed the channels.
+        channel = await self.db[CHANNELS_COLLECTION].find_one_and_update(
+            {"_id": channel["_id"], "locked_until": {"$not": {"$gt": now}}},
+            {"$set": {"locked_until": now + CHANNEL_LEASE}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if channel is None:
+            return 0
+
+        cursor = {}
+        stored = 0
+        try:
+            readings = parse_feeds(channel, await self.fetch_feeds(channel))
+            if readings:
+                stored = await self._store(channel["_id"], readings)
+                newest = max(readings, key=lambda r: r["entry_id"])
+                cursor = {"last_entry_id": newest["entry_id"], "last_created_at": newest["timestamp"]}
+                self.latest.set(channel["_id"], newest)
+        finally:
+            # The cursor only moves once the readings are stored: if the
+            # insert fails, the next poll fetches the same entries again.
+            update = {"$unset": {"locked_until": ""}}
+            if cursor:
+                update["$set"] = cursor
+            await self.db[CHANNELS_COLLECTION].update_one({"_id": channel["_id"]}, update)
+        return stored
+
+    async def _store(self, sensor_id: str, readings: List[dict]) -> int:
+        """
+        Inserts readings, skipping entry_ids already stored by an earlier
+        attempt that failed part way. Time-series collections can't have
+        unique indexes, so this lookup is the duplicate guard.
+        """
+        stored = set(await self.db[READINGS_COLLECTION].distinct("entry_id", {
+            "meta.sensor_id": sensor_id,
+            "timestamp": {"$gte": min(r["timestamp"] for r in readings)},
+            "entry_id": {"$in": [r["entry_id"] for r in readings]},
+        }))
+        new = [r for r in readings if r["entry_id"] not in stored]
+        if new:
+            await self.db[READINGS_COLLECTION].insert_many(new, ordered=False)
+            # a backlog older than the rollups' re-open window must still be rolled up
+            await mark_late_readings(self.db, min(r["timestamp"] for r in new))
+        return len(new)
+
+    async def get_latest(self, db: AsyncIOMotorDatabase, sensor_id: str) -> Optional[dict]:
+        """
+        Latest reading from memory, falling back to the newest stored one.
+        Takes the request's `db`, since `self.db` is only bound while polling
+        is enabled.
+        """
+        async def load() -> dict:
+            reading = await db[READINGS_COLLECTION].find_one(
+                {"meta.sensor_id": sensor_id, **EXCLUDE_DEMO}, sort=[("timestamp", -1)]
+            )
+            if reading is None:
+                raise _NoReading()
+            return reading
+
+        try:
+            return await self.latest.get_or_load(sensor_id, load)
+        except _NoReading:
+            return None
+
+
+poller = ThingSpeakPoller()
@@ -0,0 +1,162 @@
+# /backend/app/twilio_client.py
+"""
+Shared Twilio client and async call dispatch.
+
+The Twilio SDK is synchronous, so every REST call runs on a dedicated thread
+pool (never the event loop, never Starlette's default executor) through one
+process-wide `Client` whose requests session keeps connections to
+api.twilio.com alive.
+
+Every call attempt is recorded in `twiliocalls`:
+
+    {"_id": ObjectId, "to": "+91...", "purpose": "alert", "call_sid": "CA...",
+     "status": "queued", "created_at": ..., "updated_at": ...,
+     "events": [{"status": "ringing", "at": ...}, ...]}
+
+When TWILIO_STATUS_CALLBACK_URL is set, Twilio posts progress to it and
+`record_call_status` appends each status to the attempt.
+"""
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.config import get_settings
+from app.metrics import track_outbound
+
+settings = get_settings()
+
+CALLS_COLLECTION = "twiliocalls"
+
+# statuses after which Twilio sends no further callbacks
+FINAL_STATUSES = {"completed", "busy", "failed", "no-answer", "canceled"}
+
+twilio_executor = ThreadPoolExecutor(
+    max_workers=settings.TWILIO_MAX_CONCURRENCY,
+    thread_name_prefix="twilio",
+)
+
+
+@lru_cache
+def get_twilio_client():
+    """
+    One Twilio client per process, with a connection pool sized to the executor.
+    The SDK is imported on first use to keep it out of the Lambda cold start.
+    """
+    from requests.adapters import HTTPAdapter
+    from twilio.http.http_client import TwilioHttpClient
+    from twilio.rest import Client
+
+    http_client = TwilioHttpClient(timeout=settings.TWILIO_TIMEOUT_SECONDS)
+    http_client.session.mount(
+        "https://",
+        HTTPAdapter(pool_connections=1, pool_maxsize=settings.TWILIO_MAX_CONCURRENCY, max_retries=1),
+    )
+    return Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN, http_client=http_client)
+
+
+class TwilioTransport:
+    """Creates calls through the shared client on the Twilio executor."""
+
+    async def create_call(self, to: str, twiml: str, status_callback: Optional[str]) -> str:
+        kwargs = {"twiml": twiml, "to": to, "from_": settings.TWILIO_PHONE_NUMBER}
+        if status_callback:
+            kwargs["status_callback"] = status_callback
+            kwargs["status_callback_event"] = ["initiated", "ringing", "answered", "completed"]
+
+        def create():
+            client = get_twilio_client()
+            with track_outbound("twilio"):
+                return client.calls.create(**kwargs).sid
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(twilio_executor, create)
+
+
+class FakeTwilioTransport:
+    """Records calls in memory instead of placing them, for running offline."""
+
+    def __init__(self):
+        self.calls: List[dict] = []
+
+    async def create_call(self, to: str, twiml: str, status_callback: Optional[str]) -> str:
+        sid = f"FAKE{len(self.calls) + 1:06d}"
+        self.calls.append({"sid": sid, "to": to, "twiml": twiml})
+        return sid
+
+
+def to_e164(number: Optional[str]) -> Optional[str]:
+    """
+    Twilio needs E.164 ("+919876543210"). Farmer numbers are stored as typed,
+    usually 10 digits without a country code, so that is added here.
+    Returns None when the number can't be made valid.
+    """
+    if not number:
+        return None
+    digits = re.sub(r"\D", "", number)
+    if number.strip().startswith("+"):
+        e164 = "+" + digits
+    elif digits.startswith("00"):
+        e164 = "+" + digits[2:]
+    else:
+        # a leading 0 is the domestic trunk prefix, not part of the number
+        national = digits[1:] if len(digits) == 11 and digits.startswith("0") else digits
+        if len(national) == 10:
+            e164 = "+" + settings.TWILIO_DEFAULT_COUNTRY_CODE + national
+        elif len(national) == 10 + len(settings.TWILIO_DEFAULT_COUNTRY_CODE) and national.startswith(settings.TWILIO_DEFAULT_COUNTRY_CODE):
+            e164 = "+" + national
+        else:
+            return None
+    # E.164 allows at most 15 digits
+    return e164 if 8 <= len(e164) - 1 <= 15 else None
+
+
+transport = FakeTwilioTransport() if settings.TWILIO_TRANSPORT == "fake" else TwilioTransport()
+
+
+async def dispatch_call(db: AsyncIOMotorDatabase, to: str, twiml: str, purpose: str) -> str:
+    """
+    Places one outbound call and records the attempt. Returns the call sid;
+    errors from Twilio are recorded and re-raised.
+    """
+    now = datetime.now(timezone.utc)
+    result = await db[CALLS_COLLECTION].insert_one({
+        "to": to,
+        "purpose": purpose,
+        "status": "initiating",
+        "created_at": now,
+        "updated_at": now,
+        "events": [],
+    })
+
+    try:
+        sid = await transport.create_call(to, twiml, settings.TWILIO_STATUS_CALLBACK_URL)
+    except Exception as e:
+        await db[CALLS_COLLECTION].update_one(
+            {"_id": result.inserted_id},
+            {"$set": {"status": "failed", "error": str(e), "updated_at": datetime.now(timezone.utc)}},
+        )
+        raise
+
+    await db[CALLS_COLLECTION].update_one(
+        {"_id": result.inserted_id},
+        {"$set": {"call_sid": sid, "status": "queued", "updated_at": datetime.now(timezone.utc)}},
+    )
+    return sid
+
+
+async def record_call_status(db: AsyncIOMotorDatabase, call_sid: str, status: str, duration: Optional[str] = None) -> bool:
+    """Applies one Twilio status callback. Returns False for unknown call sids."""
+    now = datetime.now(timezone.utc)
+    update = {"$set": {"status": status, "updated_at": now}, "$push": {"events": {"status": status, "at": now}}}
+    if duration is not None:
+        update["$set"]["duration"] = int(duration)
+    if status in FINAL_STATUSES:
+        update["$set"]["ended_at"] = now
+
+    result = await db[CALLS_COLLECTION].update_one({"call_sid": call_sid}, update)
+    return result.matched_count > 0
@@ -0,0 +1,52 @@
+# /backend/app/uploadlimit.py
+"""
+Rejects oversized multipart uploads before their body is read.
+
+Starlette spools every file of a multipart form to a temp file before the
+route runs, so a per-file size check in the route only fires after the
+whole upload was received. This middleware answers 413 from Content-Length
+instead, and 411 for multipart requests that don't send one (browsers
+always do for FormData). `check_upload_size` still caps each file.
+"""
+import json
+
+from starlette.datastructures import Headers
+
+
+class UploadLimitMiddleware:
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if not headers.get("content-type", "").startswith("multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        length = headers.get("content-length")
+        if length is None or not length.isdigit():
+            await _reject(send, 411, "Content-Length is required for uploads")
+            return
+        if int(length) > self.max_bytes:
+            await _reject(send, 413, f"Upload is larger than {self.max_bytes // (1024 * 1024)} MB")
+            return
+        await self.app(scope, receive, send)
+
+
+async def _reject(send, status: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"connection", b"close"),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -1,30 +1,199 @@
-import cloudinary
-import cloudinary.uploader
 import asyncio
+import hashlib
+import io
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import BinaryIO, Optional, Union
+
+from fastapi import HTTPException, UploadFile, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.cache import TTLCache
 from app.config import get_settings
+from app.metrics import track_outbound
 
 settings = get_settings()
 
-# Configure Cloudinary
-cloudinary.config(
-    cloud_name=settings.NEXT_PUBLIC_CLOUDINARY_CLOUD_NAME,
-    api_key=settings.CLOUDINARY_API_KEY,
-    api_secret=settings.CLOUDINARY_API_SECRET
+
+@lru_cache
+def get_cloudinary_uploader():
+    """
+    Imports and configures Cloudinary on the first upload rather than at
+    import time, keeping the SDK (and requests) out of the Lambda cold start.
+    """
+    import cloudinary
+    import cloudinary.uploader
+
+    cloudinary.config(
+        cloud_name=settings.NEXT_PUBLIC_CLOUDINARY_CLOUD_NAME,
+        api_key=settings.CLOUDINARY_API_KEY,
+        api_secret=settings.CLOUDINARY_API_SECRET,
+        upload_prefix=settings.CLOUDINARY_UPLOAD_PREFIX,
+    )
+    return cloudinary.uploader
+
+# Cloudinary uploads get their own threads so a burst of photos can't starve
+# the default executor that the rest of the app (and Starlette) relies on.
+upload_executor = ThreadPoolExecutor(
+    max_workers=settings.UPLOAD_MAX_CONCURRENCY,
+    thread_name_prefix="cloudinary-upload",
 )
+# Bounds how many photos are being processed/held at once across all requests
+upload_semaphore = asyncio.Semaphore(settings.UPLOAD_MAX_CONCURRENCY)
 
-async def upload_image_to_cloudinary(file_content, filename: str, folder: str = "farmhelp") -> str:
+CHUNK_SIZE = 1024 * 1024
+
+
+def _spooled_size(fileobj: BinaryIO) -> int:
+    """Walks a spooled upload in chunks, stopping once it is known to be too large."""
+    size = 0
+    fileobj.seek(0)
+    while chunk := fileobj.read(CHUNK_SIZE):
+        size += len(chunk)
+        if size > settings.UPLOAD_MAX_BYTES:
+            break
+    fileobj.seek(0)
+    return size
+
+
+async def check_upload_size(file: UploadFile) -> None:
     """
-    Uploads a file-like object to Cloudinary and returns the secure URL.
-    Wraps the synchronous Cloudinary call in run_in_executor to avoid blocking the event loop.
+    Rejects files over UPLOAD_MAX_BYTES without loading them into memory.
+    The whole request was already capped by `UploadLimitMiddleware`; this
+    only walks the spooled file, on the upload executor, when the size
+    wasn't recorded during parsing.
     """
-    try:
-        loop = asyncio.get_event_loop()
-        # cloudinary.uploader.upload is blocking, so run it in a thread
-        result = await loop.run_in_executor(
-            None, 
-            lambda: cloudinary.uploader.upload(file_content, folder=folder, resource_type="image")
+    size = file.size
+    if size is None:
+        loop = asyncio.get_running_loop()
+        size = await loop.run_in_executor(upload_executor, _spooled_size, file.file)
+
+    if size > settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"{file.filename} is larger than {settings.UPLOAD_MAX_BYTES // (1024 * 1024)} MB",
         )
+
+
+def prepare_image(source: Union[bytes, BinaryIO]) -> Union[bytes, BinaryIO]:
+    """
+    Downscales and re-encodes large photos before upload.
+    Images already within UPLOAD_MAX_DIMENSION are passed through untouched;
+    anything Pillow can't read is left for Cloudinary to handle.
+    """
+    from PIL import Image, ImageOps
+
+    stream = io.BytesIO(source) if isinstance(source, bytes) else source
+    try:
+        stream.seek(0)
+        with Image.open(stream) as img:
+            max_dim = settings.UPLOAD_MAX_DIMENSION
+            if max(img.size) <= max_dim:
+                stream.seek(0)
+                return source
+
+            # JPEG draft mode decodes at a reduced scale, so a 12 MP phone
+            # photo never gets fully expanded in memory
+            img.draft("RGB", (max_dim, max_dim))
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((max_dim, max_dim))
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+
+            out = io.BytesIO()
+            img.save(out, format="JPEG", quality=settings.UPLOAD_JPEG_QUALITY, optimize=True)
+            out.seek(0)
+            return out
+    except Exception as e:
+        print(f"Could not downscale image, uploading original: {e}")
+        stream.seek(0)
+        return source
+
+
+def _upload_sync(source: Union[bytes, BinaryIO], folder: str) -> dict:
+    image = prepare_image(source)
+    with track_outbound("cloudinary"):
+        return get_cloudinary_uploader().upload(image, folder=folder, resource_type="image")
+
+
+async def upload_image_to_cloudinary(file_content, filename: str, folder: str = "farmhelp") -> Optional[str]:
+    """
+    Uploads bytes or a file-like object to Cloudinary and returns the secure URL.
+    Runs the blocking Cloudinary call on the dedicated upload executor, with at
+    most UPLOAD_MAX_CONCURRENCY uploads in flight.
+    """
+    try:
+        async with upload_semaphore:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(upload_executor, _upload_sync, file_content, folder)
         return result.get("secure_url")
     except Exception as e:
         print(f"Error uploading to Cloudinary: {e}")
         return None
+
+
+async def upload_file_to_cloudinary(file: UploadFile, folder: str = "farmhelp") -> Optional[str]:
+    """
+    Uploads an UploadFile straight from its spooled temp file, without
+    reading it into memory first.
+    """
+    await file.seek(0)
+    return await upload_image_to_cloudinary(file.file, filename=file.filename, folder=folder)
+
+
+# Content-addressed photo store: folder + sha256 of the original bytes ->
+# Cloudinary URL, so the same photo uploaded to another folder gets its own
+# copy there. Mongo keeps the mapping across restarts; the LRU in front
+# answers repeats without a round trip.
+IMAGE_HASH_COLLECTION = "imagehashes"
+image_url_cache = TTLCache(
+    "image_urls",
+    max_entries=settings.IMAGE_HASH_CACHE_MAX_ENTRIES,
+    ttl_seconds=24 * 3600,
+)
+
+
+class ImageUploadError(Exception):
+    pass
+
+
+def _sha256_file(fileobj: BinaryIO) -> str:
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    while chunk := fileobj.read(CHUNK_SIZE):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+async def store_farm_photo(db: AsyncIOMotorDatabase, file: UploadFile, folder: str = "farmhelp") -> Optional[str]:
+    """
+    Returns the Cloudinary URL for this photo, uploading it only if the same
+    bytes haven't been uploaded before. Concurrent uploads of the same photo
+    share one Cloudinary call.
+    """
+    loop = asyncio.get_running_loop()
+    digest = await loop.run_in_executor(upload_executor, _sha256_file, file.file)
+    key = f"{folder}:{digest}"
+
+    async def load() -> str:
+        doc = await db[IMAGE_HASH_COLLECTION].find_one({"_id": key}, {"url": 1})
+        if doc:
+            return doc["url"]
+
+        url = await upload_file_to_cloudinary(file, folder=folder)
+        if not url:
+            raise ImageUploadError(file.filename)
+
+        await db[IMAGE_HASH_COLLECTION].update_one(
+            {"_id": key},
+            {"$setOnInsert": {"url": url, "folder": folder, "sha256": digest, "created_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+        return url
+
+    try:
+        return await image_url_cache.get_or_load(key, load)
+    except ImageUploadError:
+        return None
@@ -0,0 +1,208 @@
+# /backend/app/voicemessages.py
+"""
+Localized TwiML for alert calls.
+
+Every message is built from a few parts (intro, one line per alert, outro)
+in the farmer's `call_language`. The registry compiles each (part, language)
+pair into its final TwiML fragment once, when the module is imported, so
+rendering a call is a dictionary lookup plus filling in the farm number.
+
+Pre-recorded audio can replace the text-to-speech for any part. Point
+VOICE_AUDIO_MANIFEST at a JSON file such as
+
+    {"Hindi": {"intro": "hi/intro.mp3", "tank_full": "hi/tank_full.mp3"}}
+
+and the files are played from VOICE_AUDIO_BASE_URL with <Play> instead of
+being read out with <Say>.
+"""
+import json
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from app.config import get_settings
+
+settings = get_settings()
+
+DEFAULT_LANGUAGE = "English"
+
+# Twilio <Say> voices for the languages offered in the admin form
+LANGUAGE_CODES = {
+    "English": "en-IN",
+    "Hindi": "hi-IN",
+    "Bengali": "bn-IN",
+    "Marathi": "mr-IN",
+    "Telugu": "te-IN",
+    "Tamil": "ta-IN",
+    "Gujarati": "gu-IN",
+    "Kannada": "kn-IN",
+    "Malayalam": "ml-IN",
+    "Punjabi": "pa-IN",
+}
+
+MESSAGES: Dict[str, Dict[str, str]] = {
+    "English": {
+        "intro": "Hello, this is a call from FarmHelp.",
+        "farm": "Farm {farm}:",
+        "soil_dry": "the soil moisture is low.",
+        "tank_low": "the water tank is almost empty.",
+        "tank_full": "the water tank is overflowing.",
+        "outro": "Please check your farm.",
+    },
+    "Hindi": {
+        "intro": "नमस्ते, यह फार्महेल्प से कॉल है।",
+        "farm": "खेत {farm}:",
+        "soil_dry": "मिट्टी में नमी कम है।",
+        "tank_low": "पानी की टंकी लगभग खाली है।",
+        "tank_full": "पानी की टंकी भरकर बह रही है।",
+        "outro": "कृपया अपने खेत की जाँच करें।",
+    },
+    "Bengali": {
+        "intro": "নমস্কার, এটি ফার্মহেল্প থেকে একটি কল।",
+        "farm": "জমি {farm}:",
+        "soil_dry": "মাটির আর্দ্রতা কম।",
+        "tank_low": "জলের ট্যাঙ্ক প্রায় খালি।",
+        "tank_full": "জলের ট্যাঙ্ক উপচে পড়ছে।",
+        "outro": "অনুগ্রহ করে আপনার জমি পরীক্ষা করুন।",
+    },
+    "Marathi": {
+        "intro": "नमस्कार, हा फार्महेल्पचा कॉल आहे.",
+        "farm": "शेत {farm}:",
+        "soil_dry": "मातीतील ओलावा कमी आहे.",
+        "tank_low": "पाण्याची टाकी जवळजवळ रिकामी आहे.",
+        "tank_full": "पाण्याची टाकी भरून वाहत आहे.",
+        "outro": "कृपया आपले शेत तपासा.",
+    },
+    "Telugu": {
+        "intro": "నమస్కారం, ఇది ఫార్మ్‌హెల్ప్ నుండి కాల్.",
+        "farm": "పొలం {farm}:",
+        "soil_dry": "నేలలో తేమ తక్కువగా ఉంది.",
+        "tank_low": "నీటి ట్యాంక్ దాదాపు ఖాళీగా ఉంది.",
+        "tank_full": "నీటి ట్యాంక్ నిండి పొంగిపొర్లుతోంది.",
+        "outro": "దయచేసి మీ పొలాన్ని తనిఖీ చేయండి.",
+    },
+    "Tamil": {
+        "intro": "வணக்கம், இது ஃபார்ம்ஹெல்ப் அழைப்பு.",
+        "farm": "வயல் {farm}:",
+        "soil_dry": "மண்ணின் ஈரப்பதம் குறைவாக உள்ளது.",
+        "tank_low": "தண்ணீர் தொட்டி கிட்டத்தட்ட காலியாக உள்ளது.",
+        "tank_full": "தண்ணீர் தொட்டி நிரம்பி வழிகிறது.",
+        "outro": "தயவுசெய்து உங்கள் வயலைச் சரிபார்க்கவும்.",
+    },
+    "Gujarati": {
+        "intro": "નમસ્તે, આ ફાર્મહેલ્પ તરફથી કૉલ છે.",
+        "farm": "ખેતર {farm}:",
+        "soil_dry": "જમીનમાં ભેજ ઓછો છે.",
+        "tank_low": "પાણીની ટાંકી લગભગ ખાલી છે.",
+        "tank_full": "પાણીની ટાંકી ભરાઈને છલકાઈ રહી છે.",
+        "outro": "કૃપા કરીને તમારું ખેતર તપાસો.",
+    },
+    "Kannada": {
+        "intro": "ನಮಸ್ಕಾರ, ಇದು ಫಾರ್ಮ್‌ಹೆಲ್ಪ್‌ನಿಂದ ಕರೆ.",
+        "farm": "ಹೊಲ {farm}:",
+        "soil_dry": "ಮಣ್ಣಿನ ತೇವಾಂಶ ಕಡಿಮೆಯಾಗಿದೆ.",
+        "tank_low": "ನೀರಿನ ಟ್ಯಾಂಕ್ ಬಹುತೇಕ ಖಾಲಿಯಾಗಿದೆ.",
+        "tank_full": "ನೀರಿನ ಟ್ಯಾಂಕ್ ತುಂಬಿ ಹರಿಯುತ್ತಿದೆ.",
+        "outro": "ದಯವಿಟ್ಟು ನಿಮ್ಮ ಹೊಲವನ್ನು ಪರಿಶೀಲಿಸಿ.",
+    },
+    "Malayalam": {
+        "intro": "നമസ്കാരം, ഇത് ഫാംഹെൽപ്പിൽ നിന്നുള്ള കോളാണ്.",
+        "farm": "കൃഷിയിടം {farm}:",
+        "soil_dry": "മണ്ണിലെ ഈർപ്പം കുറവാണ്.",
+        "tank_low": "വെള്ളടാങ്ക് ഏകദേശം കാലിയാണ്.",
+        "tank_full": "വെള്ളടാങ്ക് നിറഞ്ഞു കവിയുന്നു.",
+        "outro": "ദയവായി നിങ്ങളുടെ കൃഷിയിടം പരിശോധിക്കുക.",
+    },
+    "Punjabi": {
+        "intro": "ਸਤ ਸ੍ਰੀ ਅਕਾਲ, ਇਹ ਫਾਰਮਹੈਲਪ ਵੱਲੋਂ ਕਾਲ ਹੈ।",
+        "farm": "ਖੇਤ {farm}:",
+        "soil_dry": "ਮਿੱਟੀ ਵਿੱਚ ਨਮੀ ਘੱਟ ਹੈ।",
+        "tank_low": "ਪਾਣੀ ਦੀ ਟੈਂਕੀ ਲਗਭਗ ਖਾਲੀ ਹੈ।",
+        "tank_full": "ਪਾਣੀ ਦੀ ਟੈਂਕੀ ਭਰ ਕੇ ਵਹਿ ਰਹੀ ਹੈ।",
+        "outro": "ਕਿਰਪਾ ਕਰਕੇ ਆਪਣਾ ਖੇਤ ਚੈੱਕ ਕਰੋ।",
+    },
+}
+
+ALERT_TYPES = ("soil_dry", "tank_low", "tank_full")
+
+
+def load_audio_manifest(path: Optional[str]) -> Dict[str, Dict[str, str]]:
+    if not path:
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not load voice audio manifest {path}: {e}")
+        return {}
+
+
+class VoiceMessageRegistry:
+    def __init__(self, messages: Dict[str, Dict[str, str]], audio: Dict[str, Dict[str, str]], audio_base_url: Optional[str]):
+        self.messages = messages
+        self.audio = audio
+        self.audio_base_url = audio_base_url
+        self.languages = set(messages) | set(audio)
+        # (part, language) -> finished TwiML fragment. Alert parts come in two
+        # variants: "<type>" keeps a {farm} placeholder, "<type>:nofarm" has none.
+        self.fragments: Dict[Tuple[str, str], str] = {}
+        for language in self.languages:
+            for part in ("intro", "outro"):
+                self.fragments[(part, language)] = self._compile(part, language, with_farm=False)
+            for alert_type in ALERT_TYPES:
+                self.fragments[(alert_type, language)] = self._compile(alert_type, language, with_farm=True)
+                self.fragments[(f"{alert_type}:nofarm", language)] = self._compile(alert_type, language, with_farm=False)
+
+    def _compile(self, part: str, language: str, with_farm: bool) -> str:
+        # languages without text or a Twilio voice are spoken in English
+        text_language = language if language in self.messages and language in LANGUAGE_CODES else DEFAULT_LANGUAGE
+        text = self.messages[text_language]
+        prefix = text["farm"] + " " if with_farm else ""
+
+        def say(value: str) -> str:
+            return f'<Say language="{LANGUAGE_CODES[text_language]}">{escape(value)}</Say>'
+
+        clip = (self.audio.get(language) or {}).get(part)
+        if clip and self.audio_base_url:
+            play = f"<Play>{escape(self.audio_base_url.rstrip('/') + '/' + clip)}</Play>"
+            # the farm number is still spoken before the recording
+            return (say(prefix.strip()) if prefix else "") + play
+        if prefix:
+            return say(prefix + text[part])
+        return say(text[part][:1].upper() + text[part][1:])
+
+    def resolve_language(self, call_language: Optional[str]) -> str:
+        return call_language if call_language in self.languages else DEFAULT_LANGUAGE
+
+    def render(self, call_language: Optional[str], alerts: Iterable[Tuple[Optional[str], str]]) -> str:
+        """TwiML for one call. `alerts` holds (farm_key, alert type) pairs; farm_key may be None."""
+        return _render(self, self.resolve_language(call_language), tuple(alerts))
+
+
+def farm_label(farm_key: Optional[str]) -> str:
+    """farm_2 -> "2", so only the number has to be read out in the farmer's language."""
+    if not farm_key:
+        return ""
+    match = re.fullmatch(r"farm_(\d+)", farm_key)
+    return match.group(1) if match else farm_key
+
+
+@lru_cache(maxsize=4096)
+def _render(registry: VoiceMessageRegistry, language: str, alerts: Tuple[Tuple[Optional[str], str], ...]) -> str:
+    parts = [registry.fragments[("intro", language)]]
+    for farm_key, alert_type in alerts:
+        label = farm_label(farm_key)
+        if label:
+            parts.append(registry.fragments[(alert_type, language)].replace("{farm}", escape(label)))
+        else:
+            parts.append(registry.fragments[(f"{alert_type}:nofarm", language)])
+    parts.append(registry.fragments[("outro", language)])
+    return "<Response>" + "".join(parts) + "</Response>"
+
+
+voice_messages = VoiceMessageRegistry(
+    MESSAGES,
+    load_audio_manifest(settings.VOICE_AUDIO_MANIFEST),
+    settings.VOICE_AUDIO_BASE_URL,
+)
@@ -0,0 +1,135 @@
+# /backend/benchmarks/crop_inference.py
+"""
+Crop model throughput against batch size, and the micro-batcher under load.
+
+1. Calls `top_k` directly with batches of 1, 2, 4, ... rows and reports
+   rows/s and the time per call. This is the ceiling batching can reach.
+2. Sends single-row predictions through `crop_inference` at each
+   --concurrency level. Reports req/s, p50/p99 and the average batch the
+   worker actually formed.
+
+Uses the model that would be served (CROP_MODEL_DIR / CROP_MODEL_VERSION):
+
+    uv run python -m benchmarks.crop_inference --rows 20000 --concurrency 1,16,64,256
+    uv run python -m benchmarks.crop_inference --json crop_inference.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from typing import List
+
+
+def random_rows(n: int, rng: random.Random) -> List[List[float]]:
+    return [
+        [rng.uniform(5, 40), rng.uniform(20, 95), rng.uniform(990, 1025), rng.uniform(0, 12), rng.uniform(-50, 700)]
+        for _ in range(n)
+    ]
+
+
+def batch_sizes(max_batch: int) -> List[int]:
+    sizes, size = [], 1
+    while size <= max_batch:
+        sizes.append(size)
+        size *= 2
+    return sizes
+
+
+def bench_direct(model, total_rows: int, max_batch: int, rng: random.Random) -> List[dict]:
+    results = []
+    for size in batch_sizes(max_batch):
+        calls = max(1, total_rows // size)
+        batches = [random_rows(size, rng) for _ in range(min(calls, 64))]
+        model.top_k(batches[0])  # warm up
+        started = time.perf_counter()
+        for i in range(calls):
+            model.top_k(batches[i % len(batches)])
+        elapsed = time.perf_counter() - started
+        results.append({
+            "batch_size": size,
+            "rows_per_s": round(calls * size / elapsed),
+            "ms_per_call": round(elapsed / calls * 1000, 4),
+        })
+    return results
+
+
+async def bench_server(server, requests: int, concurrency: int, rng: random.Random) -> dict:
+    rows = random_rows(min(requests, 1000), rng)
+    samples: List[float] = []
+    remaining = iter(range(requests))
+    batches_before, rows_before = server.batches, server.rows
+
+    async def worker():
+        for i in remaining:
+            start = time.perf_counter()
+            await server.predict(rows[i % len(rows)])
+            samples.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    samples.sort()
+    batches = server.batches - batches_before
+    return {
+        "concurrency": concurrency,
+        "req_per_s": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(samples), 3),
+        "p99_ms": round(samples[int(len(samples) * 0.99) - 1], 3),
+        "avg_batch": round((server.rows - rows_before) / batches, 2) if batches else 0.0,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    from benchmarks.import_time import child_env
+
+    # required settings (Mongo, Twilio, ...) are never used here
+    os.environ.update(child_env())
+    from app.config import get_settings
+    from app.cropinference import crop_inference
+
+    rng = random.Random(args.seed)
+    model = await crop_inference.warm()
+    settings = get_settings()
+    print(f"crop model {model.version}: {len(model.classes)} crops, batch max {settings.CROP_BATCH_MAX}, window {settings.CROP_BATCH_WINDOW_MS} ms")
+
+    direct = bench_direct(model, args.rows, args.max_batch, rng)
+    print(f"{'batch':>7} {'rows/s':>12} {'ms/call':>10}")
+    for r in direct:
+        print(f"{r['batch_size']:>7} {r['rows_per_s']:>12} {r['ms_per_call']:>10}")
+
+    crop_inference.start()
+    served = []
+    try:
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            served.append(await bench_server(crop_inference, args.requests, concurrency, rng))
+    finally:
+        await crop_inference.stop()
+    print(f"{'concurrency':>11} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'avg batch':>10}")
+    for r in served:
+        print(f"{r['concurrency']:>11} {r['req_per_s']:>9} {r['p50_ms']:>9} {r['p99_ms']:>9} {r['avg_batch']:>10}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "model_version": model.version,
+                "batch_max": settings.CROP_BATCH_MAX,
+                "batch_window_ms": settings.CROP_BATCH_WINDOW_MS,
+                "direct": direct,
+                "served": served,
+            }, f, indent=2)
+        print(f"wrote {args.json}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000, help="Rows per batch size in the direct run")
+    parser.add_argument("--max-batch", type=int, default=512)
+    parser.add_argument("--requests", type=int, default=5000, help="Predictions per concurrency level")
+    parser.add_argument("--concurrency", default="1,8,32,128")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", default=None, help="Write the results to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,87 @@
+# /backend/benchmarks/http_client.py
+"""
+Per-request httpx.AsyncClient vs the shared pooled client from app.http_client.
+
+Starts a local stub server (plain HTTP, so the gap shown is TCP setup only;
+against open-meteo/Telegram the TLS handshake makes it larger) and reports
+p50/p99 latency for N requests at the given concurrency.
+
+    uv run python -m benchmarks.http_client --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+import uvicorn
+
+from app.http_client import build_http_client
+
+HOST = "127.0.0.1"
+PORT = 8765
+URL = f"http://{HOST}:{PORT}/v1/forecast"
+
+STUB_BODY = b'{"current": {"temperature_2m": 24.5, "relative_humidity_2m": 61}}'
+
+
+async def stub_app(scope, receive, send):
+    """Minimal ASGI app answering every request like open-meteo does."""
+    if scope["type"] != "http":
+        return
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": STUB_BODY})
+
+
+async def run(fetch, requests: int, concurrency: int) -> dict:
+    samples = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await fetch()
+            samples.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p99_ms": round(samples[int(len(samples) * 0.99) - 1], 3),
+        "req_per_s": round(requests / elapsed, 1),
+    }
+
+
+async def main(requests: int, concurrency: int) -> None:
+    server = uvicorn.Server(uvicorn.Config(stub_app, host=HOST, port=PORT, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    try:
+        async def fresh_client():
+            async with httpx.AsyncClient() as client:
+                (await client.get(URL)).json()
+
+        shared = build_http_client()
+
+        async def shared_client():
+            (await shared.get(URL)).json()
+
+        print("client per request:", await run(fresh_client, requests, concurrency))
+        print("shared client:     ", await run(shared_client, requests, concurrency))
+        await shared.aclose()
+    finally:
+        server.should_exit = True
+        await server_task
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
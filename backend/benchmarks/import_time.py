@@ -0,0 +1,140 @@
+# /backend/benchmarks/import_time.py
+"""
+Cold-start profile for the Lambda handler.
+
+Each run starts a fresh interpreter with `-X importtime`, imports
+app.adapter and sends it one API Gateway request (GET /health). The fastest
+run (least disturbed by the machine) is reported: import time, first
+invocation time, and the slowest imports grouped by top-level package.
+Exits non-zero when import + first invocation is over the budget, so it
+can gate a CI job (.github/workflows/cold-start.yml):
+
+    uv run python -m benchmarks.import_time --runs 5 --budget-ms 600
+    uv run python -m benchmarks.import_time --json > import_time.json
+
+Required settings that aren't in the environment get placeholder values;
+nothing is contacted during the measured /health request.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+CHILD = """
+import json, time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+{module}.handler({event!r}, None)
+invoked = time.perf_counter()
+print(json.dumps({{"import_ms": (imported - start) * 1000, "first_invoke_ms": (invoked - imported) * 1000}}))
+"""
+
+# API Gateway HTTP API (payload v2) request for GET /health
+HEALTH_EVENT = {
+    "version": "2.0",
+    "routeKey": "$default",
+    "rawPath": "/health",
+    "rawQueryString": "",
+    "headers": {"host": "localhost"},
+    "requestContext": {
+        "http": {"method": "GET", "path": "/health", "protocol": "HTTP/1.1", "sourceIp": "127.0.0.1"},
+        "stage": "$default",
+    },
+    "isBase64Encoded": False,
+}
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# modules that should stay out of the cold path; they are imported on first use
+LAZY_MODULES = ("twilio", "cloudinary", "PIL", "numpy", "requests")
+
+
+def child_env() -> Dict[str, str]:
+    from app.config import Settings
+
+    env = dict(os.environ)
+    for name, field in Settings.model_fields.items():
+        if field.is_required() and name not in env:
+            env[name] = "mongodb://127.0.0.1:27017" if name == "MONGODB_URI" else "placeholder"
+            if name == "MONGODB_URI":
+                # nothing listens there: don't time a failed pool warmup
+                env.setdefault("MONGO_WARM_POOL_ON_STARTUP", "false")
+    return env
+
+
+def profile_once(module: str, env: Dict[str, str]) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD.format(module=module, event=HEALTH_EVENT)],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if result.returncode != 0:
+        sys.exit(f"{module} cold start failed:\n{result.stderr[-2000:]}")
+
+    # (self_us, cumulative_us, depth, name) for every import
+    imports: List[Tuple[int, int, int, str]] = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            imports.append((int(match.group(1)), int(match.group(2)), depth, match.group(4)))
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return summarize(imports, timings)
+
+
+def summarize(imports: List[Tuple[int, int, int, str]], timings: dict) -> dict:
+    by_package: Dict[str, int] = defaultdict(int)
+    for self_us, _, _, name in imports:
+        by_package[name.split(".")[0]] += self_us
+
+    loaded = {name.split(".")[0] for _, _, _, name in imports}
+    return {
+        "total_ms": round(timings["import_ms"] + timings["first_invoke_ms"], 1),
+        "import_ms": round(timings["import_ms"], 1),
+        "first_invoke_ms": round(timings["first_invoke_ms"], 1),
+        "packages_ms": {
+            name: round(us / 1000, 1)
+            for name, us in sorted(by_package.items(), key=lambda item: -item[1])
+        },
+        "eager_heavy_modules": [name for name in LAZY_MODULES if name in loaded],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold-start profile of the Lambda handler")
+    parser.add_argument("--module", default="app.adapter")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail when import + first request take longer")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    env = child_env()
+    runs = [profile_once(args.module, env) for _ in range(args.runs)]
+    best = min(runs, key=lambda run: run["total_ms"])
+    best["runs_ms"] = [run["total_ms"] for run in runs]
+    best["budget_ms"] = args.budget_ms
+
+    if args.json:
+        print(json.dumps(best, indent=2))
+    else:
+        print(f"cold start {args.module}: {best['total_ms']} ms (best of {args.runs}: {best['runs_ms']})")
+        print(f"  import {best['import_ms']} ms, first request {best['first_invoke_ms']} ms")
+        for name, ms in list(best["packages_ms"].items())[:args.top]:
+            print(f"  {name:<28} {ms:>8} ms")
+        if best["eager_heavy_modules"]:
+            print(f"imported eagerly: {', '.join(best['eager_heavy_modules'])}")
+
+    if args.budget_ms is not None and best["total_ms"] > args.budget_ms:
+        print(f"over budget: {best['total_ms']} ms > {args.budget_ms} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
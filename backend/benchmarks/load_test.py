@@ -0,0 +1,253 @@
+# /backend/benchmarks/load_test.py
+"""
+Load test of the hot endpoints, run in-process.
+
+The app runs inside this process with its full lifespan, served through
+httpx's ASGI transport. It uses a throwaway database on a LOCAL mongod, or
+mongomock-motor with --mongomock (not a project dependency; install it
+separately). open-meteo, Telegram and Cloudinary are answered by
+stubs.upstreams on a local port, with --stub-latency-ms standing in for
+the real round trip. Twilio uses the fake transport. Nothing outside this
+machine is contacted, whatever the .env says.
+
+Each scenario sends --requests requests at --concurrency, after
+--warmup requests that are not counted. Throughput and p50/p95/p99 are
+reported per route. --json writes the results so two releases can be
+compared, and --baseline prints the change against such a file:
+
+    uv run python -m benchmarks.load_test --concurrency 50 --json after.json --baseline before.json
+    uv run python -m benchmarks.load_test --mongomock --scenarios login,crop_prediction
+
+The client shares the event loop with the app, so absolute numbers are
+lower than a separate load generator would see. Use them to compare runs
+on the same machine.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+import uvicorn
+
+STUB_HOST = "127.0.0.1"
+STUB_PORT = 8766
+DATABASE_NAME = "farmhelp_bench_load"
+
+
+def configure_env(args: argparse.Namespace) -> None:
+    """Points the app at the local database and stubs. Must run before app.* is imported."""
+    from benchmarks.import_time import child_env
+
+    os.environ.update(child_env())
+    stub_url = f"http://{STUB_HOST}:{STUB_PORT}"
+    os.environ.update({
+        "MONGODB_URI": args.uri,
+        "DATABASE_NAME": DATABASE_NAME,
+        "OPEN_METEO_BASE_URL": stub_url,
+        "TELEGRAM_API_BASE_URL": stub_url,
+        "CLOUDINARY_UPLOAD_PREFIX": stub_url,
+        "TWILIO_TRANSPORT": "fake",
+        # background jobs would compete with the measured requests
+        "SENSOR_POLLER_ENABLED": "false",
+        "SENSOR_ROLLUP_ENABLED": "false",
+        "ALERTS_ENABLED": "false",
+    })
+    if args.mongomock:
+        # mongomock supports neither time-series collections nor pipeline updates
+        os.environ["ENSURE_INDEXES_ON_STARTUP"] = "false"
+        os.environ["MONGO_WARM_POOL_ON_STARTUP"] = "false"
+        os.environ["DEMO_SENSOR_STATE_BACKEND"] = "memory"
+
+
+def random_coordinates(rng: random.Random) -> str:
+    # two decimals, the weather cache's cell size, so repeats hit the cache
+    return f"{rng.uniform(8, 32):.2f},{rng.uniform(68, 92):.2f}"
+
+
+async def seed(db, farmers: int, forms: int) -> None:
+    from benchmarks.login_latency import seed as seed_farmers
+
+    await seed_farmers(db["farmerdata"], farmers)
+    for collection, extra in (("contactfoamdata", {"problem": "Pump not starting"}),
+                              ("applicationfoamdata", {"home_address": "Village 1"})):
+        await db[collection].insert_many(
+            [{"name": f"Farmer {i}", "mobile_no": f"9{i:09d}", **extra} for i in range(forms)]
+        )
+
+
+def build_scenarios(farmers: int) -> Dict[str, Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]]]:
+    def mobile_no(rng: random.Random) -> str:
+        return f"9{rng.randrange(farmers):09d}"
+
+    def sensor_ids(rng: random.Random) -> List[str]:
+        i = rng.randrange(farmers)
+        return [f"S{i}-1", f"S{i}-2"]
+
+    return {
+        "login": lambda client, rng: client.post("/farmerdata/", json={"mobile_no": mobile_no(rng)}),
+        "crop_prediction": lambda client, rng: client.post(
+            "/democropprediction/", json={"coordinates": random_coordinates(rng)}
+        ),
+        "demo_sensors": lambda client, rng: client.get(
+            "/demosenserdata/batch", params={"sensor_ids": sensor_ids(rng)}
+        ),
+        "contact_submit": lambda client, rng: client.post(
+            "/submitcontactfoamdata/",
+            json={"name": "Load Test", "mobile_no": mobile_no(rng), "problem": "Sensor offline"},
+        ),
+        "application_submit": lambda client, rng: client.post(
+            "/submitapplicationfoamdata/",
+            json={"name": "Load Test", "mobile_no": mobile_no(rng), "home_address": "Village 7"},
+        ),
+        "admin_farmers": lambda client, rng: client.get("/adminfarmerdata/", params={"limit": 100}),
+        "admin_contacts": lambda client, rng: client.get("/admincontactfoamdata/", params={"limit": 100}),
+        "admin_applications": lambda client, rng: client.get("/adminapplicationfoamdata/", params={"limit": 100}),
+    }
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    index = max(0, min(len(samples) - 1, int(round(pct / 100 * len(samples))) - 1))
+    return samples[index]
+
+
+async def run_scenario(send, client: httpx.AsyncClient, requests: int, concurrency: int, seed_value: int) -> dict:
+    rng = random.Random(seed_value)
+    samples: List[float] = []
+    errors: Dict[str, int] = {}
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await send(client, rng)
+                failed = str(response.status_code) if response.status_code >= 400 else None
+            except Exception as e:
+                failed = type(e).__name__
+            samples.append((time.perf_counter() - start) * 1000)
+            if failed:
+                errors[failed] = errors.get(failed, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    samples.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "req_per_s": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def print_results(results: Dict[str, dict], baseline: Dict[str, dict]) -> None:
+    print(f"{'route':<20} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, r in results.items():
+        line = f"{name:<20} {r['req_per_s']:>9} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} {sum(r['errors'].values()):>7}"
+        before = baseline.get(name)
+        if before:
+            change = lambda key: (r[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            line += f"   vs baseline: req/s {change('req_per_s'):+.1f}%, p95 {change('p95_ms'):+.1f}%"
+        print(line)
+
+
+async def main(args: argparse.Namespace) -> None:
+    scenarios = build_scenarios(args.farmers)
+    selected = args.scenarios.split(",") if args.scenarios else list(scenarios)
+    unknown = [name for name in selected if name not in scenarios]
+    if unknown:
+        sys.exit(f"unknown scenarios: {', '.join(unknown)} (choose from {', '.join(scenarios)})")
+
+    configure_env(args)
+    # imported only now, so the settings see the environment set above
+    import app.db.connection as connection
+    from app.main import app
+    from stubs import upstreams
+
+    if args.mongomock:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--mongomock needs mongomock-motor: uv pip install mongomock-motor")
+        # connect_to_mongo keeps an existing client, so the lifespan uses this one
+        connection.client = AsyncMongoMockClient()
+        connection.database = connection.client[DATABASE_NAME]
+        connection.analytics_database = connection.database
+
+    upstreams.LATENCY_MS = args.stub_latency_ms
+    stub = uvicorn.Server(uvicorn.Config(upstreams.app, host=STUB_HOST, port=STUB_PORT, log_level="warning"))
+    stub_task = asyncio.create_task(stub.serve())
+    while not stub.started:
+        await asyncio.sleep(0.05)
+
+    results: Dict[str, dict] = {}
+    try:
+        async with app.router.lifespan_context(app):
+            db = connection.get_db()
+            await connection.client.drop_database(DATABASE_NAME)
+            print(f"Seeding {args.farmers} farmers...")
+            await seed(db, args.farmers, args.forms)
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+                for i, name in enumerate(selected):
+                    if args.warmup:
+                        await run_scenario(scenarios[name], client, args.warmup, args.concurrency, seed_value=-i)
+                    results[name] = await run_scenario(
+                        scenarios[name], client, args.requests, args.concurrency, seed_value=i
+                    )
+                    print(f"  {name}: {results[name]['req_per_s']} req/s")
+            await connection.client.drop_database(DATABASE_NAME)
+    finally:
+        stub.should_exit = True
+        await stub_task
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["routes"]
+    print_results(results, baseline)
+
+    if args.json:
+        report = {
+            "config": {
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "farmers": args.farmers,
+                "stub_latency_ms": args.stub_latency_ms,
+                "mongo": "mongomock" if args.mongomock else "mongod",
+            },
+            "upstream_calls": dict(upstreams.calls),
+            "routes": results,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.json}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--mongomock", action="store_true", help="Use mongomock-motor instead of a mongod")
+    parser.add_argument("--scenarios", default=None, help="Comma separated subset, default all")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=50, help="Uncounted requests per scenario")
+    parser.add_argument("--farmers", type=int, default=10_000)
+    parser.add_argument("--forms", type=int, default=500, help="Seeded contact and application forms")
+    parser.add_argument("--stub-latency-ms", type=float, default=50.0)
+    parser.add_argument("--json", default=None, help="Write the results to this file")
+    parser.add_argument("--baseline", default=None, help="Earlier --json file to compare against")
+    asyncio.run(main(parser.parse_args()))
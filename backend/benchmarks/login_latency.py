@@ -0,0 +1,81 @@
+# /backend/benchmarks/login_latency.py
+"""
+Farmer login latency with and without the index registry applied.
+
+Seeds a throwaway database on a LOCAL mongod with N farmers, times
+`find_one({"mobile_no": ...})` (the /farmerdata/ login query) before and
+after `ensure_indexes`, then drops the database.
+
+    uv run python -m benchmarks.login_latency --farmers 100000 --lookups 500
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.db.indexes import ensure_indexes
+
+
+def make_farmer(i: int) -> dict:
+    return {
+        "name": f"Farmer {i}",
+        "mobile_no": f"9{i:09d}",
+        "home_address": f"Village {i % 500}",
+        "call_language": random.choice(["hindi", "english", "marathi"]),
+        "farms": {
+            f"farm_{n}": {"location": f"{20 + n}.0,{75 + n}.0", "sensor_id": f"S{i}-{n}"}
+            for n in range(1, 3)
+        },
+        "sensor_ids": [f"S{i}-{n}" for n in range(1, 3)],
+    }
+
+
+async def seed(collection, farmers: int, batch: int = 5000) -> None:
+    for start in range(0, farmers, batch):
+        docs = [make_farmer(i) for i in range(start, min(start + batch, farmers))]
+        await collection.insert_many(docs, ordered=False)
+
+
+async def time_lookups(collection, farmers: int, lookups: int) -> dict:
+    samples = []
+    for _ in range(lookups):
+        mobile_no = f"9{random.randrange(farmers):09d}"
+        start = time.perf_counter()
+        await collection.find_one({"mobile_no": mobile_no})
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p99_ms": round(samples[int(len(samples) * 0.99) - 1], 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+    }
+
+
+async def main(uri: str, farmers: int, lookups: int) -> None:
+    client = AsyncIOMotorClient(uri)
+    db_name = "farmhelp_bench_login"
+    db = client[db_name]
+    try:
+        await client.drop_database(db_name)
+        print(f"Seeding {farmers} farmers...")
+        await seed(db["farmerdata"], farmers)
+
+        print("without indexes:", await time_lookups(db["farmerdata"], farmers, lookups))
+        await ensure_indexes(db)
+        print("with indexes:   ", await time_lookups(db["farmerdata"], farmers, lookups))
+    finally:
+        await client.drop_database(db_name)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--farmers", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.uri, args.farmers, args.lookups))
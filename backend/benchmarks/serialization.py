@@ -0,0 +1,73 @@
+# /backend/benchmarks/serialization.py
+"""
+Admin list serialization: FastAPI's default path vs BSONResponse.
+
+Builds N farmer documents shaped like Motor returns them (ObjectId `_id`,
+nested `farms`, datetimes) and times turning one page into response bytes:
+
+- default: str_object_id on each document, response_model=List[dict]
+  validation, jsonable_encoder, then JSONResponse.render (what the admin
+  routes did before)
+- bson:    BSONResponse(docs) (orjson, BSON types handled in the encoder)
+
+    uv run python -m benchmarks.serialization --docs 1000 --repeat 50
+"""
+import argparse
+import copy
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import List
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.db.serialization import BSONResponse
+from benchmarks.login_latency import make_farmer
+
+
+def make_docs(n: int) -> List[dict]:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return [{"_id": ObjectId(), **make_farmer(i), "created_at": now} for i in range(n)]
+
+
+def default_path(docs: List[dict], adapter: TypeAdapter) -> bytes:
+    for doc in docs:
+        doc["_id"] = str(doc["_id"])
+    validated = adapter.validate_python(docs)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def bson_path(docs: List[dict], adapter: TypeAdapter) -> bytes:
+    return BSONResponse(docs).body
+
+
+def time_path(path, docs: List[dict], repeat: int) -> dict:
+    adapter = TypeAdapter(List[dict])
+    samples = []
+    for _ in range(repeat):
+        # fresh copies: the default path mutates the documents
+        page = copy.deepcopy(docs)
+        start = time.perf_counter()
+        body = path(page, adapter)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(samples), 3), "bytes": len(body)}
+
+
+def main(docs: int, repeat: int) -> None:
+    page = make_docs(docs)
+    default = time_path(default_path, page, repeat)
+    bson = time_path(bson_path, page, repeat)
+    print(f"default path: {default}")
+    print(f"BSONResponse: {bson}")
+    print(f"speedup: {default['median_ms'] / bson['median_ms']:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    main(args.docs, args.repeat)
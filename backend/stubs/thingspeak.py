@@ -0,0 +1,75 @@
+# /backend/stubs/thingspeak.py
+"""
+Local fake of the ThingSpeak channel feeds API for testing the sensor poller.
+
+Every channel id exists; each one grows by a new entry every
+`--entry-seconds` seconds with random-walk soil moisture (field1) and
+tank level (field2). Supports the `results` and `start` query params.
+
+    uv run python -m stubs.thingspeak --port 8081
+    THINGSPEAK_BASE_URL=http://127.0.0.1:8081 uv run dev
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, Query
+
+ENTRY_SECONDS = 15.0
+STARTED_AT = time.time()
+
+app = FastAPI(title="Fake ThingSpeak")
+
+# channel_id -> generated entries
+feeds: Dict[int, List[dict]] = {}
+
+
+def _grow(channel_id: int) -> List[dict]:
+    entries = feeds.setdefault(channel_id, [])
+    wanted = int((time.time() - STARTED_AT) / ENTRY_SECONDS) + 1
+    rng = random.Random(channel_id * 7919 + len(entries))
+    soil = float(entries[-1]["field1"]) if entries else rng.uniform(30, 70)
+    tank = float(entries[-1]["field2"]) if entries else rng.uniform(50, 90)
+
+    while len(entries) < wanted:
+        soil = min(100.0, max(0.0, soil + rng.uniform(-3, 3)))
+        tank = min(100.0, max(0.0, tank + rng.uniform(-2, 2)))
+        created_at = datetime.fromtimestamp(STARTED_AT + len(entries) * ENTRY_SECONDS, timezone.utc)
+        entries.append({
+            "created_at": created_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "entry_id": len(entries) + 1,
+            "field1": f"{soil:.1f}",
+            "field2": f"{tank:.1f}",
+        })
+    return entries
+
+
+@app.get("/channels/{channel_id}/feeds.json")
+async def channel_feeds(
+    channel_id: int,
+    results: int = Query(100, le=8000),
+    start: Optional[str] = None,
+):
+    entries = _grow(channel_id)
+    if start:
+        since = datetime.strptime(start, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+        cutoff = (since - timedelta(seconds=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        entries = [e for e in entries if e["created_at"] >= cutoff]
+    entries = entries[-results:]
+    return {
+        "channel": {"id": channel_id, "last_entry_id": len(feeds[channel_id])},
+        "feeds": entries,
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake ThingSpeak feeds API")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--entry-seconds", type=float, default=ENTRY_SECONDS)
+    args = parser.parse_args()
+    ENTRY_SECONDS = args.entry_seconds
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
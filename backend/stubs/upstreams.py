@@ -0,0 +1,84 @@
+# /backend/stubs/upstreams.py
+"""
+Local fakes of the third-party APIs the backend calls, for load tests and
+offline runs: open-meteo forecasts, Telegram sendMessage and Cloudinary
+uploads. Every response is delayed by `--latency-ms` to stand in for the
+real round trip. Twilio has no stub here; set TWILIO_TRANSPORT=fake.
+
+    uv run python -m stubs.upstreams --port 8082 --latency-ms 80
+    OPEN_METEO_BASE_URL=http://127.0.0.1:8082 \
+    TELEGRAM_API_BASE_URL=http://127.0.0.1:8082 \
+    CLOUDINARY_UPLOAD_PREFIX=http://127.0.0.1:8082 uv run dev
+"""
+import argparse
+import asyncio
+import itertools
+import random
+from collections import Counter
+
+from fastapi import FastAPI, Request
+
+LATENCY_MS = 50.0
+
+app = FastAPI(title="Fake upstream APIs")
+
+# calls received per API, returned by GET /stats
+calls: Counter = Counter()
+_upload_ids = itertools.count(1)
+
+
+async def _delay() -> None:
+    if LATENCY_MS > 0:
+        # +-20% jitter so concurrent callers don't move in lockstep
+        await asyncio.sleep(LATENCY_MS * random.uniform(0.8, 1.2) / 1000)
+
+
+@app.get("/v1/forecast")
+async def forecast(latitude: float, longitude: float):
+    calls["open-meteo"] += 1
+    await _delay()
+    rng = random.Random(f"{latitude},{longitude}")
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "current": {
+            "temperature_2m": round(rng.uniform(15, 38), 1),
+            "relative_humidity_2m": rng.randint(30, 90),
+        },
+    }
+
+
+@app.post("/bot{token}/sendMessage")
+async def send_message(token: str, request: Request):
+    calls["telegram"] += 1
+    body = await request.json()
+    await _delay()
+    return {"ok": True, "result": {"message_id": calls["telegram"], "chat": {"id": body.get("chat_id")}}}
+
+
+@app.post("/v1_1/{cloud_name}/image/upload")
+async def upload(cloud_name: str, request: Request):
+    calls["cloudinary"] += 1
+    await request.body()
+    await _delay()
+    public_id = f"farmhelp/stub{next(_upload_ids)}"
+    return {
+        "public_id": public_id,
+        "secure_url": f"https://res.cloudinary.com/{cloud_name}/image/upload/{public_id}.jpg",
+    }
+
+
+@app.get("/stats")
+async def stats():
+    return dict(calls)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake open-meteo / Telegram / Cloudinary APIs")
+    parser.add_argument("--port", type=int, default=8082)
+    parser.add_argument("--latency-ms", type=float, default=LATENCY_MS)
+    args = parser.parse_args()
+    LATENCY_MS = args.latency_ms
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
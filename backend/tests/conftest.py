@@ -0,0 +1,40 @@
+"""
+Offline test setup: the app's settings are filled with placeholders and
+Mongo is replaced by mongomock-motor, so the suite needs no services.
+"""
+import os
+
+# must be set before anything imports app.config
+for name, value in {
+    "FRONTEND_URL": "http://localhost:3000",
+    "MONGODB_URI": "mongodb://localhost:27017",
+    "DATABASE_NAME": "farmhelp_test",
+    "NEXT_PUBLIC_CLOUDINARY_CLOUD_NAME": "test",
+    "CLOUDINARY_API_KEY": "test",
+    "CLOUDINARY_API_SECRET": "test",
+    "TELEGRAM_BOT_TOKEN": "test",
+    "TELEGRAM_CHAT_ID": "test",
+    "TWILIO_ACCOUNT_SID": "ACtest",
+    "TWILIO_AUTH_TOKEN": "test",
+    "TWILIO_PHONE_NUMBER": "+15005550006",
+    "ADMIN_PANEL_PASSWORD": "test",
+}.items():
+    os.environ.setdefault(name, value)
+# never place real calls, whatever .env says
+os.environ["TWILIO_TRANSPORT"] = "fake"
+
+import pytest  # noqa: E402
+from mongomock.collection import BulkOperationBuilder  # noqa: E402
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch):
+    # pymongo >= 4.11 passes `sort` to bulk updates, which mongomock doesn't take
+    add_update = BulkOperationBuilder.add_update
+
+    def add_update_without_sort(self, *args, sort=None, **kwargs):
+        return add_update(self, *args, **kwargs)
+
+    monkeypatch.setattr(BulkOperationBuilder, "add_update", add_update_without_sort)
+    return AsyncMongoMockClient()["farmhelp_test"]
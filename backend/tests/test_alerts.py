@@ -0,0 +1,109 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.alerts import ALERTS_COLLECTION, CONDITIONS, is_active, run_alert_pass
+from app.config import get_settings
+from app.db.sensors import DEMO_SOURCE, READINGS_COLLECTION, SENSORS_COLLECTION, THINGSPEAK_SOURCE
+from app.twilio_client import transport
+
+settings = get_settings()
+
+NOW = datetime(2026, 1, 1, 6, 0, tzinfo=timezone.utc)
+COOLDOWN = timedelta(seconds=settings.ALERT_COOLDOWN_SECONDS)
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    transport.calls.clear()
+
+
+async def add_owner(db, sensor_id: str = "S1") -> None:
+    await db[SENSORS_COLLECTION].insert_one({
+        "_id": sensor_id,
+        "farmer_id": "F1",
+        "farm_key": "farm1",
+        "mobile_no": "9876543210",
+        "call_language": "en",
+    })
+
+
+async def add_reading(db, at: datetime, soil: float, source: str = THINGSPEAK_SOURCE) -> None:
+    await db[READINGS_COLLECTION].insert_one({
+        "timestamp": at,
+        "meta": {"sensor_id": "S1", "source": source},
+        "soil_moisture": soil,
+        "water_tank_level": 50,
+    })
+
+
+def test_hysteresis():
+    soil_dry = CONDITIONS["soil_dry"]
+    trigger, clear = soil_dry["trigger"], soil_dry["clear"]
+    between = (trigger + clear) / 2
+
+    assert is_active(soil_dry, trigger, was_active=False)
+    assert not is_active(soil_dry, between, was_active=False)
+    # once active it stays active until the value is back past `clear`
+    assert is_active(soil_dry, between, was_active=True)
+    assert not is_active(soil_dry, clear, was_active=True)
+    # a missing value keeps the previous state
+    assert is_active(soil_dry, None, was_active=True)
+
+    tank_full = CONDITIONS["tank_full"]
+    assert is_active(tank_full, tank_full["trigger"], was_active=False)
+    assert is_active(tank_full, (tank_full["trigger"] + tank_full["clear"]) / 2, was_active=True)
+    assert not is_active(tank_full, tank_full["clear"], was_active=True)
+
+
+def test_calls_once_within_cooldown(db):
+    dry = CONDITIONS["soil_dry"]["trigger"] - 5
+
+    async def run():
+        await add_owner(db)
+        await add_reading(db, NOW - timedelta(minutes=1), dry)
+        first = await run_alert_pass(db, NOW)
+        await add_reading(db, NOW + timedelta(minutes=14), dry)
+        second = await run_alert_pass(db, NOW + timedelta(minutes=15))
+        await add_reading(db, NOW + COOLDOWN, dry)
+        third = await run_alert_pass(db, NOW + COOLDOWN + timedelta(minutes=1))
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert first["farmers_alerted"] == 1
+    assert second["farmers_alerted"] == 0
+    assert third["farmers_alerted"] == 1
+    assert [call["to"] for call in transport.calls] == ["+919876543210", "+919876543210"]
+
+
+def test_value_between_thresholds_does_not_recall_after_clear(db):
+    soil_dry = CONDITIONS["soil_dry"]
+    between = (soil_dry["trigger"] + soil_dry["clear"]) / 2
+
+    async def run():
+        await add_owner(db)
+        await add_reading(db, NOW - timedelta(minutes=1), soil_dry["trigger"] - 5)
+        await run_alert_pass(db, NOW)
+        await add_reading(db, NOW + timedelta(minutes=1), soil_dry["clear"] + 5)
+        await run_alert_pass(db, NOW + timedelta(minutes=2))
+        # hovering below `clear` but above `trigger` must not re-trigger
+        await add_reading(db, NOW + COOLDOWN, between)
+        later = await run_alert_pass(db, NOW + COOLDOWN + timedelta(minutes=1))
+        return later, await db[ALERTS_COLLECTION].find_one({"_id": "S1"})
+
+    later, state = asyncio.run(run())
+    assert later["farmers_alerted"] == 0
+    assert state["conditions"]["soil_dry"]["active"] is False
+    assert len(transport.calls) == 1
+
+
+def test_ignores_demo_readings(db):
+    async def run():
+        await add_owner(db)
+        await add_reading(db, NOW - timedelta(minutes=1), 0, source=DEMO_SOURCE)
+        return await run_alert_pass(db, NOW)
+
+    summary = asyncio.run(run())
+    assert summary["sensors"] == 0
+    assert transport.calls == []
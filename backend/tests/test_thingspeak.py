@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.db.sensors import READINGS_COLLECTION, THINGSPEAK_SOURCE
+from app.thingspeak import CHANNELS_COLLECTION, ThingSpeakPoller, parse_feeds
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def feed(entry_id: int, soil: float = 40, tank: float = 50) -> dict:
+    created_at = START + timedelta(minutes=entry_id)
+    return {
+        "entry_id": entry_id,
+        "created_at": created_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "field1": str(soil),
+        "field2": str(tank),
+    }
+
+
+def make_poller(db, feeds: list) -> ThingSpeakPoller:
+    poller = ThingSpeakPoller()
+    poller.db = db
+
+    async def fetch_feeds(channel):
+        return feeds
+
+    poller.fetch_feeds = fetch_feeds
+    return poller
+
+
+async def add_channel(db, **fields) -> dict:
+    channel = {"_id": "S1", "channel_id": 1, "last_entry_id": 0, "last_created_at": None, **fields}
+    await db[CHANNELS_COLLECTION].insert_one(channel)
+    return channel
+
+
+def test_parse_feeds_skips_seen_entries_and_tags_source():
+    channel = {"_id": "S1", "last_entry_id": 2}
+    readings = parse_feeds(channel, [feed(1), feed(2), feed(3, soil=12.5), {"entry_id": None}])
+
+    assert [r["entry_id"] for r in readings] == [3]
+    assert readings[0]["meta"] == {"sensor_id": "S1", "source": THINGSPEAK_SOURCE}
+    assert readings[0]["soil_moisture"] == 12.5
+
+
+def test_store_skips_entries_already_stored(db):
+    poller = make_poller(db, [])
+    readings = parse_feeds({"_id": "S1"}, [feed(1), feed(2)])
+
+    async def run():
+        first = await poller._store("S1", readings[:1])
+        second = await poller._store("S1", parse_feeds({"_id": "S1"}, [feed(1), feed(2)]))
+        return first, second, await db[READINGS_COLLECTION].count_documents({})
+
+    assert asyncio.run(run()) == (1, 1, 2)
+
+
+def test_poll_advances_cursor_and_releases_lease(db):
+    poller = make_poller(db, [feed(1), feed(2), feed(3)])
+
+    async def run():
+        await add_channel(db)
+        stored = await poller._poll_channel({"_id": "S1"})
+        return stored, await db[CHANNELS_COLLECTION].find_one({"_id": "S1"})
+
+    stored, channel = asyncio.run(run())
+    assert stored == 3
+    assert channel["last_entry_id"] == 3
+    assert channel["last_created_at"].replace(tzinfo=timezone.utc) == START + timedelta(minutes=3)
+    assert "locked_until" not in channel
+
+
+def test_repeated_poll_stores_nothing_new(db):
+    poller = make_poller(db, [feed(1), feed(2)])
+
+    async def run():
+        await add_channel(db)
+        first = await poller.poll_once()
+        second = await poller.poll_once()
+        return first, second, await db[READINGS_COLLECTION].count_documents({})
+
+    assert asyncio.run(run()) == (2, 0, 2)
+
+
+def test_failed_insert_keeps_cursor_for_retry(db, monkeypatch):
+    poller = make_poller(db, [feed(1), feed(2)])
+    store = poller._store
+
+    async def failing_store(sensor_id, readings):
+        raise RuntimeError("insert failed")
+
+    async def run():
+        await add_channel(db)
+        monkeypatch.setattr(poller, "_store", failing_store)
+        with pytest.raises(RuntimeError):
+            await poller._poll_channel({"_id": "S1"})
+        after_failure = await db[CHANNELS_COLLECTION].find_one({"_id": "S1"})
+
+        monkeypatch.setattr(poller, "_store", store)
+        retried = await poller._poll_channel({"_id": "S1"})
+        return after_failure, retried
+
+    after_failure, retried = asyncio.run(run())
+    assert after_failure["last_entry_id"] == 0
+    assert "locked_until" not in after_failure
+    assert retried == 2
+
+
+def test_leased_channel_is_skipped(db):
+    poller = make_poller(db, [feed(1)])
+
+    async def run():
+        await add_channel(db, locked_until=datetime.now(timezone.utc) + timedelta(minutes=1))
+        stored = await poller._poll_channel({"_id": "S1"})
+        return stored, await db[READINGS_COLLECTION].count_documents({})
+
+    assert asyncio.run(run()) == (0, 0)
@@ -68,28 +68,12 @@ export default function FarmerDetailsCard({ farmer, onClose }: FarmerDetailsCard
                     return;
                 }
 
-                // Fetch data for all sensors in parallel
-                const promises = farmsWithSensors.map(async (farm) => {
-                    try {
-                        const res = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/demosenserdata?sensor_id=${farm.sensor_id}`);
-                        if (res.ok) {
-                            const data = await res.json();
-                            return { sensor_id: farm.sensor_id, data };
-                        }
-                    } catch (err) {
-                        console.error(`Failed to fetch data for sensor ${farm.sensor_id}`, err);
-                    }
-                    return null;
-                });
-
-                const results = await Promise.all(promises);
-
-                const newSensorMap: Record<string, { soil_moisture: number; water_tank_level: number }> = {};
-                results.forEach(result => {
-                    if (result) {
-                        newSensorMap[result.sensor_id] = result.data;
-                    }
-                });
+                // Fetch data for all sensors in one request
+                const params = new URLSearchParams();
+                farmsWithSensors.forEach(farm => params.append('sensor_ids', farm.sensor_id));
+
+                const res = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/demosenserdata/batch?${params.toString()}`);
+                const newSensorMap: Record<string, { soil_moisture: number; water_tank_level: number }> = res.ok ? await res.json() : {};
 
                 setSensorDataMap(newSensorMap);
 